@@ -0,0 +1,180 @@
+import math
+from typing import Dict, Optional
+
+from process_snapshot import ProcessSnapshot, ProcessState, np
+
+
+class StreamingStats:
+    """Exponentially weighted mean and variance, O(1) per update"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def update(self, value: float):
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class AdaptiveDetector:
+    """Flags processes whose RSS or CPU deviates from their own baseline or from the host.
+
+    Per-process state is an EWMA mean and variance per metric, kept as columns
+    keyed by PID and creation time (``ProcessState``) and updated for all rows of
+    a scan at once; processes that exited are dropped. Host state is updated once
+    per scan from the scan's distribution.
+
+    Either rule also needs the value to be ``min_delta`` above the process's own
+    average, so the largest process of a quiet host is not an outlier merely for
+    sitting in the host's tail.
+    """
+
+    METRICS = ('rss', 'cpu')
+
+    def __init__(self, alpha: float, zscore: float, quantile: float, min_samples: int,
+                 min_delta: Dict[str, float]):
+        self.alpha = alpha
+        self.zscore = zscore
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delta = min_delta
+        self.state = ProcessState(['count'] + [f'{metric}_{part}' for metric in self.METRICS
+                                               for part in ('mean', 'variance')])
+        # Host state: EWMA of each scan's mean, standard deviation and upper quantile
+        self.host_stats = {
+            metric: {part: StreamingStats(alpha) for part in ('mean', 'std', 'tail')}
+            for metric in self.METRICS
+        }
+        self.reasons: Dict[int, str] = {}
+
+    def _host_distribution(self, values) -> tuple:
+        """Mean, standard deviation and configured quantile of one scan's values"""
+        if np is not None:
+            values = np.asarray(values, dtype=np.float64)
+            return float(values.mean()), float(values.std()), float(np.quantile(values, self.quantile))
+        ordered = sorted(values)
+        mean = sum(ordered) / len(ordered)
+        std = math.sqrt(sum((v - mean) ** 2 for v in ordered) / len(ordered))
+        return mean, std, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+    def host_limit(self, metric: str) -> Optional[float]:
+        """Current host outlier limit for ``metric``, or None before the first scan"""
+        host = self.host_stats[metric]
+        if not host['mean'].count:
+            return None
+        return max(host['tail'].mean, host['mean'].mean + self.zscore * host['std'].mean)
+
+    def _reason(self, metric: str, own: bool, deviation: float, std: float) -> str:
+        if own:
+            if std <= 0:
+                return f"{metric} above its steady own baseline"
+            return f"{metric} {deviation / std:.1f} sigma above own baseline"
+        return f"{metric} above host p{int(self.quantile * 100)}"
+
+    def update(self, snapshot: ProcessSnapshot, candidates, cpu=None):
+        """Feed one scan into the statistics and return a mask of flagged rows"""
+        cpu = snapshot.cpu if cpu is None else cpu
+        columns = {'rss': snapshot.rss, 'cpu': cpu}
+        if np is not None:
+            rows = np.flatnonzero(candidates)
+        else:
+            rows = [i for i, flagged in enumerate(candidates) if flagged]
+
+        # Host limits come from previous scans so one burst cannot hide itself
+        host_limits = {metric: self.host_limit(metric) for metric in self.METRICS}
+        if len(rows):
+            for metric in self.METRICS:
+                column = columns[metric]
+                values = np.asarray(column)[rows] if np is not None else [column[i] for i in rows]
+                mean, std, tail = self._host_distribution(values)
+                host = self.host_stats[metric]
+                host['mean'].update(mean)
+                host['std'].update(std)
+                host['tail'].update(tail)
+
+        self.reasons = {}
+        if np is not None:
+            return self._update_columns(snapshot, rows, columns, host_limits)
+        return self._update_rows(snapshot, rows, columns, host_limits)
+
+    def _update_columns(self, snapshot: ProcessSnapshot, rows, columns, host_limits):
+        pids = np.asarray(snapshot.pids)[rows]
+        created = np.asarray(snapshot.create_time)[rows]
+        match = self.state.lookup(pids, created)
+        count = self.state.previous('count', match)
+        seen = count > 0
+
+        flagged = np.zeros(len(rows), dtype=bool)
+        updated = {'count': count + 1}
+        for metric in self.METRICS:
+            values = np.asarray(columns[metric], dtype=np.float64)[rows]
+            # A process seen for the first time starts at its current value with no variance
+            mean = np.where(seen, self.state.previous(f'{metric}_mean', match), values)
+            variance = self.state.previous(f'{metric}_variance', match)
+            std = np.sqrt(variance)
+            deviation = values - mean
+
+            grown = seen & (deviation > self.min_delta[metric])
+            own = grown & (count >= self.min_samples) & (values > mean + self.zscore * std)
+            hits = own.copy()
+            if host_limits[metric] is not None:
+                hits |= grown & (values > host_limits[metric])
+            # Reasons are only written for the few flagged rows; the first metric that flags a row wins
+            for i in np.flatnonzero(hits & ~flagged):
+                self.reasons[int(pids[i])] = self._reason(metric, bool(own[i]), deviation[i], std[i])
+            flagged |= hits
+
+            increment = self.alpha * deviation
+            updated[f'{metric}_mean'] = mean + increment
+            updated[f'{metric}_variance'] = (1 - self.alpha) * (variance + deviation * increment)
+
+        # Only the rows of this scan are kept, which forgets processes that exited
+        self.state.store(pids, created, updated)
+        mask = np.zeros(len(snapshot), dtype=bool)
+        mask[rows[flagged]] = True
+        return mask
+
+    def _update_rows(self, snapshot: ProcessSnapshot, rows, columns, host_limits):
+        pids = [snapshot.pids[i] for i in rows]
+        created = [snapshot.create_time[i] for i in rows]
+        match = self.state.lookup(pids, created)
+        count = self.state.previous('count', match)
+        previous = {field: self.state.previous(field, match) for field in self.state.columns if field != 'count'}
+
+        mask = [False] * len(snapshot)
+        updated = {field: [] for field in self.state.columns}
+        updated['count'] = [c + 1 for c in count]
+        for k, i in enumerate(rows):
+            seen = count[k] > 0
+            for metric in self.METRICS:
+                value = float(columns[metric][i])
+                mean = previous[f'{metric}_mean'][k] if seen else value
+                variance = previous[f'{metric}_variance'][k]
+                std = math.sqrt(variance)
+                deviation = value - mean
+
+                grown = seen and deviation > self.min_delta[metric]
+                own = grown and count[k] >= self.min_samples and value > mean + self.zscore * std
+                host = grown and host_limits[metric] is not None and value > host_limits[metric]
+                if (own or host) and not mask[i]:
+                    mask[i] = True
+                    self.reasons[pids[k]] = self._reason(metric, own, deviation, std)
+
+                increment = self.alpha * deviation
+                updated[f'{metric}_mean'].append(mean + increment)
+                updated[f'{metric}_variance'].append((1 - self.alpha) * (variance + deviation * increment))
+
+        self.state.store(pids, created, updated)
+        return mask
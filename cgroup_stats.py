@@ -0,0 +1,163 @@
+"""
+cgroup v2 accounting for Linux container hosts.
+
+Memory limits and usage belong to cgroups rather than to single processes, so
+each scan maps processes to their cgroup (``/proc/<pid>/cgroup``) and reads the
+cgroup's own counters: ``memory.current``, ``memory.max`` (the effective limit
+is the smallest one on the path to the root), ``cpu.stat`` and ``io.stat``.
+"""
+
+import os
+import re
+import logging
+from typing import Dict, Iterable, List, Optional
+
+# Container ids in common runtime layouts: docker-<id>.scope, /docker/<id>,
+# cri-containerd-<id>.scope, crio-<id>.scope, libpod-<id>.scope
+CONTAINER_ID = re.compile(r'(?:docker|containerd|crio|libpod|cri-o)[-/]([0-9a-f]{64})')
+KUBE_POD = re.compile(r'pod([0-9a-f]{8}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{12})')
+
+
+def find_cgroup2_root() -> Optional[str]:
+    """Mount point of the cgroup v2 hierarchy (unified or hybrid layout), or None"""
+    try:
+        with open('/proc/self/mountinfo') as f:
+            for line in f:
+                # Optional fields end with " - "; the filesystem type follows
+                fields, _, rest = line.partition(' - ')
+                if rest.split(' ', 1)[0] == 'cgroup2':
+                    return fields.split()[4]
+    except OSError:
+        pass
+    return None
+
+
+def read_cgroup_path(pid: int) -> Optional[str]:
+    """cgroup v2 path of a process ("0::/path" in /proc/<pid>/cgroup), or None"""
+    try:
+        with open(f'/proc/{pid}/cgroup') as f:
+            for line in f:
+                if line.startswith('0::'):
+                    return line[3:].strip()
+    except OSError:
+        pass
+    return None
+
+
+def container_name(path: str) -> str:
+    """Short container id for container cgroups, otherwise the cgroup path itself"""
+    match = CONTAINER_ID.search(path)
+    if match:
+        return match.group(1)[:12]
+    match = KUBE_POD.search(path)
+    if match:
+        return f"pod {match.group(1)[:8]}"
+    return path
+
+
+class CgroupTracker:
+    """Reads per-cgroup usage for the cgroups that the scanned processes belong to"""
+
+    def __init__(self, root: str, near_limit: float):
+        self.logger = logging.getLogger(__name__)
+        self.root = root
+        # Fraction of the effective memory limit at which a cgroup is flagged
+        self.near_limit = near_limit
+        self.pid_cgroups: Dict[int, str] = {}
+        self.usage: Dict[str, Dict] = {}
+        self.previous_cpu: Dict[str, tuple] = {}
+
+    def _read(self, path: str, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, path.lstrip('/'), name)) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _read_int(self, path: str, name: str) -> Optional[int]:
+        """Integer file, or None for 'max' and missing files"""
+        value = self._read(path, name)
+        if value is None or value.strip() == 'max':
+            return None
+        return int(value)
+
+    def _read_keyed(self, path: str, name: str) -> Dict[str, int]:
+        """Flat keyed file such as cpu.stat or memory.events"""
+        value = self._read(path, name) or ''
+        return {key: int(number) for key, number in (line.split() for line in value.splitlines() if line)}
+
+    def _read_io(self, path: str) -> Dict[str, int]:
+        """io.stat summed over devices"""
+        totals = {'rbytes': 0, 'wbytes': 0, 'rios': 0, 'wios': 0}
+        for line in (self._read(path, 'io.stat') or '').splitlines():
+            for field in line.split()[1:]:
+                key, _, number = field.partition('=')
+                if key in totals:
+                    totals[key] += int(number)
+        return totals
+
+    def _effective_limit(self, path: str, limits: Dict[str, Optional[int]]) -> Optional[int]:
+        """Smallest memory.max from ``path`` up to the root, memoized per scan in ``limits``"""
+        if path in limits:
+            return limits[path]
+        own = self._read_int(path, 'memory.max') if path != '/' else None
+        parent = self._effective_limit(os.path.dirname(path), limits) if path != '/' else None
+        limit = min((value for value in (own, parent) if value is not None), default=None)
+        limits[path] = limit
+        return limit
+
+    def update(self, pids: Iterable[int], timestamp: float) -> Dict[str, Dict]:
+        """Map ``pids`` to cgroups and read each cgroup's usage once"""
+        members: Dict[str, List[int]] = {}
+        self.pid_cgroups = {}
+        for pid in pids:
+            path = read_cgroup_path(int(pid))
+            if path is not None:
+                self.pid_cgroups[int(pid)] = path
+                members.setdefault(path, []).append(int(pid))
+
+        limits: Dict[str, Optional[int]] = {}
+        usage = {}
+        cpu_samples = {}
+        for path, group_pids in members.items():
+            current = self._read_int(path, 'memory.current')
+            limit = self._effective_limit(path, limits)
+            cpu = self._read_keyed(path, 'cpu.stat')
+            events = self._read_keyed(path, 'memory.events')
+
+            # CPU percent (of one core) from usage_usec between scans
+            cpu_percent = None
+            if 'usage_usec' in cpu:
+                cpu_samples[path] = (timestamp, cpu['usage_usec'])
+                previous = self.previous_cpu.get(path)
+                if previous and timestamp > previous[0]:
+                    cpu_percent = max(0, cpu['usage_usec'] - previous[1]) / 1e6 / (timestamp - previous[0]) * 100
+
+            usage[path] = {
+                'path': path,
+                'container': container_name(path),
+                'pids': group_pids,
+                'memory_current': current,
+                'memory_max': limit,
+                'memory_ratio': current / limit if current is not None and limit else None,
+                'oom_kills': events.get('oom_kill', 0),
+                'cpu_percent': cpu_percent,
+                'cpu_throttled_usec': cpu.get('throttled_usec', 0),
+                'io': self._read_io(path)
+            }
+
+        self.previous_cpu = cpu_samples
+        self.usage = usage
+        return usage
+
+    def clear(self):
+        """Forget the last scan's usage, e.g. while accounting is paused"""
+        self.pid_cgroups = {}
+        self.usage = {}
+        self.previous_cpu = {}
+
+    def near_limit_cgroups(self) -> List[Dict]:
+        """cgroups using at least ``near_limit`` of their effective memory limit, fullest first"""
+        flagged = [usage for usage in self.usage.values()
+                   if usage['memory_ratio'] is not None and usage['memory_ratio'] >= self.near_limit]
+        return sorted(flagged, key=lambda usage: usage['memory_ratio'], reverse=True)
@@ -56,17 +56,157 @@ MEMORY_THRESHOLD_MB = 500
 # CPU threshold (%) - processes using more than this consistently are flagged
 CPU_THRESHOLD_PERCENT = 80
 
+# Adaptive resource-heavy detection - flag processes that deviate from their own
+# baseline or from the host's distribution instead of relying on fixed thresholds
+ADAPTIVE_DETECTION = True
+ADAPTIVE_EWMA_ALPHA = 0.2         # Weight of the newest sample in moving averages
+ADAPTIVE_ZSCORE = 3.0             # Standard deviations above the mean that count as an outlier
+ADAPTIVE_HOST_PERCENTILE = 0.99   # Host distribution tail used as an outlier limit
+ADAPTIVE_MIN_SAMPLES = 5          # Scans of history needed before a process baseline is trusted
+ADAPTIVE_MIN_DELTA_MB = 100       # Ignore memory deviations smaller than this
+ADAPTIVE_MIN_DELTA_CPU = 10       # Ignore CPU deviations smaller than this (percentage points)
+
+# Treat MEMORY_THRESHOLD_MB and CPU_THRESHOLD_PERCENT as hard limits that are always flagged
+USE_HARD_LIMITS = True
+
+# Expensive metrics (USS/PSS via memory_full_info, private working set on Windows) are
+# only collected for the top RSS consumers and already-flagged processes, within a time budget
+EXPENSIVE_METRICS_ENABLED = True
+EXPENSIVE_METRICS_TOP_K = 20      # Largest RSS consumers sampled per scan
+EXPENSIVE_METRICS_BUDGET_MS = 50  # Maximum time spent on expensive metrics per scan
+
+# Hot-thread sampling - per-thread CPU time deltas across two quick samples show which
+# threads of a CPU-heavy process are busy; only resource-heavy processes are sampled
+HOT_THREADS_AUTOMATIC = False     # Also sample the CPU-heaviest flagged processes after every scan
+HOT_THREAD_SAMPLE_INTERVAL = 0.25 # Seconds between the two per-thread samples
+HOT_THREAD_TOP_N = 5              # Threads reported per process
+HOT_THREAD_MAX_PROCESSES = 5      # Flagged processes sampled per scan or on demand
+
+# Self-overhead governor - keep the monitor's own scan CPU time and RSS within a budget by
+# stretching the scan interval and, if that is not enough, scanning at lower detail
+OVERHEAD_GOVERNOR_ENABLED = True
+OVERHEAD_CPU_BUDGET_PERCENT = 1.0  # Average scan CPU time, percent of one core
+OVERHEAD_RSS_BUDGET_MB = 200       # Monitor RSS above which detail is reduced
+OVERHEAD_MAX_INTERVAL = 120        # Longest scan interval (seconds) before detail is reduced instead
+
+# Leak detection - steady growth of RSS, open handles/fds or threads across scans
+LEAK_MIN_SAMPLES = 6              # Scans of history needed before a trend is reported
+LEAK_MIN_R_SQUARED = 0.8          # How closely growth must follow a straight line
+LEAK_TREND_DECAY = 0.98           # Per-scan weight decay of older samples (1.0 = no decay)
+LEAK_MIN_GROWTH_MB_PER_HOUR = 50  # Minimum RSS growth to report
+LEAK_MIN_HANDLES_PER_HOUR = 100   # Minimum handle/fd growth to report
+LEAK_MIN_THREADS_PER_HOUR = 10    # Minimum thread growth to report
+LEAK_HANDLE_LIMIT = 10000         # Handle count used for time-to-threshold estimates
+LEAK_THREAD_LIMIT = 2000          # Thread count used for time-to-threshold estimates
+
+# Disk I/O thresholds - rates are computed from io_counters deltas between scans
+IO_READ_MB_PER_SEC_THRESHOLD = 50
+IO_WRITE_MB_PER_SEC_THRESHOLD = 20
+IO_OPS_PER_SEC_THRESHOLD = 2000   # Read or write operations per second
+
+# Process event tracking - keep the process table current between scans using the
+# Linux netlink process connector (root) or cheap PID-set diffing
+EVENT_TRACKING_ENABLED = True
+EVENT_POLL_INTERVAL = 0.5         # Seconds between PID-set diffs when netlink is unavailable
+
 # Time threshold (seconds) - how long a process should be inactive to be considered for termination
 INACTIVE_TIME_THRESHOLD = 3600  # 1 hour
 
+# Stuck processes - uninterruptible sleep, or running without using CPU time, in this many
+# consecutive scans; zombies that survive this long are reported on their parent
+STUCK_MIN_SCANS = 3
+
+# Progressive scans (GUI and --cli) classify processes in batches while enumerating, show
+# partial results as they arrive, and stop with a partial result at the deadline
+PROGRESSIVE_SCAN_BATCH = 200      # Processes enumerated per batch
+PROGRESSIVE_SCAN_DEADLINE = 10    # Seconds
+
 # Maximum number of duplicate processes allowed for the same executable
 MAX_DUPLICATE_INSTANCES = 3
+# Instances are duplicates when executable path, command line (numbers ignored) and user match.
+# Which instances are kept: 'oldest' (usually the main instance), 'most_active' (highest CPU)
+# or 'lowest_rss' (the rest, and so the most memory, can be reclaimed)
+DUPLICATE_KEEP_POLICY = 'oldest'
+
+# Agent/collector mode - agents send only rows that changed by at least these amounts
+AGENT_SCAN_INTERVAL = 10          # Seconds between agent scans
+AGENT_RSS_CHANGE_KB = 1024        # Minimum RSS change before a row is re-sent
+AGENT_CPU_CHANGE_PERCENT = 1.0    # Minimum CPU change before a row is re-sent
+COLLECTOR_REPORT_INTERVAL = 10    # Seconds between fleet view printouts
+
+# Reclaim planner (Auto Clean) - stop only the lowest-impact processes and services
+# needed to reach a goal instead of everything that was flagged
+RECLAIM_TARGET_AVAILABLE_MB = 2048  # Auto Clean goal: at least this much available memory
+RECLAIM_TARGET_CPU_PERCENT = 70     # ...and total CPU usage at or below this
+RECLAIM_CATEGORY_COST = {           # Eligible categories and their extra cost per stop, cheapest first
+    'unnecessary': 0.0,
+    'inactive': 0.2,
+    'duplicates': 0.3,
+    'leaking': 0.5,
+    'resource_heavy': 1.0
+}
+RECLAIM_SERVICE_COST = 0.5          # Extra cost of stopping an unnecessary service
+RECLAIM_PRIORITY_WEIGHT = 1.0       # Extra cost for high-priority processes
+RECLAIM_RECENT_WEIGHT = 1.0         # Extra cost for recently started processes...
+RECLAIM_RECENT_SECONDS = 600        # ...decaying with this age scale (seconds)
+RECLAIM_THROTTLE_CATEGORIES = ('resource_heavy', 'io_heavy')  # Slowed down rather than killed when enough
+RECLAIM_THROTTLE_COST = 0.3         # Cost of throttling a process (a stop costs at least 1)
+RECLAIM_ACTIONS_PER_SECOND = 2      # Rate limit when executing a plan
+
+# Throttling - slow legitimate but noisy processes down instead of killing them
+THROTTLE_CPU_FRACTION = 0.25      # Share of the cores a throttled process is pinned to (0 = leave affinity)
+THROTTLE_NICE = 10                # Unix nice value of throttled processes
+THROTTLE_WINDOWS_PRIORITY = 'below_normal'  # Windows priority class: 'below_normal' or 'idle'
+THROTTLE_IO_PRIORITY = 'low'      # I/O priority: 'low', 'idle' or None to leave it unchanged
+
+# cgroup v2 accounting (Linux) - per-cgroup memory/CPU/IO and limits for container hosts
+CGROUP_ACCOUNTING = True
+CGROUP_MEMORY_NEAR_LIMIT = 0.9    # Flag cgroups using this fraction of their effective memory.max
+
+# Pressure watcher - sample cheap host signals and scan only when pressure rises.
+# Each signal has (elevated, critical) levels; PSI values are /proc/pressure avg10 stall percentages (Linux)
+PRESSURE_WATCH_ENABLED = True
+PRESSURE_SAMPLE_INTERVAL = 1.0    # Seconds between samples
+PRESSURE_COOLDOWN = 60            # Seconds before re-triggering while pressure stays up
+PRESSURE_THRESHOLDS = {
+    'memory_percent': (85, 95),
+    'swap_percent': (50, 80),
+    'cpu_percent': (90, 98),
+    'psi_memory_some': (10, 40),
+    'psi_memory_full': (5, 20),
+    'psi_cpu_some': (50, 80)
+}
+PRESSURE_RECLAIM_POLICY = 'plan'  # At critical pressure: 'off', 'plan' (show/confirm) or 'execute'
+
+# Binary snapshot archives (.rmsnap) - written next to JSON exports and compared with --diff
+EXPORT_SNAPSHOT_ARCHIVE = True
+DIFF_GROWN_MB = 50                # Minimum RSS growth for a process to count as grown
+DIFF_GROWN_RATIO = 0.2            # ...and minimum growth relative to its previous RSS
+
+# Shared snapshot - a background collector (main.py --publish) keeps the latest scan in shared
+# memory; the GUI, --cli and exports read it while it is fresh instead of scanning themselves
+SHARED_SNAPSHOT_ENABLED = True
+SHARED_SNAPSHOT_NAME = 'resource_monitor_snapshot'
+SHARED_SNAPSHOT_SIZE = 16 * 1024 * 1024  # Bytes reserved for the encoded snapshot
+SHARED_SNAPSHOT_INTERVAL = 5      # Seconds between collector scans
+SHARED_SNAPSHOT_MAX_AGE = 15      # Older snapshots are ignored and readers scan themselves
+
+# Single instance - a second GUI launch asks the running window to come to the front and
+# rescan instead of starting another scanner; --cli and --save-snapshot reuse its latest scan
+SINGLE_INSTANCE_ENABLED = True
+SINGLE_INSTANCE_NAME = 'resource_monitor'  # Per-user named pipe / Unix socket name
+SINGLE_INSTANCE_TIMEOUT = 2.0     # Seconds to wait for the running instance to answer
 
 # Logging configuration
 LOG_FILE = 'resource_monitor.log'
 LOG_LEVEL = 'INFO'
+LOG_TAB_MAX_LINES = 2000          # Older lines in the GUI log tab are trimmed beyond this
+LOG_TAB_LEVEL = 'INFO'            # Initial minimum level shown in the log tab
 
 # GUI Configuration
 WINDOW_TITLE = "Resource Monitor Scanner"
 WINDOW_SIZE = "800x600"
-REFRESH_INTERVAL = 5000  # milliseconds 
\ No newline at end of file
+REFRESH_INTERVAL = 5000  # milliseconds
+UI_FRAME_MS = 100        # How often updates from worker threads (status, results, log lines) are applied
+GUI_MAX_ROWS = 2000      # Filtered/sorted rows shown at once; the rest are counted but not inserted
+GUI_PREVIEW_INTERVAL = 0.5  # Seconds between list refreshes while a progressive scan is running 
\ No newline at end of file
@@ -9,9 +9,20 @@ import os
 import subprocess
 import platform
 
+def activate_running_instance():
+    """Ask an already running GUI to come to the front and rescan; False if none is running"""
+    from config import SINGLE_INSTANCE_ENABLED
+    from single_instance import send_command
+    return SINGLE_INSTANCE_ENABLED and send_command('activate') is not None
+
 def launch_detached_gui():
     """Launch the GUI application detached from the console"""
     
+    # A repeat launch reuses the running instance instead of starting another scanner
+    if activate_running_instance():
+        print("Resource Monitor Scanner is already running; asked it to come to the front and rescan.")
+        return True
+    
     # Get the path to main.py
     script_dir = os.path.dirname(os.path.abspath(__file__))
     main_script = os.path.join(script_dir, 'main.py')
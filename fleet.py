@@ -0,0 +1,339 @@
+"""
+Agent and collector modes for aggregating many hosts.
+
+Agents scan locally and stream compact binary deltas (rows that changed since
+the last send, plus PIDs that disappeared) to a collector over TCP or a Unix
+socket. The collector merges every agent into one fleet view with per-host
+rollups.
+"""
+
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import logging
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    AGENT_SCAN_INTERVAL, AGENT_RSS_CHANGE_KB, AGENT_CPU_CHANGE_PERCENT, COLLECTOR_REPORT_INTERVAL
+)
+from process_snapshot import CATEGORY_FLAGS, category_flags
+
+logger = logging.getLogger(__name__)
+
+# Frame header: magic, frame type, flags, payload length
+FRAME_HEADER = struct.Struct('<2sBBI')
+FRAME_MAGIC = b'RM'
+FRAME_HELLO = 1
+FRAME_DELTA = 2
+FLAG_COMPRESSED = 0x01
+COMPRESS_MIN_BYTES = 512
+MAX_FRAME_BYTES = 64 * 1024 * 1024   # Larger frames, before or after decompression, are rejected
+
+# Delta payload pieces
+DELTA_HEADER = struct.Struct('<IdIII')   # sequence, timestamp, new strings, upserts, removals
+STRING_LENGTH = struct.Struct('<H')
+# pid, name id, rss (KB), cpu (tenths of a percent), age (s), status code, category flags
+ROW = struct.Struct('<IIIHIBB')
+PID = struct.Struct('<I')
+
+
+def parse_address(text: str) -> Tuple[int, object]:
+    """Parse ``host:port`` or ``unix:/path`` into a socket family and address"""
+    if text.startswith('unix:'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix sockets are not supported on this platform")
+        return socket.AF_UNIX, text[len('unix:'):]
+    host, _, port = text.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address (expected host:port or unix:/path): {text}")
+    return socket.AF_INET, (host, int(port))
+
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    flags = 0
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, FLAG_COMPRESSED
+    return FRAME_HEADER.pack(FRAME_MAGIC, frame_type, flags, len(payload)) + payload
+
+
+def read_frame(stream) -> Optional[Tuple[int, bytes]]:
+    """Read one frame from a file-like stream; None at end of stream"""
+    header = stream.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    magic, frame_type, flags, length = FRAME_HEADER.unpack(header)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Invalid frame header")
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None
+    if flags & FLAG_COMPRESSED:
+        # Bounded, so a small frame cannot inflate into an unbounded allocation
+        decompressor = zlib.decompressobj()
+        payload = decompressor.decompress(payload, MAX_FRAME_BYTES)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"Decompressed frame exceeds {MAX_FRAME_BYTES} bytes")
+    return frame_type, payload
+
+
+def snapshot_rows(scanner) -> Dict[int, tuple]:
+    """Rows of the scanner's latest snapshot as ``pid -> (name, rss_kb, cpu_tenths, age, status, flags)``"""
+    snapshot = scanner.last_snapshot
+    if snapshot is None:
+        return {}
+
+    flags_by_pid = category_flags(scanner.last_results)
+
+    rows = {}
+    for i in range(len(snapshot)):
+        pid = int(snapshot.pids[i])
+        rows[pid] = (
+            snapshot.names[int(snapshot.name_ids[i])],
+            min(int(snapshot.rss[i]) // 1024, 0xFFFFFFFF),
+            min(int(round(float(snapshot.cpu[i]) * 10)), 0xFFFF),
+            min(max(int(snapshot.age[i]), 0), 0xFFFFFFFF),
+            int(snapshot.status[i]),
+            flags_by_pid.get(pid, 0)
+        )
+    return rows
+
+
+class DeltaEncoder:
+    """Agent-side state: the string table and rows already sent on this connection"""
+
+    def __init__(self, rss_change_kb: int = AGENT_RSS_CHANGE_KB, cpu_change: float = AGENT_CPU_CHANGE_PERCENT):
+        self.rss_change_kb = rss_change_kb
+        self.cpu_change_tenths = int(cpu_change * 10)
+        self.strings: Dict[str, int] = {}
+        self.sent: Dict[int, tuple] = {}
+        self.sequence = 0
+
+    def _changed(self, old: tuple, new: tuple) -> bool:
+        # Name, status and category changes always count; numbers only past a threshold
+        return (old[0] != new[0] or old[4] != new[4] or old[5] != new[5] or
+                abs(old[1] - new[1]) >= self.rss_change_kb or
+                abs(old[2] - new[2]) >= self.cpu_change_tenths)
+
+    def encode(self, rows: Dict[int, tuple], timestamp: float) -> bytes:
+        """Encode rows that changed since the last call and PIDs that disappeared"""
+        new_strings = []
+        upserts = []
+        for pid, row in rows.items():
+            old = self.sent.get(pid)
+            if old is not None and not self._changed(old, row):
+                continue
+            name_id = self.strings.get(row[0])
+            if name_id is None:
+                name_id = self.strings[row[0]] = len(self.strings)
+                new_strings.append(row[0])
+            upserts.append(ROW.pack(pid, name_id, *row[1:]))
+            self.sent[pid] = row
+
+        removals = [pid for pid in self.sent if pid not in rows]
+        for pid in removals:
+            del self.sent[pid]
+
+        self.sequence += 1
+        parts = [DELTA_HEADER.pack(self.sequence, timestamp, len(new_strings), len(upserts), len(removals))]
+        for text in new_strings:
+            data = text.encode('utf-8')[:0xFFFF]
+            parts.append(STRING_LENGTH.pack(len(data)))
+            parts.append(data)
+        parts.extend(upserts)
+        parts.extend(PID.pack(pid) for pid in removals)
+        return b''.join(parts)
+
+
+class DeltaDecoder:
+    """Collector-side state for one agent connection"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.rows: Dict[int, tuple] = {}
+        self.timestamp = 0.0
+
+    def apply(self, payload: bytes):
+        sequence, self.timestamp, string_count, upsert_count, removal_count = DELTA_HEADER.unpack_from(payload)
+        offset = DELTA_HEADER.size
+        for _ in range(string_count):
+            length = STRING_LENGTH.unpack_from(payload, offset)[0]
+            offset += STRING_LENGTH.size
+            self.strings.append(payload[offset:offset + length].decode('utf-8', 'replace'))
+            offset += length
+        for _ in range(upsert_count):
+            pid, name_id, *values = ROW.unpack_from(payload, offset)
+            offset += ROW.size
+            if name_id >= len(self.strings):
+                raise ValueError(f"Delta row for PID {pid} refers to unknown string {name_id}")
+            self.rows[pid] = (self.strings[name_id], *values)
+        for _ in range(removal_count):
+            self.rows.pop(PID.unpack_from(payload, offset)[0], None)
+            offset += PID.size
+
+
+class FleetView:
+    """Merged view of every connected agent"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts: Dict[str, Dict] = {}
+
+    def connect(self, host: str) -> DeltaDecoder:
+        decoder = DeltaDecoder()
+        with self.lock:
+            self.hosts[host] = {'decoder': decoder, 'connected': True, 'last_seen': time.time(), 'bytes': 0}
+        return decoder
+
+    def apply(self, host: str, payload: bytes):
+        """Apply one delta frame from ``host``"""
+        with self.lock:
+            state = self.hosts[host]
+            state['decoder'].apply(payload)
+            state['last_seen'] = time.time()
+            state['bytes'] += FRAME_HEADER.size + len(payload)
+
+    def disconnect(self, host: str):
+        with self.lock:
+            if host in self.hosts:
+                self.hosts[host]['connected'] = False
+
+    def rollups(self) -> List[Dict]:
+        """Per-host totals, category counts and the largest process"""
+        summaries = []
+        with self.lock:
+            hosts = list(self.hosts.items())
+            rows_by_host = {host: list(state['decoder'].rows.items()) for host, state in hosts}
+        for host, state in sorted(hosts, key=lambda item: item[0]):
+            rows = rows_by_host[host]
+            categories = {name: 0 for name in CATEGORY_FLAGS}
+            for _, row in rows:
+                for name, bit in CATEGORY_FLAGS.items():
+                    if row[5] & bit:
+                        categories[name] += 1
+            top = max(rows, key=lambda item: item[1][1], default=None)
+            summaries.append({
+                'host': host,
+                'connected': state['connected'],
+                'last_seen': state['last_seen'],
+                'bytes_received': state['bytes'],
+                'processes': len(rows),
+                'memory_mb': round(sum(row[1] for _, row in rows) / 1024, 1),
+                'cpu_percent': round(sum(row[2] for _, row in rows) / 10, 1),
+                'categories': categories,
+                'top_process': f"{top[1][0]} (PID: {top[0]}, {top[1][1] // 1024}MB)" if top else 'N/A'
+            })
+        return summaries
+
+
+def run_agent(address: str, name: Optional[str] = None, interval: float = AGENT_SCAN_INTERVAL,
+              stop_event: Optional[threading.Event] = None):
+    """Scan locally every ``interval`` seconds and stream deltas to a collector"""
+    from process_scanner import ProcessScanner
+
+    family, target = parse_address(address)
+    host = name or socket.gethostname()
+    scanner = ProcessScanner()
+    stop_event = stop_event or threading.Event()
+
+    while not stop_event.is_set():
+        try:
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.connect(target)
+                logger.info(f"Agent {host} connected to collector at {address}")
+                sock.sendall(encode_frame(FRAME_HELLO, host.encode('utf-8')))
+                # A new connection starts from an empty state, so the first delta is a full snapshot
+                encoder = DeltaEncoder()
+                while not stop_event.is_set():
+                    scanner.scan_all()
+                    payload = encoder.encode(snapshot_rows(scanner), time.time())
+                    sock.sendall(encode_frame(FRAME_DELTA, payload))
+                    stop_event.wait(scanner.scan_interval(interval))
+        except OSError as e:
+            logger.warning(f"Agent connection to {address} failed: {e}; retrying")
+            stop_event.wait(min(interval, 5))
+
+
+class CollectorHandler(socketserver.StreamRequestHandler):
+    """Reads frames from one agent connection into the shared fleet view"""
+
+    def handle(self):
+        fleet = self.server.fleet
+        frame = read_frame(self.rfile)
+        if frame is None or frame[0] != FRAME_HELLO:
+            return
+        host = frame[1].decode('utf-8', 'replace')
+        fleet.connect(host)
+        logger.info(f"Agent connected: {host}")
+        try:
+            while True:
+                frame = read_frame(self.rfile)
+                if frame is None:
+                    break
+                if frame[0] == FRAME_DELTA:
+                    fleet.apply(host, frame[1])
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            logger.warning(f"Dropping agent {host}: {e}")
+        finally:
+            fleet.disconnect(host)
+            logger.info(f"Agent disconnected: {host}")
+
+
+class TCPCollectorServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class UnixCollectorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def start_collector(address: str, fleet: Optional[FleetView] = None):
+    """Start a collector server in a background thread and return it"""
+    family, target = parse_address(address)
+    if family == socket.AF_INET:
+        server = TCPCollectorServer(target, CollectorHandler)
+    else:
+        if os.path.exists(target):
+            os.unlink(target)
+        server = UnixCollectorServer(target, CollectorHandler)
+    server.fleet = fleet or FleetView()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_fleet(fleet: FleetView):
+    """Print per-host rollups for the whole fleet"""
+    summaries = fleet.rollups()
+    print(f"\nFleet view - {len(summaries)} hosts ({time.strftime('%Y-%m-%d %H:%M:%S')})")
+    print("-" * 50)
+    for summary in summaries:
+        state = 'online' if summary['connected'] else 'offline'
+        flagged = ', '.join(f"{name}: {count}" for name, count in summary['categories'].items() if count)
+        print(f"{summary['host']} [{state}] - {summary['processes']} processes, "
+              f"{summary['memory_mb']}MB, CPU {summary['cpu_percent']}%, "
+              f"{summary['bytes_received']} bytes received")
+        print(f"  Top: {summary['top_process']}")
+        if flagged:
+            print(f"  Flagged: {flagged}")
+
+
+def run_collector(address: str, report_interval: float = COLLECTOR_REPORT_INTERVAL):
+    """Accept agents on ``address`` and print the fleet view periodically"""
+    server = start_collector(address)
+    print(f"Collector listening on {address}")
+    try:
+        while True:
+            time.sleep(report_interval)
+            print_fleet(server.fleet)
+    finally:
+        server.shutdown()
+        server.server_close()
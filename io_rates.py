@@ -0,0 +1,78 @@
+from typing import Dict, Tuple
+
+from process_snapshot import ProcessSnapshot, IO_FIELDS, np
+
+# Rate names derived from each cumulative counter, in IO_FIELDS order
+RATE_FIELDS = ('read_bytes_per_sec', 'write_bytes_per_sec', 'read_ops_per_sec', 'write_ops_per_sec')
+
+
+class IoRateTracker:
+    """Turns cumulative per-process I/O counters into rates between consecutive scans.
+
+    Only the previous snapshot's counters are kept as the baseline, so the cost
+    is the single ``io_counters`` read already done during enumeration.
+    """
+
+    def __init__(self, thresholds: Dict[str, float]):
+        # Minimum rate per RATE_FIELDS entry that marks a process as I/O heavy
+        self.thresholds = thresholds
+        self.baseline = None
+        self.rates: Dict[int, Tuple[float, float, float, float]] = {}
+
+    def update(self, snapshot: ProcessSnapshot, candidates):
+        """Compute rates against the previous scan and return a mask of I/O-heavy rows"""
+        previous, self.baseline = self.baseline, snapshot
+        self.rates = {}
+        if previous is None or snapshot.timestamp <= previous.timestamp:
+            return np.zeros(len(snapshot), dtype=bool) if np is not None else [False] * len(snapshot)
+
+        elapsed = snapshot.timestamp - previous.timestamp
+        if np is not None:
+            return self._update_vectorized(snapshot, previous, candidates, elapsed)
+
+        # Match rows by PID and creation time so a reused PID never produces a delta
+        index = {(proc.pid, proc.info.get('create_time')): i for i, proc in enumerate(previous.procs)}
+        mask = []
+        for i, (proc, flagged) in enumerate(zip(snapshot.procs, candidates)):
+            j = index.get((proc.pid, proc.info.get('create_time')))
+            heavy = False
+            if j is not None:
+                rates = []
+                for field in IO_FIELDS:
+                    now, before = snapshot.io[field][i], previous.io[field][j]
+                    rates.append(max(0, now - before) / elapsed if now >= 0 and before >= 0 else 0.0)
+                if any(rates):
+                    self.rates[proc.pid] = tuple(rates)
+                heavy = flagged and any(rate > self.thresholds[name] for rate, name in zip(rates, RATE_FIELDS))
+            mask.append(heavy)
+        return mask
+
+    def _update_vectorized(self, snapshot: ProcessSnapshot, previous: ProcessSnapshot, candidates, elapsed: float):
+        """NumPy version of ``update``: align both snapshots by PID with a sorted search"""
+        n = len(snapshot)
+        if not n or not len(previous):
+            return np.zeros(n, dtype=bool)
+
+        order = np.argsort(previous.pids)
+        sorted_pids = previous.pids[order]
+        position = np.minimum(np.searchsorted(sorted_pids, snapshot.pids), sorted_pids.size - 1)
+        match = order[position]
+        created_now = snapshot.timestamp - snapshot.age
+        created_before = previous.timestamp - previous.age[match]
+        matched = (previous.pids[match] == snapshot.pids) & (np.abs(created_now - created_before) < 1.0)
+
+        mask = np.zeros(n, dtype=bool)
+        active = np.zeros(n, dtype=bool)
+        columns = []
+        for field, name in zip(IO_FIELDS, RATE_FIELDS):
+            now, before = snapshot.io[field], previous.io[field][match]
+            valid = matched & (now >= 0) & (before >= 0)
+            rate = np.where(valid, np.maximum(now - before, 0) / elapsed, 0.0)
+            columns.append(rate)
+            active |= rate > 0
+            mask |= rate > self.thresholds[name]
+
+        for i in np.flatnonzero(active):
+            self.rates[int(snapshot.pids[i])] = tuple(float(column[i]) for column in columns)
+
+        return mask & np.asarray(candidates, dtype=bool)
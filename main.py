@@ -47,8 +47,30 @@ def setup_logging(log_level='INFO', log_file=None):
         file_handler.setFormatter(formatter)
         root_logger.addHandler(file_handler)
 
-def run_cli_scan():
-    """Run a command-line scan without GUI"""
+def attached_snapshot():
+    """Fresh snapshot from the shared-memory collector or the running GUI instance, with its source"""
+    import time
+    from config import (SHARED_SNAPSHOT_ENABLED, SINGLE_INSTANCE_ENABLED, SINGLE_INSTANCE_TIMEOUT,
+                        PROGRESSIVE_SCAN_DEADLINE)
+    from shared_snapshot import read_shared_snapshot, SharedSnapshot
+    from snapshot_archive import SnapshotArchive
+    
+    shared = read_shared_snapshot() if SHARED_SNAPSHOT_ENABLED else None
+    if shared is not None:
+        return shared, f"published by the collector (PID {shared.writer_pid})"
+    if SINGLE_INSTANCE_ENABLED:
+        from single_instance import send_command
+        # The instance rescans first if its last scan is stale
+        response = send_command('snapshot', PROGRESSIVE_SCAN_DEADLINE + SINGLE_INSTANCE_TIMEOUT)
+        if response is not None and response[0].get('ok') and response[1]:
+            reply, payload = response
+            archive = SnapshotArchive.from_buffer(payload, f"instance:{reply['pid']}")
+            return (SharedSnapshot(archive, payload, reply['timestamp'], reply['pid']),
+                    f"of the running GUI instance (PID {reply['pid']})")
+    return None, None
+
+def run_cli_scan(deadline=None):
+    """Run a command-line scan without GUI, printing findings batch by batch"""
     print("Resource Monitor Scanner - CLI Mode")
     print("=" * 50)
     
@@ -64,11 +86,29 @@ def run_cli_scan():
     scanner = ProcessScanner()
     service_manager = ServiceManager()
     
-    print("Scanning processes...")
-    results = scanner.scan_all()
+    import time
+    from config import PROGRESSIVE_SCAN_DEADLINE
+    from thread_sampler import describe_hot_threads
+    shared, source = attached_snapshot()
+    if shared is not None:
+        print(f"Using the snapshot {source} from {time.time() - shared.published:.1f}s ago")
+        results, partial = shared.archive.live_results(), False
+    else:
+        print("Scanning processes...")
+        deadline = PROGRESSIVE_SCAN_DEADLINE if deadline is None else deadline
+        for step in scanner.scan_progressive(deadline):
+            if not step.final:
+                found = ", ".join(f"{category.replace('_', ' ')} {len(hits)}"
+                                  for category, hits in step.results.items() if hits)
+                print(f"  {step.scanned} scanned{': ' + found if found else ''}")
+                continue
+            results, partial, scanned = step.results, step.partial, step.scanned
     
     print("\nScan Results:")
     print("-" * 30)
+    if partial:
+        print(f"PARTIAL: scan stopped at the {deadline}s deadline after {scanned} processes; "
+              f"duplicates, leaks and I/O rates were not evaluated")
     
     total_issues = 0
     for process_type, processes in results.items():
@@ -81,11 +121,36 @@ def run_cli_scan():
                 details = scanner.get_process_details(proc)
                 if details:
                     print(f"  - {details['name']} (PID: {details['pid']}, Memory: {details['memory_mb']}MB)")
+                    if 'io_read_mb_s' in details:
+                        print(f"    Disk: read {details['io_read_mb_s']} MB/s ({details['io_read_ops_s']} ops/s), "
+                              f"write {details['io_write_mb_s']} MB/s ({details['io_write_ops_s']} ops/s)")
+                    if 'hot_threads' in details:
+                        print(f"    Hot threads: {describe_hot_threads(scanner.hot_threads[proc.pid])}")
+                    if 'stuck_reason' in details:
+                        print(f"    {details['stuck_reason'].capitalize()}: {details['recommended_action']}")
+                    if 'duplicate_of' in details:
+                        print(f"    {details['duplicate_instances']} instances of {details['duplicate_of']}")
+                    if 'growth_rate' in details:
+                        print(f"    Growing {details['growth_rate']} ({details['leak_metric']}), "
+                              f"threshold in {details['time_to_threshold']}")
     
     print(f"\nTotal issues found: {total_issues}")
     
+    near_limit = scanner.find_cgroups_near_limit()
+    if near_limit:
+        print(f"\ncgroups near their memory limit: {len(near_limit)}")
+        for cgroup in near_limit:
+            print(f"  - {cgroup['container']}: {format_cgroup_memory(cgroup)}, "
+                  f"{len(cgroup['pids'])} processes, {cgroup['oom_kills']} OOM kills so far")
+    
+    overhead = scanner.overhead()
+    if overhead is not None:
+        print(f"Scan cost: {overhead['scan_cpu_ms']:.0f} ms CPU, monitor RSS {overhead['rss_mb']:.0f} MB "
+              f"({overhead['depth']} detail)")
+    
     print("\nScanning services...")
-    unnecessary_services = service_manager.find_unnecessary_services()
+    unnecessary_services = service_manager.find_unnecessary_services(
+        shared.archive.service_list() if shared is not None and shared.archive.service_count else None)
     print(f"Unnecessary running services: {len(unnecessary_services)}")
     
     for service in unnecessary_services[:10]:  # Show first 10
@@ -93,6 +158,279 @@ def run_cli_scan():
     
     print("\nScan completed. Use GUI mode for interactive management.")
 
+def format_cgroup_memory(cgroup):
+    """Memory use of a cgroup against its effective limit"""
+    if cgroup['memory_current'] is None:
+        return "n/a"
+    current_mb = round(cgroup['memory_current'] / 1024 / 1024, 2)
+    if cgroup['memory_max'] is None:
+        return f"{current_mb}MB (no limit)"
+    return f"{current_mb}MB of {round(cgroup['memory_max'] / 1024 / 1024, 2)}MB ({cgroup['memory_ratio']:.0%})"
+
+def run_cli_cgroups():
+    """Print per-cgroup memory, CPU and I/O usage, fullest first"""
+    print("Resource Monitor Scanner - cgroups")
+    print("=" * 50)
+    
+    from process_scanner import ProcessScanner
+    
+    scanner = ProcessScanner()
+    if scanner.cgroup_tracker is None:
+        print("cgroup v2 accounting is not available on this system")
+        return
+    
+    scanner.scan_all()
+    usage = sorted(scanner.cgroup_tracker.usage.values(),
+                   key=lambda cgroup: (cgroup['memory_ratio'] or 0, cgroup['memory_current'] or 0), reverse=True)
+    for cgroup in usage:
+        flag = " [NEAR LIMIT]" if cgroup['memory_ratio'] is not None and \
+            cgroup['memory_ratio'] >= scanner.cgroup_tracker.near_limit else ""
+        cpu = f"{cgroup['cpu_percent']:.1f}%" if cgroup['cpu_percent'] is not None else "n/a"
+        io = cgroup['io']
+        print(f"{cgroup['container']}{flag}")
+        print(f"    Memory: {format_cgroup_memory(cgroup)}, CPU: {cpu}, "
+              f"Disk: read {round(io['rbytes'] / 1024 / 1024, 2)}MB, write {round(io['wbytes'] / 1024 / 1024, 2)}MB, "
+              f"Processes: {len(cgroup['pids'])}")
+
+def run_cli_records(deadline, fields, output_format):
+    """Scan and write the flagged processes with only the requested fields, for scripts"""
+    from process_fields import DEFAULT_FIELDS, project, write_records
+    fields = fields or DEFAULT_FIELDS
+    
+    shared, source = attached_snapshot()
+    if shared is not None:
+        print(f"Using the snapshot {source}", file=sys.stderr)
+        results = shared.archive.live_results()
+    else:
+        try:
+            from process_scanner import ProcessScanner
+        except ImportError as e:
+            print(f"Error importing modules: {e}", file=sys.stderr)
+            return
+        from config import PROGRESSIVE_SCAN_DEADLINE
+        deadline = PROGRESSIVE_SCAN_DEADLINE if deadline is None else deadline
+        for step in ProcessScanner().scan_progressive(deadline):
+            results = step.results
+        if step.partial:
+            print(f"Warning: partial results, the scan stopped at the {deadline}s deadline "
+                  f"after {step.scanned} processes", file=sys.stderr)
+    
+    # The scan already read the snapshot attributes; others (user, cmdline, ...) only when requested
+    def records():
+        for category, procs in results.items():
+            for proc in procs:
+                record = project(proc, fields)
+                if record is not None:
+                    yield dict(category=category, **record)
+    
+    write_records(records(), ['category'] + fields, output_format)
+
+def run_cli_list(fields, output_format):
+    """Write every process with only the requested fields, without a scan"""
+    import time
+    import psutil
+    from process_fields import DEFAULT_FIELDS, required_attrs, project, write_records
+    fields = fields or DEFAULT_FIELDS
+    attrs = required_attrs(fields)
+    
+    if 'cpu_percent' in attrs:
+        # cpu_percent needs a previous sample to compare against
+        for proc in psutil.process_iter(['cpu_percent']):
+            pass
+        time.sleep(0.5)
+    
+    records = (project(proc, fields) for proc in psutil.process_iter(attrs))
+    write_records((record for record in records if record is not None), fields, output_format)
+
+def run_cli_top(n, sort_key, fields=None, output_format='text'):
+    """Print the top N processes by memory, CPU or age"""
+    try:
+        from process_scanner import ProcessScanner
+    except ImportError as e:
+        print(f"Error importing modules: {e}")
+        print("Please ensure all dependencies are installed: pip install -r requirements.txt")
+        return
+    
+    scanner = ProcessScanner()
+    
+    if fields is not None or output_format != 'text':
+        from process_fields import DEFAULT_FIELDS, required_attrs, project, write_records
+        fields = fields or DEFAULT_FIELDS
+        # Only the ranking attribute and the requested fields are read
+        procs = scanner.top(n, sort_key, attrs=required_attrs(fields))
+        write_records(filter(None, (project(proc, fields) for proc in procs)), fields, output_format)
+        return
+    
+    print(f"Resource Monitor Scanner - Top {n} by {sort_key} (critical system processes are not ranked)")
+    print("=" * 50)
+    
+    # Details are only fetched for processes that made it into the top N; cpu_percent is
+    # always part of the sampled attributes, since a first cpu_percent() call returns 0
+    for rank, proc in enumerate(scanner.top(n, sort_key, attrs=['cpu_percent']), 1):
+        details = scanner.get_process_details(proc)
+        if details:
+            cpu_percent = round(proc.info['cpu_percent'] or 0.0, 2)
+            print(f"{rank:3}. {details['name']} (PID: {details['pid']}, Memory: {details['memory_mb']}MB, "
+                  f"CPU: {cpu_percent}%, Started: {details['create_time']})")
+
+def run_cli_hot_threads(pids):
+    """Print the busiest threads of the given PIDs, or of the CPU-heaviest resource-heavy processes"""
+    print("Resource Monitor Scanner - Hot Threads")
+    print("=" * 50)
+    
+    try:
+        import time
+        import psutil
+        from process_scanner import ProcessScanner
+        from thread_sampler import describe_hot_threads
+    except ImportError as e:
+        print(f"Error importing modules: {e}")
+        print("Please ensure all dependencies are installed: pip install -r requirements.txt")
+        return
+    
+    scanner = ProcessScanner()
+    if pids:
+        procs = []
+        for pid in pids:
+            try:
+                procs.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                print(f"No process with PID {pid}")
+    else:
+        print("Scanning for resource-heavy processes...")
+        # cpu_percent needs a previous sample to compare against
+        scanner.scan_all()
+        time.sleep(1)
+        scanner.scan_all()
+        procs = scanner.hot_thread_candidates(scanner.last_results.get('resource_heavy', []))
+        if not procs:
+            print("No CPU-heavy processes were flagged.")
+            return
+    
+    sampled = scanner.sample_hot_threads(procs)
+    for proc in procs:
+        details = scanner.get_process_details(proc)
+        if details is None or proc.pid not in sampled:
+            print(f"  - PID {proc.pid}: threads not accessible")
+            continue
+        print(f"  - {details['name']} (PID: {proc.pid})")
+        if not sampled[proc.pid]:
+            print("    No thread used CPU during the sample")
+        for thread in sampled[proc.pid]:
+            print(f"    {describe_hot_threads([thread])}")
+
+def run_reclaim(available_mb, cpu_percent, execute):
+    """Print a reclaim plan for the goal and optionally carry it out"""
+    print("Resource Monitor Scanner - Reclaim Plan")
+    print("=" * 50)
+    
+    from process_scanner import ProcessScanner
+    from service_manager import ServiceManager
+    from reclaim_planner import ReclaimPlanner, format_plan, describe_action
+    
+    planner = ReclaimPlanner(ProcessScanner(), ServiceManager())
+    plan = planner.plan(available_mb, cpu_percent)
+    for line in format_plan(plan):
+        print(line)
+    
+    if not plan['actions']:
+        return
+    if not execute:
+        print("\nDry run only. Re-run with --execute to carry out this plan.")
+        return
+    
+    completed = planner.execute(plan, on_action=lambda action, ok: print(f"  {describe_action(action, ok)}"))
+    print(f"\nCompleted {completed} of {len(plan['actions'])} planned actions")
+
+def run_watch(execute):
+    """Sample host pressure and scan (and plan a reclaim) only when it rises"""
+    print("Resource Monitor Scanner - Pressure Watch (Ctrl+C to stop)")
+    print("=" * 50)
+    
+    import time
+    from config import (PRESSURE_SAMPLE_INTERVAL, PRESSURE_THRESHOLDS, PRESSURE_COOLDOWN,
+                        PRESSURE_RECLAIM_POLICY, RECLAIM_CATEGORY_COST)
+    from process_scanner import ProcessScanner
+    from service_manager import ServiceManager
+    from reclaim_planner import ReclaimPlanner, format_plan, reclaim_goal
+    from pressure_watcher import PressureWatcher, describe_signals, pressure_resources
+    
+    scanner = ProcessScanner()
+    planner = ReclaimPlanner(scanner, ServiceManager())
+    
+    def on_pressure(level, sample, signals):
+        print(f"\n[{time.strftime('%H:%M:%S')}] Pressure {level}: {describe_signals(sample, signals)}")
+        # Only the categories a reclaim could act on
+        results = scanner.scan_focused(list(RECLAIM_CATEGORY_COST))
+        print("  " + ", ".join(f"{category.replace('_', ' ')}: {len(procs)}" for category, procs in results.items()))
+        # Expensive scans re-trigger less often while pressure stays high
+        watcher.cooldown = scanner.scan_interval(PRESSURE_COOLDOWN)
+        
+        if level != 'critical' or PRESSURE_RECLAIM_POLICY == 'off':
+            return
+        plan = planner.plan(results=results, **reclaim_goal(pressure_resources(signals)))
+        for line in format_plan(plan):
+            print(f"  {line}")
+        if plan['actions'] and (execute or PRESSURE_RECLAIM_POLICY == 'execute'):
+            completed = planner.execute(plan)
+            print(f"  Completed {completed} of {len(plan['actions'])} planned actions")
+    
+    watcher = PressureWatcher(PRESSURE_SAMPLE_INTERVAL, PRESSURE_THRESHOLDS, PRESSURE_COOLDOWN, on_pressure)
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        watcher.stop()
+
+def save_snapshot(path):
+    """Scan and write a compact binary snapshot archive"""
+    import socket
+    from process_scanner import ProcessScanner
+    from service_manager import ServiceManager
+    from snapshot_archive import write_archive
+    
+    shared, source = attached_snapshot()
+    if shared is not None:
+        # The collector's and the running instance's snapshots are already in archive format
+        with open(path, 'wb') as f:
+            f.write(shared.payload)
+        print(f"Snapshot {source} with {len(shared.archive)} processes written to {path} "
+              f"({len(shared.payload)} bytes)")
+        return
+    
+    scanner = ProcessScanner()
+    results = scanner.scan_all()
+    services = ServiceManager().get_all_services()
+    size = write_archive(path, scanner.last_snapshot, results, services, host=socket.gethostname())
+    print(f"Snapshot with {len(scanner.last_snapshot)} processes written to {path} ({size} bytes)")
+
+def run_diff(old_path, new_path):
+    """Print what changed between two snapshot archives"""
+    from snapshot_archive import SnapshotArchive, diff_archives
+    
+    with SnapshotArchive(old_path) as old, SnapshotArchive(new_path) as new:
+        changes = diff_archives(old, new)
+        print(f"Comparing {old_path} ({old.host}, {len(old)} processes) "
+              f"with {new_path} ({new.host}, {len(new)} processes)")
+    
+    print(f"\nNew processes: {len(changes['new'])}")
+    for row in changes['new']:
+        print(f"  + {row['name']} (PID: {row['pid']}, Memory: {row['memory_mb']}MB, {row['exe'] or 'N/A'})")
+    
+    print(f"\nGone processes: {len(changes['gone'])}")
+    for row in changes['gone']:
+        print(f"  - {row['name']} (PID: {row['pid']}, Memory: {row['memory_mb']}MB)")
+    
+    print(f"\nGrown processes: {len(changes['grown'])}")
+    for row in changes['grown']:
+        print(f"  ^ {row['name']} (PID: {row['pid']}, {row['previous_memory_mb']}MB -> "
+              f"{row['memory_mb']}MB, +{row['growth_mb']}MB)")
+    
+    print(f"\nService state changes: {len(changes['services'])}")
+    for change in changes['services']:
+        print(f"  * {change['name']}: {change['before']} -> {change['after']}")
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -102,6 +440,19 @@ def main():
 Examples:
   python main.py                    # Launch GUI interface
   python main.py --cli              # Run CLI scan only
+  python main.py --top 20 --sort cpu # Show the 20 busiest processes
+  python main.py --hot-threads 4242                # Busiest threads of a process
+  python main.py --cli --format json               # Flagged processes as JSON
+  python main.py --fields pid,rss --format csv     # Every process, reading only PID and RSS
+  python main.py --collector 0.0.0.0:7700         # Aggregate agents
+  python main.py --publish                         # Share snapshots with local GUI/CLI runs
+  python main.py --agent collector-host:7700      # Stream this host to a collector
+  python main.py --save-snapshot today.rmsnap     # Write a binary snapshot
+  python main.py --reclaim --free-mb 4096          # Plan freeing memory (dry run)
+  python main.py --reclaim --cpu-below 70 --execute
+  python main.py --watch                           # Scan only under memory/CPU pressure
+  python main.py --cgroups                         # Per-cgroup/container usage (Linux)
+  python main.py --diff yesterday.rmsnap today.rmsnap
   python main.py --log-file scan.log # Log to file
         """
     )
@@ -112,6 +463,132 @@ Examples:
         help='Run in command-line mode (no GUI)'
     )
     
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        metavar='SECONDS',
+        help='Stop a --cli scan after this many seconds and report partial results '
+             '(default: PROGRESSIVE_SCAN_DEADLINE in config.py)'
+    )
+    
+    parser.add_argument(
+        '--top',
+        type=int,
+        metavar='N',
+        help='Show only the top N processes (implies CLI mode)'
+    )
+    
+    parser.add_argument(
+        '--sort',
+        choices=['rss', 'cpu', 'age'],
+        default='rss',
+        help='Sort key for --top (default: rss)'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=['text', 'json', 'csv', 'ndjson'],
+        default='text',
+        help='Output format for --cli, --top and field listings (default: text)'
+    )
+    
+    parser.add_argument(
+        '--fields',
+        metavar='FIELD,...',
+        help='Comma-separated fields to output (pid, name, rss, vms, cpu, status, ppid, create_time, threads, '
+             'handles, read_bytes, write_bytes, user, exe, cmdline); only these are collected. '
+             'Without --cli or --top, lists every process without scanning'
+    )
+    
+    parser.add_argument(
+        '--hot-threads',
+        nargs='*',
+        type=int,
+        metavar='PID',
+        help='Sample per-thread CPU of these PIDs, or of the CPU-heaviest resource-heavy processes'
+    )
+    
+    parser.add_argument(
+        '--agent',
+        metavar='ADDRESS',
+        help='Run as an agent streaming snapshots to a collector (host:port or unix:/path)'
+    )
+    
+    parser.add_argument(
+        '--agent-name',
+        help='Host name reported by the agent (default: this machine\'s host name)'
+    )
+    
+    parser.add_argument(
+        '--collector',
+        metavar='ADDRESS',
+        help='Run as a collector merging agents into a fleet view (host:port or unix:/path)'
+    )
+    
+    parser.add_argument(
+        '--publish',
+        action='store_true',
+        help='Run a background collector that keeps the latest scan in shared memory '
+             'for the GUI, --cli and exports on this machine'
+    )
+    
+    parser.add_argument(
+        '--interval',
+        type=float,
+        help='Seconds between agent or --publish scans, or collector reports'
+    )
+    
+    parser.add_argument(
+        '--save-snapshot',
+        metavar='PATH',
+        help='Scan and write a compact binary snapshot archive'
+    )
+    
+    parser.add_argument(
+        '--diff',
+        nargs=2,
+        metavar=('OLD', 'NEW'),
+        help='Compare two snapshot archives (new, gone and grown processes; service changes)'
+    )
+    
+    parser.add_argument(
+        '--reclaim',
+        action='store_true',
+        help='Plan the lowest-impact cleanup that reaches --free-mb and/or --cpu-below (dry run)'
+    )
+    
+    parser.add_argument(
+        '--free-mb',
+        type=float,
+        metavar='MB',
+        help='Reclaim goal: at least this much available memory'
+    )
+    
+    parser.add_argument(
+        '--cpu-below',
+        type=float,
+        metavar='PERCENT',
+        help='Reclaim goal: total CPU usage at or below this'
+    )
+    
+    parser.add_argument(
+        '--execute',
+        action='store_true',
+        help='Carry out reclaim plans (--reclaim, or --watch at critical pressure) instead of only printing them'
+    )
+    
+    parser.add_argument(
+        '--cgroups',
+        action='store_true',
+        help='Show memory, CPU and I/O per cgroup/container, flagging those near their memory limit (Linux cgroup v2)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Watch host pressure and scan only when memory or CPU pressure rises'
+    )
+    
     parser.add_argument(
         '--log-level',
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
@@ -132,6 +609,17 @@ Examples:
     
     args = parser.parse_args()
     
+    if args.top is not None and args.top < 1:
+        parser.error(f"--top must be at least 1, got {args.top}")
+    
+    from process_fields import parse_fields
+    try:
+        fields = parse_fields(args.fields) if args.fields else None
+    except ValueError as e:
+        parser.error(str(e))
+    # Machine-readable output or a field projection instead of the text report
+    structured = fields is not None or args.format != 'text'
+    
     # Setup logging
     setup_logging(args.log_level, args.log_file)
     
@@ -139,15 +627,53 @@ Examples:
     logger.info("Starting Resource Monitor Scanner")
     
     try:
-        if args.cli:
+        if args.cgroups:
+            run_cli_cgroups()
+        elif args.watch:
+            run_watch(args.execute)
+        elif args.reclaim:
+            from config import RECLAIM_TARGET_AVAILABLE_MB, RECLAIM_TARGET_CPU_PERCENT
+            if args.free_mb is None and args.cpu_below is None:
+                run_reclaim(RECLAIM_TARGET_AVAILABLE_MB, RECLAIM_TARGET_CPU_PERCENT, args.execute)
+            else:
+                run_reclaim(args.free_mb, args.cpu_below, args.execute)
+        elif args.diff:
+            run_diff(*args.diff)
+        elif args.save_snapshot:
+            save_snapshot(args.save_snapshot)
+        elif args.publish:
+            from shared_snapshot import run_publisher, SHARED_SNAPSHOT_INTERVAL
+            run_publisher(args.interval or SHARED_SNAPSHOT_INTERVAL)
+        elif args.collector:
+            from fleet import run_collector, COLLECTOR_REPORT_INTERVAL
+            run_collector(args.collector, args.interval or COLLECTOR_REPORT_INTERVAL)
+        elif args.agent:
+            from fleet import run_agent, AGENT_SCAN_INTERVAL
+            run_agent(args.agent, args.agent_name, args.interval or AGENT_SCAN_INTERVAL)
+        elif args.hot_threads is not None:
+            run_cli_hot_threads(args.hot_threads)
+        elif args.top is not None:
+            run_cli_top(args.top, args.sort, fields, args.format)
+        elif args.cli and structured:
+            run_cli_records(args.deadline, fields, args.format)
+        elif args.cli:
             # Run CLI mode
-            run_cli_scan()
+            run_cli_scan(args.deadline)
+        elif structured:
+            run_cli_list(fields, args.format)
         else:
             # Check if we're on Windows
             if os.name != 'nt':
                 print("Warning: This tool is designed for Windows systems.")
                 print("Some features may not work correctly on other platforms.")
             
+            from config import SINGLE_INSTANCE_ENABLED
+            from single_instance import send_command
+            if SINGLE_INSTANCE_ENABLED and send_command('activate') is not None:
+                # Checked before importing the GUI so a repeat launch returns at once
+                print("Resource Monitor Scanner is already running; asked it to come to the front and rescan.")
+                return
+            
             # Launch GUI
             print("Launching Resource Monitor Scanner GUI...")
             try:
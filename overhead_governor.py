@@ -0,0 +1,144 @@
+"""
+Keeps the monitor's own cost within a budget.
+
+Every scan's CPU time is measured on the scanning thread and the monitor's own
+RSS is sampled afterwards. When the scans would use more than the CPU budget at
+the requested interval, the interval is stretched; when even the longest
+allowed interval is not enough, or RSS is over budget, scans drop to a lower
+detail depth with less expensive-metric sampling and no cgroup accounting.
+"""
+
+import time
+import logging
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import psutil
+
+# What a scan collects at each detail depth: the share of the expensive-metric
+# top-K and time budget, and whether per-cgroup usage is read
+Depth = namedtuple('Depth', ['name', 'expensive_share', 'cgroups'])
+
+DEPTHS = (
+    Depth('full', 1.0, True),
+    Depth('reduced', 0.25, True),
+    Depth('minimal', 0.0, False)
+)
+
+
+class ScanTimer:
+    """CPU time of the calling thread since creation, less the time spent paused"""
+
+    def __init__(self):
+        self.start = time.thread_time()
+        self.excluded = 0.0
+
+    @contextmanager
+    def paused(self):
+        paused_at = time.thread_time()
+        try:
+            yield
+        finally:
+            self.excluded += time.thread_time() - paused_at
+
+    def elapsed(self) -> float:
+        return time.thread_time() - self.start - self.excluded
+
+
+class OverheadGovernor:
+    """Measures the CPU time and RSS of each scan and adapts the scan interval and detail depth"""
+
+    def __init__(self, cpu_budget_percent: float, rss_budget_mb: float, max_interval: float, alpha: float = 0.3):
+        self.logger = logging.getLogger(__name__)
+        # Percent of one core the scans may use on average
+        self.cpu_budget_percent = cpu_budget_percent
+        self.rss_budget = rss_budget_mb * 1024 * 1024
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.process = psutil.Process()
+        self.level = 0
+        # Moving average of CPU seconds per scan
+        self.scan_cpu: Optional[float] = None
+        self.last_scan_cpu = 0.0
+        self.rss = 0
+        # Whole-process CPU percent (one core) between the last two scans, GUI and threads included
+        self.cpu_percent: Optional[float] = None
+        self.window = (time.monotonic(), sum(self.process.cpu_times()[:2]))
+
+    @property
+    def depth(self) -> Depth:
+        return DEPTHS[self.level]
+
+    @contextmanager
+    def measure(self):
+        """Time the enclosed scan on the calling thread and adapt to its cost.
+        
+        Yields a ``ScanTimer``; work done inside ``timer.paused()`` (such as a
+        generator's consumer running between yields) is not charged to the scan.
+        """
+        timer = ScanTimer()
+        try:
+            yield timer
+        finally:
+            self.record(timer.elapsed())
+
+    def record(self, cpu_seconds: float):
+        self.last_scan_cpu = cpu_seconds
+        self.scan_cpu = cpu_seconds if self.scan_cpu is None else \
+            self.alpha * cpu_seconds + (1 - self.alpha) * self.scan_cpu
+        try:
+            self.rss = self.process.memory_info().rss
+            now, cpu = time.monotonic(), sum(self.process.cpu_times()[:2])
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        started, started_cpu = self.window
+        if now > started:
+            self.cpu_percent = (cpu - started_cpu) / (now - started) * 100
+        self.window = (now, cpu)
+        self.adjust()
+
+    def required_interval(self) -> float:
+        """Shortest interval at which the scans stay within the CPU budget"""
+        if self.scan_cpu is None or self.cpu_budget_percent <= 0:
+            return 0.0
+        return self.scan_cpu / (self.cpu_budget_percent / 100)
+
+    def adjust(self):
+        """Drop to a lower depth when stretching the interval is not enough, and recover with headroom"""
+        required = self.required_interval()
+        if (required > self.max_interval or self.rss > self.rss_budget) and self.level < len(DEPTHS) - 1:
+            self.level += 1
+            self.logger.info(f"Scanner overhead over budget ({self.last_scan_cpu * 1000:.0f} ms CPU per scan, "
+                             f"{self.rss / 1024 / 1024:.0f} MB), reducing detail to {self.depth.name}")
+        # Higher depths cost more, so only step back up with plenty of headroom
+        elif required < self.max_interval / 4 and self.rss < self.rss_budget * 0.8 and self.level > 0:
+            self.level -= 1
+            self.logger.info(f"Scanner overhead within budget, raising detail to {self.depth.name}")
+
+    def scan_interval(self, requested: float) -> float:
+        """``requested`` seconds between scans, stretched up to ``max_interval`` to stay within the CPU budget"""
+        return min(max(requested, self.required_interval()), max(requested, self.max_interval))
+
+    def expensive_sampling(self, top_k: int, budget_ms: float) -> Tuple[int, float]:
+        """Expensive-metric top-K and time budget at the current depth"""
+        share = self.depth.expensive_share
+        return int(top_k * share), budget_ms * share
+
+    def report(self) -> Dict:
+        return {
+            'depth': self.depth.name,
+            'scan_cpu_ms': round(self.last_scan_cpu * 1000, 1),
+            'average_scan_cpu_ms': round((self.scan_cpu or 0.0) * 1000, 1),
+            'cpu_percent': round(self.cpu_percent, 2) if self.cpu_percent is not None else None,
+            'rss_mb': round(self.rss / 1024 / 1024, 1),
+            'cpu_budget_percent': self.cpu_budget_percent,
+            'rss_budget_mb': round(self.rss_budget / 1024 / 1024, 1)
+        }
+
+
+def describe_overhead(report: Dict) -> str:
+    """Short status-bar text for a governor report"""
+    cpu = f"{report['cpu_percent']:.1f}% CPU" if report['cpu_percent'] is not None else "CPU n/a"
+    return (f"Monitor: {cpu}, {report['rss_mb']:.0f} MB, "
+            f"{report['scan_cpu_ms']:.0f} ms/scan ({report['depth']} detail)")
@@ -0,0 +1,208 @@
+"""
+Cheap host pressure sampling that triggers scans only when they are needed.
+
+The watcher samples ``psutil.virtual_memory``, swap, system CPU and, on Linux,
+pressure stall information (PSI) from ``/proc/pressure``. Where the kernel
+allows it, a PSI trigger is registered as well so a sudden memory stall wakes
+the watcher immediately instead of at the next sample.
+"""
+
+import os
+import select
+import threading
+import time
+import logging
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+PSI_ROOT = '/proc/pressure'
+
+LEVELS = ('normal', 'elevated', 'critical')
+
+# Host signals from one sample; PSI fields are the avg10 stall percentages, or None without PSI
+PressureSample = namedtuple('PressureSample', [
+    'timestamp', 'memory_percent', 'swap_percent', 'cpu_percent',
+    'psi_memory_some', 'psi_memory_full', 'psi_cpu_some'
+])
+
+
+def read_psi(resource: str) -> Optional[Dict[str, Dict[str, float]]]:
+    """Parse ``/proc/pressure/<resource>`` into {'some': {...}, 'full': {...}}, or None if unavailable"""
+    try:
+        with open(os.path.join(PSI_ROOT, resource)) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    pressure = {}
+    for line in lines:
+        kind, _, fields = line.partition(' ')
+        pressure[kind] = {key: float(value) for key, value in
+                          (field.split('=') for field in fields.split())}
+    return pressure
+
+
+def describe_signals(sample: PressureSample, signals: List[str]) -> str:
+    return ', '.join(f"{signal} {getattr(sample, signal):.1f}%" for signal in signals)
+
+
+def pressure_resources(signals: List[str]) -> List[str]:
+    """Which resources ('memory', 'cpu') the given signals are about"""
+    resources = []
+    if any('cpu' not in signal for signal in signals):
+        resources.append('memory')
+    if any('cpu' in signal for signal in signals):
+        resources.append('cpu')
+    return resources
+
+
+class PsiTrigger:
+    """Kernel PSI trigger: the file descriptor becomes readable (POLLPRI) when
+    tasks stall on ``resource`` for at least ``stall_us`` within ``window_us``."""
+
+    def __init__(self, resource: str, stall_us: int, window_us: int):
+        self.fd = os.open(os.path.join(PSI_ROOT, resource), os.O_RDWR | os.O_NONBLOCK)
+        try:
+            os.write(self.fd, f"some {stall_us} {window_us}\0".encode())
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PressureWatcher:
+    """Samples host pressure at a fixed interval and calls ``on_pressure`` when it rises.
+
+    ``on_pressure(level, sample, signals)`` is called from the watcher thread
+    when the level goes up, and again every ``cooldown`` seconds while it stays
+    elevated or critical. Sampling is paused while the callback runs.
+    """
+
+    def __init__(self, interval: float, thresholds: Dict[str, Tuple[float, float]], cooldown: float,
+                 on_pressure: Callable[[str, PressureSample, List[str]], None],
+                 psi_window_us: int = 2000000):
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        # Signal name -> (elevated, critical) levels
+        self.thresholds = thresholds
+        self.cooldown = cooldown
+        self.on_pressure = on_pressure
+        self.psi_window_us = psi_window_us
+        self.psi_available = read_psi('memory') is not None
+        self.level = 'normal'
+        self.last_sample: Optional[PressureSample] = None
+        self.last_trigger = 0.0
+        self.trigger: Optional[PsiTrigger] = None
+        self.poller = None
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def sample(self) -> PressureSample:
+        memory_psi = read_psi('memory') if self.psi_available else None
+        cpu_psi = read_psi('cpu') if self.psi_available else None
+        swap = psutil.swap_memory()
+        return PressureSample(
+            timestamp=time.time(),
+            memory_percent=psutil.virtual_memory().percent,
+            swap_percent=swap.percent if swap.total else 0.0,
+            # Non-blocking: usage since the previous call
+            cpu_percent=psutil.cpu_percent(interval=None),
+            psi_memory_some=memory_psi['some']['avg10'] if memory_psi else None,
+            psi_memory_full=memory_psi['full']['avg10'] if memory_psi and 'full' in memory_psi else None,
+            psi_cpu_some=cpu_psi['some']['avg10'] if cpu_psi else None
+        )
+
+    def classify(self, sample: PressureSample) -> Tuple[str, List[str]]:
+        """Highest level reached by any signal, and the signals that reached it"""
+        level = 0
+        signals = []
+        for signal, (elevated, critical) in self.thresholds.items():
+            value = getattr(sample, signal)
+            if value is None:
+                continue
+            signal_level = 2 if value >= critical else 1 if value >= elevated else 0
+            if signal_level > level:
+                level, signals = signal_level, []
+            if signal_level and signal_level == level:
+                signals.append(signal)
+        return LEVELS[level], signals
+
+    def check(self) -> str:
+        """Take one sample and fire ``on_pressure`` if it calls for a scan"""
+        sample = self.last_sample = self.sample()
+        level, signals = self.classify(sample)
+        previous, self.level = self.level, level
+        if level == 'normal':
+            return level
+
+        rising = LEVELS.index(level) > LEVELS.index(previous)
+        if rising or sample.timestamp - self.last_trigger >= self.cooldown:
+            self.last_trigger = sample.timestamp
+            self.logger.info(f"Host pressure {level}: {describe_signals(sample, signals)}")
+            try:
+                self.on_pressure(level, sample, signals)
+            except Exception as e:
+                self.logger.error(f"Pressure handler failed: {e}")
+        return level
+
+    def _open_trigger(self):
+        """Register a PSI memory trigger at the elevated stall level, if the kernel allows it"""
+        elevated = self.thresholds.get('psi_memory_some', (None, None))[0]
+        if not self.psi_available or elevated is None or not hasattr(select, 'poll'):
+            return
+        try:
+            self.trigger = PsiTrigger('memory', int(self.psi_window_us * elevated / 100), self.psi_window_us)
+        except OSError as e:
+            self.logger.info(f"PSI trigger unavailable ({e}), sampling every {self.interval}s only")
+            return
+        self.poller = select.poll()
+        self.poller.register(self.trigger.fd, select.POLLPRI)
+
+    def _wait(self):
+        """Sleep until the next sample, waking early on a PSI trigger event"""
+        if self.poller is None:
+            self.stop_event.wait(self.interval)
+            return
+        for _, event in self.poller.poll(self.interval * 1000):
+            if event & select.POLLERR:
+                # The trigger was removed (e.g. cgroup going away); fall back to plain sampling
+                self.poller = None
+                self.trigger.close()
+                self.trigger = None
+
+    def start(self):
+        if self.running:
+            return
+        self._open_trigger()
+        psutil.cpu_percent(interval=None)  # Prime the non-blocking CPU sample
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.logger.info(f"Pressure watcher started (PSI {'available' if self.psi_available else 'unavailable'}"
+                         f"{', trigger registered' if self.trigger else ''})")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.interval + 2)
+            self.thread = None
+        if self.trigger is not None:
+            self.trigger.close()
+            self.trigger = None
+            self.poller = None
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.check()
+            except OSError as e:
+                self.logger.error(f"Pressure sampling failed: {e}")
+            self._wait()
@@ -0,0 +1,253 @@
+import os
+import socket
+import struct
+import threading
+import time
+import logging
+from collections import deque, namedtuple
+from typing import Callable, Dict, Iterator, List, Optional
+
+import psutil
+
+# A process start, exec or exit observed between scans
+ProcessEvent = namedtuple('ProcessEvent', ['kind', 'pid', 'timestamp'])
+
+# Summary of a process that exited, including ones that lived entirely between scans
+ExitedProcess = namedtuple('ExitedProcess', ['pid', 'name', 'started', 'exited', 'rss'])
+
+# Linux process connector constants (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_DONE = 3
+
+NLMSG_HEADER = struct.Struct('=IHHII')
+CN_MSG_HEADER = struct.Struct('=IIIIHH')
+PROC_EVENT_HEADER = struct.Struct('=IIQ')
+PROC_EVENT_IDS = struct.Struct('=IIII')
+
+
+class NetlinkEventSource:
+    """Process start/exit events from the Linux netlink process connector.
+
+    Requires root (CAP_NET_ADMIN); ``open`` raises OSError otherwise.
+    """
+
+    name = 'netlink'
+
+    def __init__(self):
+        self.sock = None
+
+    @staticmethod
+    def available() -> bool:
+        return psutil.LINUX and hasattr(socket, 'AF_NETLINK') and os.geteuid() == 0
+
+    def _control(self, op: int):
+        payload = struct.pack('=I', op)
+        cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        self.sock.send(header + cn_msg)
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((os.getpid(), CN_IDX_PROC))
+            self._control(PROC_CN_MCAST_LISTEN)
+            self.sock.settimeout(1.0)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self._control(PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def poll(self) -> List[ProcessEvent]:
+        """Block for up to one second and return the events received"""
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            return []
+        now = time.time()
+        events = []
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            length = NLMSG_HEADER.unpack_from(data, offset)[0]
+            if length < NLMSG_HEADER.size:
+                break
+            body = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+            if body + PROC_EVENT_HEADER.size + PROC_EVENT_IDS.size <= offset + length:
+                what = PROC_EVENT_HEADER.unpack_from(data, body)[0]
+                ids = PROC_EVENT_IDS.unpack_from(data, body + PROC_EVENT_HEADER.size)
+                # Only thread-group leaders are processes; other forks/exits are threads
+                if what == PROC_EVENT_FORK and ids[2] == ids[3]:
+                    events.append(ProcessEvent('start', ids[3], now))
+                elif what == PROC_EVENT_EXEC and ids[0] == ids[1]:
+                    # A forked child replaced its image; capture the new name
+                    events.append(ProcessEvent('exec', ids[1], now))
+                elif what == PROC_EVENT_EXIT and ids[0] == ids[1]:
+                    events.append(ProcessEvent('exit', ids[1], now))
+            offset += (length + 3) & ~3
+        return events
+
+
+class PidDiffEventSource:
+    """Process start/exit events from diffing the PID set (``/proc`` on Linux)"""
+
+    name = 'pid-diff'
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.known = set()
+
+    def open(self):
+        self.known = set(psutil.pids())
+
+    def close(self):
+        self.known = set()
+
+    def poll(self) -> List[ProcessEvent]:
+        time.sleep(self.interval)
+        current = set(psutil.pids())
+        now = time.time()
+        events = [ProcessEvent('start', pid, now) for pid in current - self.known]
+        events.extend(ProcessEvent('exit', pid, now) for pid in self.known - current)
+        self.known = current
+        return events
+
+
+class ProcessEventTracker:
+    """Keeps the live process table up to date from start/exit events.
+
+    Scans read ``processes`` instead of re-enumerating the system, and processes
+    that start and exit between two scans are kept in ``exited``.
+    """
+
+    def __init__(self, poll_interval: float, history: int = 1000):
+        self.logger = logging.getLogger(__name__)
+        self.poll_interval = poll_interval
+        self.processes: Dict[int, psutil.Process] = {}
+        self.started: Dict[int, tuple] = {}
+        self.exited = deque(maxlen=history)
+        self.listeners: List[Callable[[ProcessEvent], None]] = []
+        self.source = None
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def _open_source(self):
+        """Use the netlink connector when privileged, PID-set diffing otherwise"""
+        if NetlinkEventSource.available():
+            source = NetlinkEventSource()
+            try:
+                source.open()
+                return source
+            except OSError as e:
+                self.logger.info(f"Netlink process connector unavailable ({e}), falling back to PID diffing")
+        source = PidDiffEventSource(self.poll_interval)
+        source.open()
+        return source
+
+    def start(self):
+        if self.running:
+            return
+        # Subscribe before enumerating, so a process that starts in between is either
+        # in the table or produces a start event; a process in both is just replaced
+        self.source = self._open_source()
+        with self.lock:
+            self.processes = {proc.pid: proc for proc in psutil.process_iter()}
+            if isinstance(self.source, PidDiffEventSource):
+                # Diff against the enumeration the table came from, not an earlier PID list
+                self.source.known = set(self.processes)
+        self.logger.info(f"Process event tracking started using {self.source.name}")
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                events = self.source.poll()
+            except OSError as e:
+                self.logger.error(f"Process event source failed: {e}")
+                break
+            for event in events:
+                self._apply(event)
+
+    def _apply(self, event: ProcessEvent):
+        if event.kind in ('start', 'exec'):
+            try:
+                proc = psutil.Process(event.pid)
+                # Capture identity right away; the process may be gone by the next scan
+                with proc.oneshot():
+                    summary = (proc.name(), proc.create_time(), proc.memory_info().rss)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                return
+            with self.lock:
+                if event.kind == 'start' or event.pid not in self.processes:
+                    self.processes[event.pid] = proc
+                self.started[event.pid] = summary
+        else:
+            with self.lock:
+                proc = self.processes.pop(event.pid, None)
+                summary = self.started.pop(event.pid, None)
+            if proc is None:
+                return
+            name, started, rss = summary or (getattr(proc, 'info', {}).get('name'), None, None)
+            self.exited.append(ExitedProcess(event.pid, name, started, event.timestamp, rss))
+
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error(f"Process event listener failed: {e}")
+
+    def refresh(self, attrs: List[str]) -> List[psutil.Process]:
+        """Read ``attrs`` into ``proc.info`` for every tracked live process"""
+        return list(self.iter_refresh(attrs))
+
+    def iter_refresh(self, attrs: List[str]) -> Iterator[psutil.Process]:
+        """Like ``refresh``, but reads and yields one process at a time"""
+        with self.lock:
+            procs = list(self.processes.values())
+            # Processes seen by a scan are no longer "started since the last scan"
+            self.started.clear()
+
+        for proc in procs:
+            try:
+                proc.info = proc.as_dict(attrs, ad_value=None)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                with self.lock:
+                    self.processes.pop(proc.pid, None)
+                continue
+            yield proc
+
+    def drain_exits(self) -> List[ExitedProcess]:
+        """Return and forget processes that exited since the last call"""
+        exits = []
+        while self.exited:
+            exits.append(self.exited.popleft())
+        return exits
@@ -0,0 +1,92 @@
+"""
+Selectable per-process output fields and machine-readable CLI output.
+
+Each field names the single psutil attribute it needs, so a query for a few
+fields only fetches those attributes (``process_iter(attrs)``); attributes a
+scan already collected are reused, and the rest are read only when requested.
+"""
+
+import csv
+import json
+import sys
+from typing import Dict, Iterable, List, Optional, TextIO
+
+import psutil
+
+from process_snapshot import HANDLES_ATTR
+
+
+def _io(counter: str):
+    return lambda info: getattr(info['io_counters'], counter) if info.get('io_counters') else None
+
+
+# Output field -> psutil attribute it needs (None for the PID) and how to read it from proc.info
+FIELDS = {
+    'pid': (None, None),
+    'name': ('name', lambda info: info['name']),
+    'rss': ('memory_info', lambda info: info['memory_info'].rss if info['memory_info'] else None),
+    'vms': ('memory_info', lambda info: info['memory_info'].vms if info['memory_info'] else None),
+    'cpu': ('cpu_percent', lambda info: round(info['cpu_percent'], 2) if info['cpu_percent'] is not None else None),
+    'status': ('status', lambda info: info['status']),
+    'ppid': ('ppid', lambda info: info['ppid']),
+    'create_time': ('create_time', lambda info: info['create_time']),
+    'threads': ('num_threads', lambda info: info['num_threads']),
+    'handles': (HANDLES_ATTR, lambda info: info[HANDLES_ATTR]),
+    'read_bytes': ('io_counters', _io('read_bytes')),
+    'write_bytes': ('io_counters', _io('write_bytes')),
+    'user': ('username', lambda info: info['username']),
+    'exe': ('exe', lambda info: info['exe']),
+    'cmdline': ('cmdline', lambda info: ' '.join(info['cmdline']) if info['cmdline'] else None)
+}
+
+DEFAULT_FIELDS = ['pid', 'name', 'rss', 'cpu', 'status']
+
+OUTPUT_FORMATS = ('text', 'json', 'csv', 'ndjson')
+
+
+def parse_fields(text: str) -> List[str]:
+    """Comma-separated field names, validated against FIELDS"""
+    fields = [field.strip().lower() for field in text.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}; choose from {', '.join(FIELDS)}")
+    return fields
+
+
+def required_attrs(fields: Iterable[str]) -> List[str]:
+    """psutil attributes needed for ``fields``, each once"""
+    return list(dict.fromkeys(FIELDS[field][0] for field in fields if FIELDS[field][0]))
+
+
+def project(proc: psutil.Process, fields: List[str]) -> Optional[Dict]:
+    """``fields`` of a process, reading only attributes missing from ``proc.info``; None if it exited"""
+    info = getattr(proc, 'info', None)
+    if info is None:
+        info = proc.info = {}
+    missing = [attr for attr in required_attrs(fields) if attr not in info]
+    if missing:
+        try:
+            info.update(proc.as_dict(missing, ad_value=None))
+        except psutil.NoSuchProcess:
+            return None
+    return {field: proc.pid if field == 'pid' else FIELDS[field][1](info) for field in fields}
+
+
+def write_records(records: Iterable[Dict], columns: List[str], output_format: str, stream: TextIO = None):
+    """Write records as a JSON array, CSV, newline-delimited JSON or a tab-separated table"""
+    stream = stream or sys.stdout
+    if output_format == 'json':
+        json.dump(list(records), stream, indent=2, default=str)
+        stream.write('\n')
+    elif output_format == 'ndjson':
+        # One object per line as each record is produced, so consumers can stream
+        for record in records:
+            stream.write(json.dumps(record, default=str) + '\n')
+    elif output_format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=columns, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        stream.write('\t'.join(columns) + '\n')
+        for record in records:
+            stream.write('\t'.join('' if record[column] is None else str(record[column]) for column in columns) + '\n')
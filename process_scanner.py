@@ -1,133 +1,425 @@
+import asyncio
+import contextlib
+import hashlib
+import heapq
 import psutil
+import threading
 import time
 import logging
-from collections import defaultdict, Counter
+import re
+from collections import defaultdict, namedtuple, Counter
 from datetime import datetime, timedelta
-from typing import List, Dict, Set, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple
 import win32api
 import win32con
 import win32process
 
 from config import (
     CRITICAL_PROCESSES, PROTECTED_PROCESSES, COMMON_UNNECESSARY_PROCESSES, MEMORY_THRESHOLD_MB,
-    CPU_THRESHOLD_PERCENT, INACTIVE_TIME_THRESHOLD, MAX_DUPLICATE_INSTANCES
+    CPU_THRESHOLD_PERCENT, INACTIVE_TIME_THRESHOLD, MAX_DUPLICATE_INSTANCES, DUPLICATE_KEEP_POLICY,
+    ADAPTIVE_DETECTION, ADAPTIVE_EWMA_ALPHA, ADAPTIVE_ZSCORE, ADAPTIVE_HOST_PERCENTILE,
+    ADAPTIVE_MIN_SAMPLES, ADAPTIVE_MIN_DELTA_MB, ADAPTIVE_MIN_DELTA_CPU, USE_HARD_LIMITS,
+    LEAK_MIN_SAMPLES, LEAK_MIN_R_SQUARED, LEAK_TREND_DECAY, LEAK_MIN_GROWTH_MB_PER_HOUR,
+    LEAK_MIN_HANDLES_PER_HOUR, LEAK_MIN_THREADS_PER_HOUR, LEAK_HANDLE_LIMIT, LEAK_THREAD_LIMIT,
+    EXPENSIVE_METRICS_ENABLED, EXPENSIVE_METRICS_TOP_K, EXPENSIVE_METRICS_BUDGET_MS,
+    IO_READ_MB_PER_SEC_THRESHOLD, IO_WRITE_MB_PER_SEC_THRESHOLD, IO_OPS_PER_SEC_THRESHOLD,
+    EVENT_POLL_INTERVAL, THROTTLE_CPU_FRACTION, THROTTLE_NICE, THROTTLE_WINDOWS_PRIORITY,
+    THROTTLE_IO_PRIORITY, CGROUP_ACCOUNTING, CGROUP_MEMORY_NEAR_LIMIT, OVERHEAD_GOVERNOR_ENABLED,
+    OVERHEAD_CPU_BUDGET_PERCENT, OVERHEAD_RSS_BUDGET_MB, OVERHEAD_MAX_INTERVAL,
+    PROGRESSIVE_SCAN_BATCH, PROGRESSIVE_SCAN_DEADLINE, HOT_THREADS_AUTOMATIC, HOT_THREAD_SAMPLE_INTERVAL,
+    HOT_THREAD_TOP_N, HOT_THREAD_MAX_PROCESSES, STUCK_MIN_SCANS
 )
+from process_snapshot import (
+    ProcessSnapshot, SNAPSHOT_ATTRS, candidate_mask, status_mask, threshold_mask,
+    inactive_mask, repeated_name_rows, combine, either, top_rows, replace_values, np
+)
+from adaptive_stats import AdaptiveDetector
+from trend_detector import TrendDetector
+from stuck_detector import StuckDetector
+from io_rates import IoRateTracker
+from process_events import ProcessEventTracker, ExitedProcess
+from cgroup_stats import CgroupTracker, find_cgroup2_root
+from overhead_governor import OverheadGovernor, ScanTimer
+from thread_sampler import HotThread, sample_hot_threads
+
+# Lowered CPU priority and ionice arguments used by throttle_process
+if psutil.WINDOWS:
+    THROTTLE_PRIORITY = {'below_normal': psutil.BELOW_NORMAL_PRIORITY_CLASS,
+                         'idle': psutil.IDLE_PRIORITY_CLASS}[THROTTLE_WINDOWS_PRIORITY]
+    THROTTLE_IONICE = {'low': (psutil.IOPRIO_LOW,), 'idle': (psutil.IOPRIO_VERYLOW,)}.get(THROTTLE_IO_PRIORITY)
+    # Priority class values are flags, not ordered; rank them lowest first
+    PRIORITY_CLASS_RANK = [psutil.IDLE_PRIORITY_CLASS, psutil.BELOW_NORMAL_PRIORITY_CLASS,
+                           psutil.NORMAL_PRIORITY_CLASS, psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+                           psutil.HIGH_PRIORITY_CLASS, psutil.REALTIME_PRIORITY_CLASS]
+elif psutil.LINUX:
+    THROTTLE_PRIORITY = THROTTLE_NICE
+    THROTTLE_IONICE = {'low': (psutil.IOPRIO_CLASS_BE, 7), 'idle': (psutil.IOPRIO_CLASS_IDLE,)}.get(THROTTLE_IO_PRIORITY)
+else:
+    THROTTLE_PRIORITY = THROTTLE_NICE
+    THROTTLE_IONICE = None
+
+# Sort key per DUPLICATE_KEEP_POLICY; instances that sort first are kept
+DUPLICATE_KEEP_ORDER = {
+    'oldest': lambda snapshot, row: -snapshot.age[row],
+    'most_active': lambda snapshot, row: -snapshot.cpu[row],
+    'lowest_rss': lambda snapshot, row: snapshot.rss[row]
+}
+
+# Per-instance numbers in command lines (ports, ids, handles) that should not split a group
+VOLATILE_ARGUMENT = re.compile(r'\d+')
+
+
+def process_identity(proc: psutil.Process) -> Tuple[str, str]:
+    """Hashed identity (executable, normalized command line, user) of a process and a readable label"""
+    info = proc.as_dict(attrs=['name', 'exe', 'cmdline', 'username'], ad_value=None)
+    exe = info['exe'] or info['name'] or ''
+    arguments = VOLATILE_ARGUMENT.sub('#', ' '.join((info['cmdline'] or [])[1:]))
+    if psutil.WINDOWS:
+        exe, arguments = exe.lower(), arguments.lower()
+    user = info['username'] or ''
+    digest = hashlib.blake2b(f"{exe}\0{arguments}\0{user}".encode('utf-8', 'replace'), digest_size=8).hexdigest()
+    label = f"{info['name'] or exe} {arguments}".strip()
+    return digest, label[:80] + (f" ({user})" if user else '')
+
+# Categories of a full scan, in report order
+SCAN_CATEGORIES = ('suspended', 'duplicates', 'inactive', 'unnecessary', 'resource_heavy', 'leaking', 'io_heavy',
+                   'stuck')
+
+# Categories a progressive scan can classify batch by batch; the others need the whole
+# process table (duplicates, host distribution) or per-scan history (leaks, I/O rates)
+PREVIEW_CATEGORIES = ('suspended', 'inactive', 'unnecessary', 'resource_heavy')
+
+# One step of a progressive scan. Intermediate steps carry the findings of one batch;
+# the final step carries the complete results, or with ``partial`` set, everything
+# found before the deadline
+ScanProgress = namedtuple('ScanProgress', ['results', 'scanned', 'final', 'partial'])
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 class ProcessScanner:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.cpu_history = defaultdict(list)
         self.last_scan_time = time.time()
+        self.adaptive_detector = AdaptiveDetector(
+            alpha=ADAPTIVE_EWMA_ALPHA,
+            zscore=ADAPTIVE_ZSCORE,
+            quantile=ADAPTIVE_HOST_PERCENTILE,
+            min_samples=ADAPTIVE_MIN_SAMPLES,
+            min_delta={'rss': ADAPTIVE_MIN_DELTA_MB * 1024 * 1024, 'cpu': ADAPTIVE_MIN_DELTA_CPU}
+        )
+        self.io_tracker = IoRateTracker({
+            'read_bytes_per_sec': IO_READ_MB_PER_SEC_THRESHOLD * 1024 * 1024,
+            'write_bytes_per_sec': IO_WRITE_MB_PER_SEC_THRESHOLD * 1024 * 1024,
+            'read_ops_per_sec': IO_OPS_PER_SEC_THRESHOLD,
+            'write_ops_per_sec': IO_OPS_PER_SEC_THRESHOLD
+        })
+        self.stuck_detector = StuckDetector(STUCK_MIN_SCANS)
+        self.event_tracker = None
+        # Sync and async callers share the snapshot and detector state below
+        self.scan_lock = threading.Lock()
+        self.last_snapshot = None
+        self.last_results = {}
+        # Accurate memory numbers sampled during the latest scan, keyed by PID
+        self.accurate_memory = {}
+        # Identity label and instance count of each duplicate from the latest scan, keyed by PID
+        self.duplicate_groups = {}
+        # Busiest threads of sampled resource-heavy processes, keyed by PID
+        self.hot_threads: Dict[int, List[HotThread]] = {}
+        # Original settings of throttled processes, keyed by (pid, create_time)
+        self.throttled = {}
+        cgroup_root = find_cgroup2_root() if CGROUP_ACCOUNTING and psutil.LINUX else None
+        self.cgroup_tracker = CgroupTracker(cgroup_root, CGROUP_MEMORY_NEAR_LIMIT) if cgroup_root else None
+        self.governor = OverheadGovernor(OVERHEAD_CPU_BUDGET_PERCENT, OVERHEAD_RSS_BUDGET_MB,
+                                         OVERHEAD_MAX_INTERVAL) if OVERHEAD_GOVERNOR_ENABLED else None
+        self.trend_detector = TrendDetector(
+            min_samples=LEAK_MIN_SAMPLES,
+            min_r_squared=LEAK_MIN_R_SQUARED,
+            decay=LEAK_TREND_DECAY,
+            min_growth={
+                'rss': LEAK_MIN_GROWTH_MB_PER_HOUR * 1024 * 1024,
+                'handles': LEAK_MIN_HANDLES_PER_HOUR,
+                'threads': LEAK_MIN_THREADS_PER_HOUR
+            },
+            limits={
+                'rss': MEMORY_THRESHOLD_MB * 1024 * 1024,
+                'handles': LEAK_HANDLE_LIMIT,
+                'threads': LEAK_THREAD_LIMIT
+            }
+        )
         
+    def start_event_tracking(self):
+        """Keep the process table current from start/exit events instead of full rescans"""
+        if self.event_tracker is None:
+            self.event_tracker = ProcessEventTracker(EVENT_POLL_INTERVAL)
+        self.event_tracker.start()
+    
+    def stop_event_tracking(self):
+        """Stop background process event tracking"""
+        if self.event_tracker is not None:
+            self.event_tracker.stop()
+    
+    def recent_exits(self) -> List[ExitedProcess]:
+        """Processes that exited since the last call, including short-lived ones missed by scans"""
+        if self.event_tracker is None:
+            return []
+        return self.event_tracker.drain_exits()
+    
     def get_all_processes(self) -> List[psutil.Process]:
         """Get all running processes with error handling"""
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'cpu_percent', 'create_time', 'status']):
-            try:
-                processes.append(proc)
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return list(self.iter_processes())
+    
+    def iter_processes(self) -> Iterator[psutil.Process]:
+        """Enumerate running processes lazily, reading the snapshot attributes of one at a time"""
+        if self.event_tracker is not None and self.event_tracker.running:
+            # The tracked table is already current; only refresh the attributes
+            return self.event_tracker.iter_refresh(SNAPSHOT_ATTRS)
+        return psutil.process_iter(SNAPSHOT_ATTRS)
+    
+    def take_snapshot(self) -> ProcessSnapshot:
+        """Enumerate processes once into a columnar snapshot"""
+        return ProcessSnapshot.from_processes(self.get_all_processes())
+    
+    def _candidates(self, snapshot: ProcessSnapshot):
+        """Rows that are neither critical nor protected"""
+        return candidate_mask(snapshot, CRITICAL_PROCESSES | PROTECTED_PROCESSES)
+    
+    def _average_cpu(self, snapshot: ProcessSnapshot, candidates) -> List[float]:
+        """Record CPU samples for candidate rows and return the per-row history average"""
+        averages = []
+        for pid, cpu, flagged in zip(snapshot.pids, snapshot.cpu, candidates):
+            if not flagged:
+                averages.append(0.0)
                 continue
-        return processes
+            history = self.cpu_history[int(pid)]
+            history.append(float(cpu))
+            # Keep only recent CPU measurements
+            if len(history) > 10:
+                del history[:-10]
+            averages.append(sum(history) / len(history))
+        return averages
     
-    def find_suspended_processes(self) -> List[psutil.Process]:
-        """Find processes that are suspended or stopped"""
-        suspended = []
-        for proc in self.get_all_processes():
+    def collect_expensive_metrics(self, snapshot: ProcessSnapshot, flagged=None,
+                                  top_k: int = EXPENSIVE_METRICS_TOP_K,
+                                  budget_ms: float = EXPENSIVE_METRICS_BUDGET_MS) -> Dict[int, Dict]:
+        """Sample USS/PSS for flagged rows and the top-K RSS consumers within a time budget"""
+        self.accurate_memory = {}
+        if not EXPENSIVE_METRICS_ENABLED or not len(snapshot):
+            return self.accurate_memory
+        
+        # Already-flagged processes first, then the largest RSS consumers
+        rows = []
+        if flagged is not None:
+            rows.extend(np.flatnonzero(flagged).tolist() if np is not None else
+                        [i for i, value in enumerate(flagged) if value])
+        seen = set(rows)
+        rows.extend(i for i in top_rows(snapshot.rss, top_k) if i not in seen)
+        
+        deadline = time.perf_counter() + budget_ms / 1000
+        for i in rows:
+            if time.perf_counter() >= deadline:
+                self.logger.debug(f"Expensive metric budget exhausted after {len(self.accurate_memory)} processes")
+                break
+            proc = snapshot.procs[i]
             try:
-                # Check for stopped, zombie, or dead processes
-                status = proc.info['status']
-                if status in [psutil.STATUS_STOPPED, psutil.STATUS_ZOMBIE, psutil.STATUS_DEAD]:
-                    name = proc.info['name'].lower().strip()
-                    if name and name not in CRITICAL_PROCESSES and name not in PROTECTED_PROCESSES:
-                        suspended.append(proc)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                full = proc.memory_full_info()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError):
                 continue
-        return suspended
+            self.accurate_memory[proc.pid] = {
+                'row': i,
+                'uss': full.uss,
+                'pss': getattr(full, 'pss', None)
+            }
+        
+        return self.accurate_memory
+    
+    # Attribute fetched per process and ranking key for each top() sort order
+    TOP_KEYS = {
+        'rss': ('memory_info', lambda info: info['memory_info'].rss if info['memory_info'] else 0),
+        'cpu': ('cpu_percent', lambda info: info['cpu_percent'] or 0.0),
+        'age': ('create_time', lambda info: -(info['create_time'] or float('inf')))
+    }
+    
+    def top(self, n: int, key: str = 'rss', interval: float = 0.5, attrs: Iterable[str] = ()) -> List[psutil.Process]:
+        """Return the top ``n`` processes by ``key`` ('rss', 'cpu' or 'age'), largest first.
+        
+        Processes are streamed through a bounded heap, so only the single attribute
+        needed for ranking (plus any extra ``attrs`` for output) is read per process
+        and nothing is fully sorted. CRITICAL_PROCESSES are never ranked, as they
+        are never acted on.
+        """
+        if key not in self.TOP_KEYS:
+            raise ValueError(f"Unknown sort key: {key}")
+        attr, rank = self.TOP_KEYS[key]
+        attrs = list(dict.fromkeys(['name', attr, *attrs]))
+        
+        if 'cpu_percent' in attrs and interval:
+            # cpu_percent needs a previous sample to compare against, whether it ranks or is only shown
+            for proc in psutil.process_iter(['cpu_percent']):
+                pass
+            time.sleep(interval)
+        
+        def stream():
+            for proc in psutil.process_iter(attrs):
+                name = (proc.info['name'] or '').lower().strip()
+                if proc.info[attr] is not None and name not in CRITICAL_PROCESSES:
+                    yield proc
+        
+        return heapq.nlargest(n, stream(), key=lambda proc: rank(proc.info))
     
-    def find_duplicate_processes(self) -> Dict[str, List[psutil.Process]]:
-        """Find processes with multiple instances running"""
-        process_counts = defaultdict(list)
+    def find_suspended_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
+        """Find processes that are suspended or stopped"""
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        # Zombies have already exited; find_stuck_processes reports their parents instead
+        stopped = status_mask(snapshot, [psutil.STATUS_STOPPED])
+        return snapshot.select(combine(stopped, self._candidates(snapshot)))
+    
+    def find_duplicate_processes(self, snapshot: ProcessSnapshot = None,
+                                 keep: str = DUPLICATE_KEEP_POLICY) -> Dict[str, List[psutil.Process]]:
+        """Find processes with more than the allowed number of identical instances running.
+        
+        Instances are identical when executable, normalized command line and
+        user match; ``keep`` decides which ones are allowed to stay. Returns
+        only the excess instances, keyed by identity.
+        """
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        if keep not in DUPLICATE_KEEP_ORDER:
+            raise ValueError(f"Unknown duplicate keep policy: {keep}")
         
-        for proc in self.get_all_processes():
+        # Zombies have already exited and cannot be stopped; find_stuck_processes reports them on their parent
+        candidates = combine(self._candidates(snapshot), status_mask(snapshot, [psutil.STATUS_ZOMBIE], invert=True))
+        
+        # Only rows whose name repeats often enough can form a group; read identities for those alone
+        groups = defaultdict(list)
+        labels = {}
+        for row in repeated_name_rows(snapshot, MAX_DUPLICATE_INSTANCES, candidates):
             try:
-                name = proc.info['name'].lower().strip()
-                if name and name not in CRITICAL_PROCESSES and name not in PROTECTED_PROCESSES:
-                    process_counts[name].append(proc)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                identity, labels[identity] = process_identity(snapshot.procs[row])
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
                 continue
+            groups[identity].append(row)
         
-        # Return only processes with more than the allowed number of instances
+        order = DUPLICATE_KEEP_ORDER[keep]
         duplicates = {}
-        for name, procs in process_counts.items():
-            if len(procs) > MAX_DUPLICATE_INSTANCES:
-                duplicates[name] = procs[MAX_DUPLICATE_INSTANCES:]  # Keep only excess instances
+        self.duplicate_groups = {}
+        for identity, rows in groups.items():
+            if len(rows) <= MAX_DUPLICATE_INSTANCES:
+                continue
+            rows.sort(key=lambda row: order(snapshot, row))
+            duplicates[identity] = [snapshot.procs[row] for row in rows[MAX_DUPLICATE_INSTANCES:]]
+            for proc in duplicates[identity]:
+                self.duplicate_groups[proc.pid] = (labels[identity], len(rows))
         
         return duplicates
     
-    def find_inactive_processes(self) -> List[psutil.Process]:
+    def find_inactive_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
         """Find processes that have been inactive for a long time"""
-        inactive = []
-        current_time = time.time()
-        
-        for proc in self.get_all_processes():
-            try:
-                # Check if process has been created long ago and has low CPU usage
-                create_time = proc.info['create_time']
-                age = current_time - create_time
-                
-                if age > INACTIVE_TIME_THRESHOLD:
-                    cpu_percent = proc.info['cpu_percent']
-                    if cpu_percent < 1.0:  # Very low CPU usage
-                        name = proc.info['name'].lower().strip()
-                        if name and name not in CRITICAL_PROCESSES and name not in PROTECTED_PROCESSES:
-                            inactive.append(proc)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        return inactive
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        # Created long ago and very low CPU usage
+        inactive = inactive_mask(snapshot, INACTIVE_TIME_THRESHOLD, max_cpu=1.0)
+        return snapshot.select(combine(inactive, self._candidates(snapshot)))
     
-    def find_unnecessary_processes(self) -> List[psutil.Process]:
+    def find_unnecessary_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
         """Find processes that are commonly unnecessary"""
-        unnecessary = []
-        
-        for proc in self.get_all_processes():
-            try:
-                name = proc.info['name'].lower().strip()
-                if name and name in COMMON_UNNECESSARY_PROCESSES:
-                    unnecessary.append(proc)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        return unnecessary
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        return snapshot.select(snapshot.name_mask(COMMON_UNNECESSARY_PROCESSES))
     
-    def find_resource_heavy_processes(self) -> List[psutil.Process]:
+    def find_resource_heavy_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
         """Find processes consuming excessive resources"""
-        resource_heavy = []
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        candidates = self._candidates(snapshot)
         
-        for proc in self.get_all_processes():
-            try:
-                name = proc.info['name'].lower().strip()
-                if name and name not in CRITICAL_PROCESSES and name not in PROTECTED_PROCESSES:
-                    # Check memory usage
-                    memory_mb = proc.info['memory_info'].rss / 1024 / 1024
-                    
-                    # Check CPU usage (average over time)
-                    cpu_percent = proc.info['cpu_percent']
-                    self.cpu_history[proc.pid].append(cpu_percent)
-                    
-                    # Keep only recent CPU measurements
-                    if len(self.cpu_history[proc.pid]) > 10:
-                        self.cpu_history[proc.pid] = self.cpu_history[proc.pid][-10:]
-                    
-                    avg_cpu = sum(self.cpu_history[proc.pid]) / len(self.cpu_history[proc.pid])
-                    
-                    if memory_mb > MEMORY_THRESHOLD_MB or avg_cpu > CPU_THRESHOLD_PERCENT:
-                        resource_heavy.append(proc)
-                        
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        # CPU usage is averaged over recent scans
+        avg_cpu = self._average_cpu(snapshot, candidates)
         
-        return resource_heavy
+        masks = []
+        if USE_HARD_LIMITS:
+            memory_bytes = MEMORY_THRESHOLD_MB * 1024 * 1024
+            cheap = combine(threshold_mask(snapshot, memory_bytes, CPU_THRESHOLD_PERCENT, cpu=avg_cpu), candidates)
+            
+            # Re-check cheap hits and top consumers against USS, which excludes shared pages
+            top_k, budget_ms = EXPENSIVE_METRICS_TOP_K, EXPENSIVE_METRICS_BUDGET_MS
+            if self.governor is not None:
+                top_k, budget_ms = self.governor.expensive_sampling(top_k, budget_ms)
+            sampled = self.collect_expensive_metrics(snapshot, flagged=cheap, top_k=top_k, budget_ms=budget_ms)
+            memory = replace_values(snapshot.rss,
+                                    [entry['row'] for entry in sampled.values()],
+                                    [entry['uss'] for entry in sampled.values()])
+            masks.append(threshold_mask(snapshot, memory_bytes, CPU_THRESHOLD_PERCENT, cpu=avg_cpu, memory=memory))
+        if ADAPTIVE_DETECTION:
+            # Deviation from the process's own baseline or from the host's distribution
+            masks.append(self.adaptive_detector.update(snapshot, candidates, cpu=avg_cpu))
+        if not masks:
+            return []
+        
+        return snapshot.select(combine(either(*masks), candidates))
+    
+    def hot_thread_candidates(self, heavy: List[psutil.Process],
+                              limit: int = HOT_THREAD_MAX_PROCESSES) -> List[psutil.Process]:
+        """The CPU-heaviest of the resource-heavy processes; memory-only hits have no busy threads"""
+        busy = [proc for proc in heavy if (proc.info.get('cpu_percent') or 0.0) > 0]
+        return heapq.nlargest(limit, busy, key=lambda proc: proc.info['cpu_percent'])
+    
+    def sample_hot_threads(self, procs: List[psutil.Process] = None, interval: float = HOT_THREAD_SAMPLE_INTERVAL,
+                           top_n: int = HOT_THREAD_TOP_N) -> Dict[int, List[HotThread]]:
+        """Busiest threads of ``procs``, by default the CPU-heaviest resource-heavy processes of the latest scan"""
+        if procs is None:
+            procs = self.hot_thread_candidates(self.last_results.get('resource_heavy', []))
+        sampled = sample_hot_threads(procs, interval, top_n)
+        self.hot_threads.update(sampled)
+        return sampled
+    
+    def find_leaking_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
+        """Find processes whose RSS, handle or thread count keeps growing across scans"""
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        leaking = self.trend_detector.update(snapshot, self._candidates(snapshot))
+        return snapshot.select(leaking)
+    
+    def find_io_heavy_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
+        """Find processes whose disk read/write rate since the previous scan is excessive"""
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        return snapshot.select(self.io_tracker.update(snapshot, self._candidates(snapshot)))
+    
+    def find_stuck_processes(self, snapshot: ProcessSnapshot = None) -> List[psutil.Process]:
+        """Find processes stuck in uninterruptible sleep or making no progress across scans, and
+        parents that do not reap their zombies"""
+        if snapshot is None:
+            snapshot = self.take_snapshot()
+        return snapshot.select(self.stuck_detector.update(snapshot, self._candidates(snapshot)))
+    
+    def find_cgroups_near_limit(self) -> List[Dict]:
+        """cgroups from the latest scan that are close to their memory limit (Linux cgroup v2)"""
+        if self.cgroup_tracker is None:
+            return []
+        return self.cgroup_tracker.near_limit_cgroups()
+    
+    def scan_interval(self, requested: float) -> float:
+        """Seconds to wait between scans, stretched by the overhead governor when scans are expensive"""
+        return self.governor.scan_interval(requested) if self.governor is not None else requested
+    
+    def overhead(self) -> Optional[Dict]:
+        """The monitor's own CPU and memory cost as of the latest scan, or None without the governor"""
+        return self.governor.report() if self.governor is not None else None
+    
+    def _measured(self):
+        """Context that charges the enclosed scan to the overhead governor; yields a ``ScanTimer``"""
+        return self.governor.measure() if self.governor is not None else contextlib.nullcontext(ScanTimer())
     
     def get_process_details(self, proc: psutil.Process) -> Dict:
         """Get detailed information about a process"""
@@ -147,6 +439,51 @@ class ProcessScanner:
                     'cmdline': ' '.join(proc.cmdline()[:3]) if proc.cmdline() else 'N/A'  # First 3 args only
                 }
                 
+                accurate = self.accurate_memory.get(proc.pid)
+                if accurate:
+                    details['uss_mb'] = round(accurate['uss'] / 1024 / 1024, 2)
+                    if accurate['pss'] is not None:
+                        details['pss_mb'] = round(accurate['pss'] / 1024 / 1024, 2)
+                
+                rates = self.io_tracker.rates.get(proc.pid)
+                if rates:
+                    read_bps, write_bps, read_ops, write_ops = rates
+                    details['io_read_mb_s'] = round(read_bps / 1024 / 1024, 2)
+                    details['io_write_mb_s'] = round(write_bps / 1024 / 1024, 2)
+                    details['io_read_ops_s'] = round(read_ops, 1)
+                    details['io_write_ops_s'] = round(write_ops, 1)
+                
+                reason = self.adaptive_detector.reasons.get(proc.pid)
+                if reason:
+                    details['flag_reason'] = reason
+                
+                leak = self.trend_detector.estimates.get(proc.pid)
+                if leak:
+                    details.update(self._format_leak(leak))
+                
+                stuck = self.stuck_detector.reasons.get(proc.pid)
+                if stuck:
+                    details['stuck_reason'], details['recommended_action'] = stuck['reason'], stuck['action']
+                    if 'zombies' in stuck:
+                        details['zombie_children'] = stuck['zombies']
+                
+                duplicate = self.duplicate_groups.get(proc.pid)
+                if duplicate:
+                    details['duplicate_of'], details['duplicate_instances'] = duplicate
+                
+                threads = self.hot_threads.get(proc.pid)
+                if threads:
+                    details['hot_threads'] = [{'tid': thread.tid, 'name': thread.name,
+                                               'cpu_percent': round(thread.cpu_percent, 1),
+                                               'share_percent': round(thread.share * 100, 1)}
+                                              for thread in threads]
+                
+                if self.cgroup_tracker is not None:
+                    cgroup = self.cgroup_tracker.pid_cgroups.get(proc.pid)
+                    if cgroup is not None:
+                        details['cgroup'] = cgroup
+                        details['container'] = self.cgroup_tracker.usage[cgroup]['container']
+                
                 try:
                     details['username'] = proc.username()
                 except (psutil.AccessDenied, OSError):
@@ -156,30 +493,64 @@ class ProcessScanner:
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             return None
     
+    def _format_leak(self, leak: Dict) -> Dict:
+        """Human-readable growth rate and time-to-threshold for a leak estimate"""
+        rate = leak['growth_per_hour']
+        if leak['metric'] == 'rss':
+            growth = f"{rate / 1024 / 1024:.1f} MB/h"
+        else:
+            growth = f"{rate:.0f} {leak['metric']}/h"
+        
+        seconds = leak['time_to_threshold']
+        if seconds == float('inf'):
+            eta = 'N/A'
+        else:
+            eta = str(timedelta(seconds=int(seconds)))
+        
+        return {'leak_metric': leak['metric'], 'growth_rate': growth, 'time_to_threshold': eta}
+    
+    def _may_act_on(self, proc: psutil.Process, action: str) -> bool:
+        """Safety checks shared by terminate and throttle"""
+        name = proc.name().lower().strip()
+        
+        # Skip processes with empty or invalid names
+        if not name or len(name) == 0:
+            self.logger.info(f"Skipping process with empty name (PID: {proc.pid})")
+            return False
+        
+        if name in CRITICAL_PROCESSES:
+            self.logger.warning(f"Attempted to {action} critical process: {name}")
+            return False
+        
+        if name in PROTECTED_PROCESSES:
+            self.logger.info(f"Skipping protected process: {name} (requires elevated privileges)")
+            return False
+        
+        return True
+    
+    def _send_termination(self, proc: psutil.Process, force: bool) -> bool:
+        """Check that a process may be terminated and send the signal without waiting"""
+        if not self._may_act_on(proc, 'terminate'):
+            return False
+        
+        if proc.status() == psutil.STATUS_ZOMBIE:
+            self.logger.info(f"Process {proc.pid} is a zombie and cannot be terminated; "
+                             f"terminate its parent (PID {proc.ppid()}) so it is reaped")
+            return False
+        
+        self.logger.info(f"Terminating process: {proc.name()} (PID: {proc.pid})")
+        
+        if force:
+            proc.kill()
+        else:
+            proc.terminate()
+        return True
+    
     def terminate_process(self, proc: psutil.Process, force: bool = False) -> bool:
         """Safely terminate a process"""
         try:
-            name = proc.name().lower().strip()
-            
-            # Skip processes with empty or invalid names
-            if not name or len(name) == 0:
-                self.logger.info(f"Skipping process with empty name (PID: {proc.pid})")
+            if not self._send_termination(proc, force):
                 return False
-            
-            if name in CRITICAL_PROCESSES:
-                self.logger.warning(f"Attempted to terminate critical process: {name}")
-                return False
-            
-            if name in PROTECTED_PROCESSES:
-                self.logger.info(f"Skipping protected process: {name} (requires elevated privileges)")
-                return False
-            
-            self.logger.info(f"Terminating process: {proc.name()} (PID: {proc.pid})")
-            
-            if force:
-                proc.kill()
-            else:
-                proc.terminate()
                 
             # Wait for process to terminate
             try:
@@ -195,25 +566,293 @@ class ProcessScanner:
             self.logger.error(f"Failed to terminate process {proc.pid}: {e}")
             return False
     
+    def throttle_process(self, proc: psutil.Process, priority: bool = True, io: bool = True,
+                         cpu_fraction: float = THROTTLE_CPU_FRACTION) -> bool:
+        """Slow a process down instead of killing it: lower its CPU priority and I/O
+        priority and pin it to a fraction of the cores. Original settings are
+        recorded so ``restore_process`` can undo the change."""
+        try:
+            if not self._may_act_on(proc, 'throttle'):
+                return False
+            
+            key = (proc.pid, proc.create_time())
+            original = self.throttled.get(key, {})
+            
+            # Each original value is recorded as soon as its change is applied, so a
+            # later failure still leaves it restorable
+            if priority:
+                current = proc.nice()
+                if self._lowers_priority(current):
+                    proc.nice(THROTTLE_PRIORITY)
+                    original.setdefault('nice', current)
+                    self.throttled[key] = original
+            
+            if io and THROTTLE_IONICE is not None:
+                ioprio = proc.ionice()
+                # Linux returns (class, value); Windows a single level
+                current = tuple(ioprio) if psutil.LINUX else ioprio
+                if self._lowers_ionice(current):
+                    proc.ionice(*THROTTLE_IONICE)
+                    original.setdefault('ionice', current)
+                    self.throttled[key] = original
+            
+            if cpu_fraction and hasattr(proc, 'cpu_affinity'):
+                cores = original.get('affinity') or proc.cpu_affinity()
+                # Keep the highest-numbered cores; core 0 tends to be busiest with interrupts
+                keep = max(1, int(len(cores) * cpu_fraction))
+                proc.cpu_affinity(cores[-keep:])
+                original.setdefault('affinity', cores)
+                self.throttled[key] = original
+            
+            self.logger.info(f"Throttled process: {proc.name()} (PID: {proc.pid})")
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError) as e:
+            self.logger.error(f"Failed to throttle process {proc.pid}: {e}")
+            return False
+    
+    @staticmethod
+    def _lowers_priority(current: int) -> bool:
+        """Whether THROTTLE_PRIORITY is below ``current``; throttling never raises a priority"""
+        if psutil.WINDOWS:
+            return PRIORITY_CLASS_RANK.index(THROTTLE_PRIORITY) < PRIORITY_CLASS_RANK.index(current)
+        return THROTTLE_NICE > current
+    
+    @staticmethod
+    def _lowers_ionice(current) -> bool:
+        """Whether THROTTLE_IONICE is below the ``current`` I/O priority"""
+        if psutil.WINDOWS:
+            return THROTTLE_IONICE[0] < current
+        ioclass, value = current
+        if ioclass == psutil.IOPRIO_CLASS_IDLE:
+            return False
+        if THROTTLE_IONICE[0] == psutil.IOPRIO_CLASS_IDLE:
+            return True
+        # Best effort at level 7 is the lowest non-idle priority
+        return not (ioclass == psutil.IOPRIO_CLASS_BE and value >= THROTTLE_IONICE[1])
+    
+    def restore_process(self, proc: psutil.Process) -> bool:
+        """Put back the priority, I/O priority and affinity recorded by ``throttle_process``.
+        
+        Each setting is dropped from the record once restored; the ones that fail
+        stay recorded so a later call can retry them."""
+        key = None
+        try:
+            key = (proc.pid, proc.create_time())
+            original = self.throttled.get(key)
+            if original is None:
+                return False
+            if 'nice' in original:
+                proc.nice(original['nice'])
+                del original['nice']
+            if 'ionice' in original:
+                if psutil.LINUX:
+                    ioclass, value = original['ionice']
+                    # The kernel rejects a level for the "none" and idle classes
+                    proc.ionice(ioclass, value if ioclass in (psutil.IOPRIO_CLASS_RT, psutil.IOPRIO_CLASS_BE) else None)
+                else:
+                    proc.ionice(original['ionice'])
+                del original['ionice']
+            if 'affinity' in original:
+                proc.cpu_affinity(original['affinity'])
+                del original['affinity']
+            del self.throttled[key]
+            self.logger.info(f"Restored process: {proc.name()} (PID: {proc.pid})")
+            return True
+        except (psutil.NoSuchProcess, psutil.ZombieProcess) as e:
+            # Nothing left to restore once the process is gone
+            if key is not None:
+                self.throttled.pop(key, None)
+            self.logger.error(f"Failed to restore process {proc.pid}: {e}")
+            return False
+        except (psutil.AccessDenied, OSError) as e:
+            self.logger.error(f"Failed to restore process {proc.pid}: {e}")
+            return False
+    
+    def throttle_processes(self, procs: List[psutil.Process], **kwargs) -> int:
+        """Throttle several processes; returns how many were throttled"""
+        return sum(self.throttle_process(proc, **kwargs) for proc in procs)
+    
+    def restore_all(self) -> int:
+        """Restore every process that is still throttled; returns how many were restored"""
+        restored = 0
+        for pid, create_time in list(self.throttled):
+            try:
+                proc = psutil.Process(pid)
+            except psutil.NoSuchProcess:
+                self.throttled.pop((pid, create_time), None)
+                continue
+            restored += self.restore_process(proc)
+        return restored
+    
+    async def _wait_gone_async(self, procs: List[psutil.Process], timeout: float,
+                               poll_interval: float) -> List[psutil.Process]:
+        """Poll until ``procs`` exit or ``timeout`` passes; return the ones still alive"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        alive = list(procs)
+        while alive:
+            _, alive = await loop.run_in_executor(None, lambda: psutil.wait_procs(alive, timeout=0))
+            if not alive or loop.time() >= deadline:
+                break
+            await asyncio.sleep(poll_interval)
+        return alive
+    
+    async def terminate_many_async(self, procs: List[psutil.Process], force: bool = False,
+                                   timeout: float = 5.0, kill_timeout: float = 3.0,
+                                   poll_interval: float = 0.1) -> Dict[int, bool]:
+        """Terminate several processes without blocking the event loop.
+        
+        Processes still alive after ``timeout`` seconds are force killed and given
+        ``kill_timeout`` more seconds. Returns success per PID.
+        """
+        loop = asyncio.get_running_loop()
+        results = {proc.pid: False for proc in procs}
+        
+        pending = []
+        for proc in procs:
+            try:
+                if await loop.run_in_executor(None, self._send_termination, proc, force):
+                    pending.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                self.logger.error(f"Failed to terminate process {proc.pid}: {e}")
+        
+        alive = await self._wait_gone_async(pending, timeout, poll_interval)
+        if alive:
+            # Force kill if graceful termination failed
+            for proc in alive:
+                try:
+                    await loop.run_in_executor(None, proc.kill)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            alive = await self._wait_gone_async(alive, kill_timeout, poll_interval)
+        
+        for proc in pending:
+            if proc in alive:
+                self.logger.error(f"Failed to terminate process {proc.pid}: still running")
+            else:
+                results[proc.pid] = True
+        return results
+    
+    async def scan_async(self, timeout: float = None, executor=None) -> Dict[str, List]:
+        """Run ``scan_all`` in an executor, optionally bounded by ``timeout`` seconds.
+        
+        On timeout or cancellation the awaiting task stops immediately; the worker
+        finishes its scan in the background and still updates the shared state.
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(executor, self.scan_all), timeout)
+    
     def scan_all(self) -> Dict[str, List]:
         """Perform a comprehensive scan of all process types"""
         self.logger.info("Starting comprehensive process scan...")
         
-        results = {
-            'suspended': self.find_suspended_processes(),
-            'duplicates': self.find_duplicate_processes(),
-            'inactive': self.find_inactive_processes(),
-            'unnecessary': self.find_unnecessary_processes(),
-            'resource_heavy': self.find_resource_heavy_processes()
+        with self.scan_lock, self._measured():
+            results = self._scan_snapshot(self.take_snapshot())
+        
+        total_issues = sum(len(procs) for procs in results.values())
+        self.logger.info(f"Scan completed. Found {total_issues} potential issues.")
+        
+        for cgroup in self.find_cgroups_near_limit():
+            self.logger.warning(f"cgroup {cgroup['container']} is at {cgroup['memory_ratio']:.0%} of its memory limit")
+        
+        return results
+    
+    def scan_progressive(self, deadline: float = PROGRESSIVE_SCAN_DEADLINE,
+                         batch_size: int = PROGRESSIVE_SCAN_BATCH) -> Iterator[ScanProgress]:
+        """Scan while enumerating, yielding findings batch by batch.
+        
+        Each batch of ``batch_size`` processes is classified into the
+        PREVIEW_CATEGORIES as soon as it is read. If enumeration finishes
+        within ``deadline`` seconds the final step is a full ``scan_all``
+        classification; otherwise enumeration stops there and the final step
+        is marked partial. The scan lock is held until the generator finishes,
+        so iterate it to the end (or close it).
+        """
+        self.logger.info("Starting progressive process scan...")
+        stop_at = time.monotonic() + deadline
+        partial = False
+        
+        with self.scan_lock, self._measured() as timer:
+            procs = []
+            found = {category: [] for category in PREVIEW_CATEGORIES}
+            for batch in _batches(self.iter_processes(), batch_size):
+                procs.extend(batch)
+                preview = self._preview(ProcessSnapshot.from_processes(batch))
+                for category, hits in preview.items():
+                    found[category].extend(hits)
+                # Whatever the consumer does with a batch is its own cost, not the scan's
+                with timer.paused():
+                    yield ScanProgress(preview, len(procs), False, False)
+                if time.monotonic() >= stop_at:
+                    partial = True
+                    break
+            
+            # Stateful detectors only ever see complete process tables
+            results = found if partial else self._scan_snapshot(ProcessSnapshot.from_processes(procs))
+        
+        total_issues = sum(len(hits) for hits in results.values())
+        if partial:
+            self.logger.warning(f"Scan stopped at the {deadline}s deadline after {len(procs)} processes; "
+                                f"partial results with {total_issues} potential issues")
+        else:
+            self.logger.info(f"Scan completed. Found {total_issues} potential issues.")
+            for cgroup in self.find_cgroups_near_limit():
+                self.logger.warning(f"cgroup {cgroup['container']} is at {cgroup['memory_ratio']:.0%} of its memory limit")
+        yield ScanProgress(results, len(procs), True, partial)
+    
+    def _preview(self, snapshot: ProcessSnapshot) -> Dict[str, List]:
+        """Classify one batch into the categories that need no other rows or history"""
+        preview = {
+            'suspended': self.find_suspended_processes(snapshot),
+            'inactive': self.find_inactive_processes(snapshot),
+            'unnecessary': self.find_unnecessary_processes(snapshot),
+            'resource_heavy': []
+        }
+        if USE_HARD_LIMITS:
+            over = threshold_mask(snapshot, MEMORY_THRESHOLD_MB * 1024 * 1024, CPU_THRESHOLD_PERCENT)
+            preview['resource_heavy'] = snapshot.select(combine(over, self._candidates(snapshot)))
+        return preview
+    
+    def scan_focused(self, categories: List[str]) -> Dict[str, List]:
+        """Scan only ``categories`` (e.g. the ones a reclaim can act on) against a fresh snapshot"""
+        with self.scan_lock, self._measured():
+            return self._scan_snapshot(self.take_snapshot(), categories)
+    
+    def _scan_snapshot(self, snapshot: ProcessSnapshot, categories=SCAN_CATEGORIES) -> Dict[str, List]:
+        """Classify ``categories`` (all of them by default) against one snapshot"""
+        finders = {
+            'suspended': self.find_suspended_processes,
+            'duplicates': self.find_duplicate_processes,
+            'inactive': self.find_inactive_processes,
+            'unnecessary': self.find_unnecessary_processes,
+            'resource_heavy': self.find_resource_heavy_processes,
+            'leaking': self.find_leaking_processes,
+            'io_heavy': self.find_io_heavy_processes,
+            'stuck': self.find_stuck_processes
         }
+        results = {category: finders[category](snapshot) for category in categories}
         
         # Convert duplicate dict to list for consistency
-        duplicate_list = []
-        for name, procs in results['duplicates'].items():
-            duplicate_list.extend(procs)
-        results['duplicates'] = duplicate_list
+        if 'duplicates' in results:
+            duplicate_list = []
+            for name, procs in results['duplicates'].items():
+                duplicate_list.extend(procs)
+            results['duplicates'] = duplicate_list
         
-        total_issues = sum(len(procs) for procs in results.values())
-        self.logger.info(f"Scan completed. Found {total_issues} potential issues.")
+        if 'resource_heavy' in results:
+            # Only flagged processes are sampled, and not while the governor is saving effort
+            self.hot_threads = {}
+            if HOT_THREADS_AUTOMATIC and (self.governor is None or self.governor.depth.expensive_share > 0):
+                self.hot_threads = sample_hot_threads(self.hot_thread_candidates(results['resource_heavy']),
+                                                      HOT_THREAD_SAMPLE_INTERVAL, HOT_THREAD_TOP_N)
+        
+        if self.cgroup_tracker is not None:
+            if self.governor is None or self.governor.depth.cgroups:
+                self.cgroup_tracker.update(snapshot.pids, snapshot.timestamp)
+            else:
+                self.cgroup_tracker.clear()
         
+        self.last_snapshot = snapshot
+        if len(results) == len(SCAN_CATEGORIES):
+            self.last_results = results
         return results 
\ No newline at end of file
@@ -0,0 +1,332 @@
+import heapq
+import time
+from typing import List, Dict, Iterable, Optional, Sequence, Set
+
+import psutil
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - fall back to plain Python lists
+    np = None
+
+# Compact integer codes for process status strings
+STATUS_NAMES = [
+    psutil.STATUS_RUNNING, psutil.STATUS_SLEEPING, psutil.STATUS_DISK_SLEEP,
+    psutil.STATUS_STOPPED, psutil.STATUS_TRACING_STOP, psutil.STATUS_ZOMBIE,
+    psutil.STATUS_DEAD, psutil.STATUS_WAKING, psutil.STATUS_IDLE,
+    psutil.STATUS_LOCKED, psutil.STATUS_WAITING, 'unknown'
+]
+STATUS_CODES = {status: code for code, status in enumerate(STATUS_NAMES)}
+UNKNOWN_STATUS = STATUS_CODES['unknown']
+
+# Open handles on Windows, open file descriptors elsewhere
+HANDLES_ATTR = 'num_handles' if psutil.WINDOWS else 'num_fds'
+
+SNAPSHOT_ATTRS = ['pid', 'name', 'memory_info', 'cpu_percent', 'create_time', 'status',
+                  'num_threads', HANDLES_ATTR, 'io_counters', 'ppid', 'cpu_times']
+
+IO_FIELDS = ('read_bytes', 'write_bytes', 'read_count', 'write_count')
+
+# Bit flag per scan_all category, used by compact encodings of a scan
+CATEGORY_FLAGS = {
+    'suspended': 0x01, 'duplicates': 0x02, 'inactive': 0x04, 'unnecessary': 0x08,
+    'resource_heavy': 0x10, 'leaking': 0x20, 'io_heavy': 0x40, 'stuck': 0x80
+}
+
+
+class ProcessSnapshot:
+    """Columnar view of a single process enumeration.
+
+    Every column is a NumPy array when NumPy is installed and a plain list
+    otherwise. Row ``i`` of every column describes ``procs[i]``. Thread, handle,
+    parent PID, creation time, cumulative CPU time and I/O counter columns are -1
+    where the value could not be read.
+    """
+
+    def __init__(self, procs: List[psutil.Process], pids, rss, cpu, age, status, name_ids,
+                 names: List[str], timestamp: float, threads=None, handles=None, io=None,
+                 ppids=None, cpu_time=None, create_time=None):
+        self.procs = procs
+        self.pids = pids
+        self.rss = rss
+        self.cpu = cpu
+        self.age = age
+        self.status = status
+        self.name_ids = name_ids
+        self.threads = threads if threads is not None else [-1] * len(procs)
+        self.handles = handles if handles is not None else [-1] * len(procs)
+        self.io = io if io is not None else {field: [-1] * len(procs) for field in IO_FIELDS}
+        self.ppids = ppids if ppids is not None else [-1] * len(procs)
+        # Cumulative user + system CPU seconds
+        self.cpu_time = cpu_time if cpu_time is not None else [-1.0] * len(procs)
+        # Creation time as reported by psutil; with the PID it identifies a process across scans
+        self.create_time = create_time if create_time is not None else [-1.0] * len(procs)
+        self.names = names
+        self.name_index = {name: i for i, name in enumerate(names)}
+        self.timestamp = timestamp
+        self._lookup_cache = {}
+
+    @classmethod
+    def from_processes(cls, procs: Iterable[psutil.Process], now: Optional[float] = None) -> 'ProcessSnapshot':
+        """Build a snapshot from processes returned by ``psutil.process_iter``"""
+        now = time.time() if now is None else now
+        names = []
+        name_index = {}
+        rows = []
+        pids, rss, cpu, age, status, name_ids = [], [], [], [], [], []
+        threads, handles, ppids, cpu_time, create_times = [], [], [], [], []
+        io = {field: [] for field in IO_FIELDS}
+
+        for proc in procs:
+            info = getattr(proc, 'info', None)
+            if not info:
+                continue
+            name = (info.get('name') or '').lower().strip()
+            name_id = name_index.get(name)
+            if name_id is None:
+                name_id = name_index[name] = len(names)
+                names.append(name)
+
+            memory_info = info.get('memory_info')
+            create_time = info.get('create_time')
+
+            rows.append(proc)
+            pids.append(proc.pid)
+            rss.append(memory_info.rss if memory_info else 0)
+            cpu.append(info.get('cpu_percent') or 0.0)
+            age.append(now - create_time if create_time else 0.0)
+            create_times.append(create_time if create_time else -1.0)
+            status.append(STATUS_CODES.get(info.get('status'), UNKNOWN_STATUS))
+            name_ids.append(name_id)
+            num_threads = info.get('num_threads')
+            num_handles = info.get(HANDLES_ATTR)
+            threads.append(num_threads if num_threads is not None else -1)
+            handles.append(num_handles if num_handles is not None else -1)
+            counters = info.get('io_counters')
+            for field in IO_FIELDS:
+                io[field].append(getattr(counters, field) if counters else -1)
+            ppid = info.get('ppid')
+            ppids.append(ppid if ppid is not None else -1)
+            times = info.get('cpu_times')
+            cpu_time.append(times.user + times.system if times else -1.0)
+
+        if np is not None:
+            pids = np.array(pids, dtype=np.int64)
+            rss = np.array(rss, dtype=np.int64)
+            cpu = np.array(cpu, dtype=np.float64)
+            age = np.array(age, dtype=np.float64)
+            status = np.array(status, dtype=np.int8)
+            name_ids = np.array(name_ids, dtype=np.int32)
+            threads = np.array(threads, dtype=np.int32)
+            handles = np.array(handles, dtype=np.int32)
+            io = {field: np.array(values, dtype=np.int64) for field, values in io.items()}
+            ppids = np.array(ppids, dtype=np.int64)
+            cpu_time = np.array(cpu_time, dtype=np.float64)
+            create_times = np.array(create_times, dtype=np.float64)
+
+        return cls(rows, pids, rss, cpu, age, status, name_ids, names, now,
+                   threads=threads, handles=handles, io=io, ppids=ppids, cpu_time=cpu_time,
+                   create_time=create_times)
+
+    def __len__(self) -> int:
+        return len(self.procs)
+
+    def name_lookup(self, names: Set[str]):
+        """Return a per-name-id boolean table for membership in ``names``"""
+        key = frozenset(names)
+        table = self._lookup_cache.get(key)
+        if table is None:
+            table = [name in key for name in self.names]
+            if np is not None:
+                table = np.array(table, dtype=bool)
+            self._lookup_cache[key] = table
+        return table
+
+    def name_mask(self, names: Set[str]):
+        """Mask of rows whose interned name is in ``names``"""
+        table = self.name_lookup(names)
+        if np is not None:
+            return table[self.name_ids] if len(self) else np.zeros(0, dtype=bool)
+        return [table[i] for i in self.name_ids]
+
+    def select(self, mask) -> List[psutil.Process]:
+        """Return the processes for rows where ``mask`` is true"""
+        if np is not None:
+            return [self.procs[i] for i in np.flatnonzero(mask)]
+        return [proc for proc, flagged in zip(self.procs, mask) if flagged]
+
+
+class ProcessState:
+    """Per-process numbers carried from one scan to the next, as columns keyed by PID and creation time.
+
+    ``lookup`` matches a scan's rows to the stored rows with one sorted search,
+    and ``store`` keeps exactly the rows of the latest scan, so the state of
+    processes that exited is dropped without a separate pass.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.pids = np.zeros(0, dtype=np.int64) if np is not None else []
+        self.create_time = np.zeros(0, dtype=np.float64) if np is not None else []
+        self.columns = {field: np.zeros(0, dtype=np.float64) if np is not None else [] for field in fields}
+        self._index = {}
+
+    def __len__(self) -> int:
+        return len(self.pids)
+
+    def lookup(self, pids, create_time):
+        """Stored row of each (PID, creation time), or -1 for a process not seen last time"""
+        if np is not None:
+            pids = np.asarray(pids, dtype=np.int64)
+            if not len(self.pids):
+                return np.full(pids.size, -1, dtype=np.intp)
+            # Stored PIDs are sorted and unique; a reused PID fails the creation time check
+            position = np.minimum(np.searchsorted(self.pids, pids), len(self.pids) - 1)
+            hit = (self.pids[position] == pids) & (self.create_time[position] == np.asarray(create_time))
+            return np.where(hit, position, -1)
+        return [self._index.get(key, -1) for key in zip(pids, create_time)]
+
+    def previous(self, field: str, match, default: float = 0.0):
+        """``field`` of each matched row, ``default`` for unmatched ones"""
+        column = self.columns[field]
+        if np is not None:
+            if not len(column):
+                return np.full(len(match), default, dtype=np.float64)
+            return np.where(match >= 0, column[match], default)
+        return [column[row] if row >= 0 else default for row in match]
+
+    def store(self, pids, create_time, columns: Dict[str, Sequence[float]]):
+        """Replace the state with these rows"""
+        if np is not None:
+            order = np.argsort(pids, kind='stable')
+            self.pids = np.asarray(pids, dtype=np.int64)[order]
+            self.create_time = np.asarray(create_time, dtype=np.float64)[order]
+            self.columns = {field: np.asarray(values, dtype=np.float64)[order] for field, values in columns.items()}
+            return
+        self.pids, self.create_time = list(pids), list(create_time)
+        self.columns = {field: list(values) for field, values in columns.items()}
+        self._index = {key: row for row, key in enumerate(zip(self.pids, self.create_time))}
+
+
+def category_flags(results: Dict[str, List[psutil.Process]]) -> Dict[int, int]:
+    """Combine ``scan_all`` categories into one CATEGORY_FLAGS bitmask per PID"""
+    flags: Dict[int, int] = {}
+    for category, procs in results.items():
+        bit = CATEGORY_FLAGS.get(category, 0)
+        for proc in procs:
+            flags[proc.pid] = flags.get(proc.pid, 0) | bit
+    return flags
+
+
+def candidate_mask(snapshot: ProcessSnapshot, excluded: Set[str]):
+    """Rows with a non-empty name that is not in ``excluded``"""
+    excluded_table = snapshot.name_lookup(set(excluded) | {''})
+    if np is not None:
+        if not len(snapshot):
+            return np.zeros(0, dtype=bool)
+        return ~excluded_table[snapshot.name_ids]
+    return [not excluded_table[i] for i in snapshot.name_ids]
+
+
+def status_mask(snapshot: ProcessSnapshot, statuses: Iterable[str], invert: bool = False):
+    """Rows whose status is one of ``statuses`` (or, with ``invert``, is none of them)"""
+    codes = [STATUS_CODES[s] for s in statuses if s in STATUS_CODES]
+    if np is not None:
+        return np.isin(snapshot.status, codes, invert=invert)
+    codes = set(codes)
+    return [(code in codes) != invert for code in snapshot.status]
+
+
+def threshold_mask(snapshot: ProcessSnapshot, memory_bytes: float, cpu_percent: float, cpu=None, memory=None):
+    """Rows above the memory or CPU threshold.
+
+    ``cpu`` overrides the snapshot CPU column, e.g. with averaged history, and
+    ``memory`` overrides the RSS column, e.g. with sampled USS values.
+    """
+    cpu = snapshot.cpu if cpu is None else cpu
+    memory = snapshot.rss if memory is None else memory
+    if np is not None:
+        return (np.asarray(memory) > memory_bytes) | (np.asarray(cpu) > cpu_percent)
+    return [m > memory_bytes or c > cpu_percent for m, c in zip(memory, cpu)]
+
+
+def inactive_mask(snapshot: ProcessSnapshot, min_age: float, max_cpu: float = 1.0):
+    """Rows older than ``min_age`` seconds with CPU usage below ``max_cpu``"""
+    if np is not None:
+        return (snapshot.age > min_age) & (snapshot.cpu < max_cpu)
+    return [a > min_age and c < max_cpu for a, c in zip(snapshot.age, snapshot.cpu)]
+
+
+def repeated_name_rows(snapshot: ProcessSnapshot, max_instances: int, candidates=None) -> List[int]:
+    """Candidate rows whose name occurs more than ``max_instances`` times among the candidates.
+
+    A cheap pre-filter for duplicate detection: only these rows can belong to
+    an over-limit group, so only they need their identity read.
+    """
+    n = len(snapshot)
+    if np is not None:
+        if not n:
+            return []
+        candidates = np.ones(n, dtype=bool) if candidates is None else candidates
+        ids = np.where(candidates, snapshot.name_ids, len(snapshot.names))
+        counts = np.bincount(ids, minlength=len(snapshot.names) + 1)
+        counts[-1] = 0
+        return np.flatnonzero((counts > max_instances)[ids]).tolist()
+
+    candidates = [True] * n if candidates is None else candidates
+    counts: Dict[int, int] = {}
+    for name_id, flagged in zip(snapshot.name_ids, candidates):
+        if flagged:
+            counts[name_id] = counts.get(name_id, 0) + 1
+    return [i for i, (name_id, flagged) in enumerate(zip(snapshot.name_ids, candidates))
+            if flagged and counts[name_id] > max_instances]
+
+
+def top_rows(column, k: int, rows=None) -> List[int]:
+    """Indices of the ``k`` largest values in ``column``, largest first.
+
+    ``rows`` restricts the search to a subset of row indices.
+    """
+    if k <= 0:
+        return []
+    if np is not None:
+        values = np.asarray(column)
+        rows = np.arange(values.size) if rows is None else np.asarray(rows, dtype=np.intp)
+        if rows.size > k:
+            # Linear-time partial selection, then sort only the k survivors
+            rows = rows[np.argpartition(values[rows], -k)[-k:]]
+        return rows[np.argsort(values[rows])[::-1]].tolist()
+    rows = range(len(column)) if rows is None else rows
+    return heapq.nlargest(k, rows, key=column.__getitem__)
+
+
+def replace_values(column, rows: List[int], values: List[float]):
+    """Copy of ``column`` with ``rows`` overwritten by ``values``"""
+    if np is not None:
+        result = np.array(column, dtype=np.float64)
+        if rows:
+            result[rows] = values
+        return result
+    result = list(column)
+    for row, value in zip(rows, values):
+        result[row] = value
+    return result
+
+
+def either(*masks):
+    """Logical OR of several masks"""
+    if np is not None:
+        result = masks[0]
+        for mask in masks[1:]:
+            result = result | mask
+        return result
+    return [any(values) for values in zip(*masks)]
+
+
+def combine(*masks):
+    """Logical AND of several masks"""
+    if np is not None:
+        result = masks[0]
+        for mask in masks[1:]:
+            result = result & mask
+        return result
+    return [all(values) for values in zip(*masks)]
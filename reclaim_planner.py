@@ -0,0 +1,263 @@
+"""
+Goal-driven reclaim planning for Auto Clean.
+
+Instead of stopping every flagged process and unnecessary service, the planner
+works out how much memory and CPU actually has to be freed to reach a goal and
+picks the cheapest set of candidates that covers it.
+"""
+
+import math
+import time
+import logging
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+from config import (RECLAIM_CATEGORY_COST, RECLAIM_SERVICE_COST, RECLAIM_PRIORITY_WEIGHT,
+                    RECLAIM_RECENT_WEIGHT, RECLAIM_RECENT_SECONDS, RECLAIM_ACTIONS_PER_SECOND,
+                    RECLAIM_TARGET_AVAILABLE_MB, RECLAIM_TARGET_CPU_PERCENT,
+                    RECLAIM_THROTTLE_CATEGORIES, RECLAIM_THROTTLE_COST, THROTTLE_CPU_FRACTION)
+
+# One process or service the plan may stop (kind 'process' or 'service') or slow
+# down (kind 'throttle'); ``memory`` is bytes and ``cpu`` is percent of total
+# system CPU expected to be freed, ``cost`` its estimated impact
+ReclaimAction = namedtuple('ReclaimAction', ['kind', 'name', 'pid', 'target', 'memory', 'cpu', 'cost', 'reason'])
+
+RESOURCES = ('memory', 'cpu')
+
+# Relative importance of each priority level, 0 (idle) to 1 (realtime)
+if psutil.WINDOWS:
+    PRIORITY_LEVELS = {
+        psutil.IDLE_PRIORITY_CLASS: 0.0,
+        psutil.BELOW_NORMAL_PRIORITY_CLASS: 0.25,
+        psutil.NORMAL_PRIORITY_CLASS: 0.5,
+        psutil.ABOVE_NORMAL_PRIORITY_CLASS: 0.75,
+        psutil.HIGH_PRIORITY_CLASS: 0.9,
+        psutil.REALTIME_PRIORITY_CLASS: 1.0
+    }
+else:
+    PRIORITY_LEVELS = None
+
+
+def _priority_level(proc: psutil.Process) -> float:
+    try:
+        nice = proc.nice()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return 0.5
+    if PRIORITY_LEVELS is not None:
+        return PRIORITY_LEVELS.get(nice, 0.5)
+    # Unix nice values run from -20 (highest priority) to 19
+    return (19 - nice) / 39
+
+
+class ReclaimPlanner:
+    """Chooses the lowest-impact set of processes and services that meets a resource goal"""
+
+    def __init__(self, process_scanner, service_manager=None):
+        self.logger = logging.getLogger(__name__)
+        self.process_scanner = process_scanner
+        self.service_manager = service_manager
+
+    def needs(self, available_mb: Optional[float] = None, cpu_percent: Optional[float] = None) -> Dict[str, float]:
+        """Memory (bytes) and CPU (percent) that must be freed to reach the goal"""
+        needs = {'memory': 0.0, 'cpu': 0.0}
+        if available_mb is not None:
+            needs['memory'] = max(0.0, available_mb * 1024 * 1024 - psutil.virtual_memory().available)
+        if cpu_percent is not None:
+            needs['cpu'] = max(0.0, psutil.cpu_percent(interval=0.5) - cpu_percent)
+        return needs
+
+    def _process_cost(self, proc: psutil.Process, category: str, now: float) -> float:
+        """One per stop, plus extra for important categories, high priority and recent starts"""
+        age = now - (proc.info.get('create_time') or now)
+        return (1.0 + RECLAIM_CATEGORY_COST.get(category, 1.0)
+                + RECLAIM_PRIORITY_WEIGHT * _priority_level(proc)
+                + RECLAIM_RECENT_WEIGHT * math.exp(-age / RECLAIM_RECENT_SECONDS))
+
+    def candidates(self, results: Dict[str, List], services: Optional[List[Dict]] = None) -> List[ReclaimAction]:
+        """Everything the plan may stop, with its expected reclaim and cost"""
+        now = time.time()
+        cpu_count = psutil.cpu_count() or 1
+        actions = {}
+
+        # A process flagged in several categories is costed by the first eligible one
+        for category in RECLAIM_CATEGORY_COST:
+            for proc in results.get(category, []):
+                if ('process', proc.pid) in actions:
+                    continue
+                accurate = self.process_scanner.accurate_memory.get(proc.pid)
+                memory_info = proc.info.get('memory_info')
+                # USS is what terminating the process actually frees; RSS over-counts shared pages
+                memory = accurate['uss'] if accurate else (memory_info.rss if memory_info else 0)
+                cpu = (proc.info.get('cpu_percent') or 0.0) / cpu_count
+                actions[('process', proc.pid)] = ReclaimAction(
+                    'process', proc.info.get('name') or str(proc.pid), proc.pid, proc,
+                    memory, cpu, self._process_cost(proc, category, now), category)
+        
+        # Throttling frees no memory, but caps CPU at the pinned share of the cores
+        # at a fraction of the cost of a kill, so CPU goals slow noisy processes down first
+        if THROTTLE_CPU_FRACTION:
+            cap = max(1, int(cpu_count * THROTTLE_CPU_FRACTION)) * 100 / cpu_count
+            throttled = {pid for pid, _ in self.process_scanner.throttled}
+            for category in RECLAIM_THROTTLE_CATEGORIES:
+                for proc in results.get(category, []):
+                    if ('throttle', proc.pid) in actions or proc.pid in throttled:
+                        continue
+                    cpu = max(0.0, (proc.info.get('cpu_percent') or 0.0) / cpu_count - cap)
+                    actions[('throttle', proc.pid)] = ReclaimAction(
+                        'throttle', proc.info.get('name') or str(proc.pid), proc.pid, proc,
+                        0, cpu, RECLAIM_THROTTLE_COST, category)
+
+        running = [service for service in services or []
+                   if service.get('is_unnecessary') and not service.get('is_critical')
+                   and service.get('status') == 'Running']
+        hosted = {}
+        for service in running:
+            if service.get('pid'):
+                hosted[service['pid']] = hosted.get(service['pid'], 0) + 1
+
+        for service in running:
+            pid = service.get('pid')
+            if ('process', pid) in actions:
+                continue
+            memory = cpu = 0.0
+            if pid:
+                try:
+                    proc = psutil.Process(pid)
+                    # Shared service hosts only shrink by their share when one service stops
+                    memory = proc.memory_info().rss / hosted[pid]
+                    cpu = proc.cpu_percent(interval=None) / cpu_count / hosted[pid]
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    pass
+            actions[('service', service['name'])] = ReclaimAction(
+                'service', service['name'], pid, service['name'], memory, cpu,
+                1.0 + RECLAIM_SERVICE_COST, 'unnecessary service')
+
+        return list(actions.values())
+
+    def plan(self, available_mb: Optional[float] = None, cpu_percent: Optional[float] = None,
+             results: Optional[Dict[str, List]] = None, services: Optional[List[Dict]] = None) -> Dict:
+        """Dry-run plan that frees enough memory and CPU to reach the goal.
+
+        Candidates are added greedily by normalized progress towards the
+        remaining need per unit of cost, then any that turn out redundant are
+        dropped again, most expensive first.
+        """
+        if results is None:
+            results = self.process_scanner.last_results or self.process_scanner.scan_all()
+        if services is None and self.service_manager is not None:
+            services = self.service_manager.get_all_services()
+
+        needs = self.needs(available_mb, cpu_percent)
+        goal = {'available_mb': available_mb, 'cpu_percent': cpu_percent}
+        pool = self.candidates(results, services) if any(needs.values()) else []
+
+        def gain(action, remaining):
+            return sum(min(getattr(action, r), remaining[r]) / needs[r] for r in RESOURCES if needs[r] > 0)
+
+        chosen = []
+        remaining = dict(needs)
+        while pool and any(remaining[r] > 0 for r in RESOURCES):
+            best = max(pool, key=lambda action: gain(action, remaining) / action.cost)
+            if gain(best, remaining) <= 0:
+                break
+            pool.remove(best)
+            chosen.append(best)
+            if best.kind != 'service':
+                # Throttling and killing the same process are alternatives
+                pool = [action for action in pool if action.kind == 'service' or action.pid != best.pid]
+            for r in RESOURCES:
+                remaining[r] = max(0.0, remaining[r] - getattr(best, r))
+
+        def covers(actions):
+            return all(sum(getattr(action, r) for action in actions) >= needs[r] for r in RESOURCES)
+
+        if covers(chosen):
+            for action in sorted(chosen, key=lambda action: action.cost, reverse=True):
+                rest = [other for other in chosen if other is not action]
+                if covers(rest):
+                    chosen = rest
+
+        expected = {r: sum(getattr(action, r) for action in chosen) for r in RESOURCES}
+        return {
+            'goal': goal,
+            'needs': needs,
+            'actions': chosen,
+            'expected': expected,
+            'met': all(expected[r] >= needs[r] for r in RESOURCES)
+        }
+
+    def goal_met(self, goal: Dict) -> bool:
+        if goal['available_mb'] is not None and \
+                psutil.virtual_memory().available < goal['available_mb'] * 1024 * 1024:
+            return False
+        if goal['cpu_percent'] is not None and psutil.cpu_percent(interval=None) > goal['cpu_percent']:
+            return False
+        return True
+
+    def execute(self, plan: Dict, rate: float = RECLAIM_ACTIONS_PER_SECOND,
+                on_action: Optional[Callable[[ReclaimAction, bool], None]] = None) -> int:
+        """Carry out a plan at most ``rate`` actions per second, stopping early once the goal is met"""
+        interval = 1.0 / rate if rate > 0 else 0.0
+        completed = 0
+        for i, action in enumerate(plan['actions']):
+            # Memory is released asynchronously; re-check before each further stop
+            if i and self.goal_met(plan['goal']):
+                self.logger.info(f"Reclaim goal reached after {completed} actions")
+                break
+            started = time.monotonic()
+            if action.kind == 'process':
+                ok = self.process_scanner.terminate_process(action.target)
+            elif action.kind == 'throttle':
+                ok = self.process_scanner.throttle_process(action.target)
+            else:
+                ok = self.service_manager is not None and self.service_manager.stop_service(action.target)
+            completed += ok
+            if on_action:
+                on_action(action, ok)
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        return completed
+
+
+def reclaim_goal(resources: List[str]) -> Dict[str, Optional[float]]:
+    """Configured ``plan`` goal arguments for the resources under pressure"""
+    return {
+        'available_mb': RECLAIM_TARGET_AVAILABLE_MB if 'memory' in resources else None,
+        'cpu_percent': RECLAIM_TARGET_CPU_PERCENT if 'cpu' in resources else None
+    }
+
+
+def describe_action(action: ReclaimAction, ok: bool) -> str:
+    """Log line for an executed plan action"""
+    verb = 'throttle' if action.kind == 'throttle' else 'stop'
+    done = {'throttle': 'Throttled', 'stop': 'Stopped'}[verb] if ok else f"Failed to {verb}"
+    if action.kind == 'service':
+        return f"{done} service: {action.name}"
+    return f"{done} process: {action.name} (PID: {action.pid})"
+
+
+def format_plan(plan: Dict) -> List[str]:
+    """Human-readable dry-run summary of a plan"""
+    goal, needs, expected = plan['goal'], plan['needs'], plan['expected']
+    lines = []
+    if goal['available_mb'] is not None:
+        lines.append(f"Goal: {goal['available_mb']:.0f} MB available memory "
+                     f"(need {needs['memory'] / 1024 / 1024:.0f} MB more)")
+    if goal['cpu_percent'] is not None:
+        lines.append(f"Goal: CPU at or below {goal['cpu_percent']:.0f}% (need {needs['cpu']:.1f} points less)")
+
+    if not any(needs.values()):
+        lines.append("Nothing to do: the goal is already met")
+        return lines
+
+    for action in plan['actions']:
+        target = 'service' if action.kind == 'service' else f"PID: {action.pid}"
+        verb = 'Throttle' if action.kind == 'throttle' else 'Stop'
+        lines.append(f"  - {verb} {action.name} ({target}, {action.reason}): "
+                     f"~{action.memory / 1024 / 1024:.0f} MB, ~{action.cpu:.1f}% CPU")
+    lines.append(f"Expected: ~{expected['memory'] / 1024 / 1024:.0f} MB and ~{expected['cpu']:.1f}% CPU "
+                 f"from {len(plan['actions'])} actions")
+    if not plan['met']:
+        lines.append("Warning: the available candidates cannot fully reach the goal")
+    return lines
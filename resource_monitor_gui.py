@@ -1,20 +1,56 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import threading
+import time
 import logging
 from datetime import datetime
 import json
 import sys
 import os
+import platform
+
+from config import (EVENT_TRACKING_ENABLED, EXPORT_SNAPSHOT_ARCHIVE,
+                    LOG_TAB_MAX_LINES, LOG_TAB_LEVEL, UI_FRAME_MS, GUI_MAX_ROWS, GUI_PREVIEW_INTERVAL,
+                    RECLAIM_TARGET_AVAILABLE_MB, RECLAIM_TARGET_CPU_PERCENT,
+                    PRESSURE_WATCH_ENABLED, PRESSURE_SAMPLE_INTERVAL, PRESSURE_THRESHOLDS,
+                    PRESSURE_COOLDOWN, PRESSURE_RECLAIM_POLICY, SHARED_SNAPSHOT_ENABLED,
+                    SHARED_SNAPSHOT_MAX_AGE, SINGLE_INSTANCE_ENABLED)
+from ui_dispatcher import UiDispatcher
+from single_instance import InstanceServer
+from row_index import RowIndex
 
 try:
     from process_scanner import ProcessScanner
     from service_manager import ServiceManager
+    from reclaim_planner import ReclaimPlanner, format_plan, reclaim_goal, describe_action
+    from pressure_watcher import PressureWatcher, describe_signals, pressure_resources
+    from overhead_governor import describe_overhead
+    from shared_snapshot import read_shared_snapshot
+    from snapshot_archive import encode_archive
+    from thread_sampler import describe_hot_threads
 except ImportError:
     print("Could not import scanner modules. Running in demo mode.")
     ProcessScanner = None
     ServiceManager = None
 
+class QueueLogHandler(logging.Handler):
+    """Posts formatted log records to the UI dispatcher for the GUI log tab.
+
+    ``emit`` only queues the line, so it is safe and cheap from any thread; the
+    GUI writes the pending lines in one batch per frame.
+    """
+    
+    def __init__(self, dispatcher, level=logging.NOTSET):
+        super().__init__(level)
+        self.dispatcher = dispatcher
+        self.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+    
+    def emit(self, record):
+        try:
+            self.dispatcher.post('log', self.format(record))
+        except Exception:
+            self.handleError(record)
+
 class ResourceMonitorGUI:
     def __init__(self):
         self.root = tk.Tk()
@@ -25,18 +61,54 @@ class ResourceMonitorGUI:
         if ProcessScanner and ServiceManager:
             self.process_scanner = ProcessScanner()
             self.service_manager = ServiceManager()
+            self.reclaim_planner = ReclaimPlanner(self.process_scanner, self.service_manager)
+            self.pressure_watcher = PressureWatcher(PRESSURE_SAMPLE_INTERVAL, PRESSURE_THRESHOLDS,
+                                                    PRESSURE_COOLDOWN, self.on_pressure)
+            if EVENT_TRACKING_ENABLED:
+                self.process_scanner.start_event_tracking()
         else:
             self.process_scanner = None
             self.service_manager = None
+            self.pressure_watcher = None
+        
+        # Worker threads never touch widgets; they post updates applied once per frame
+        self.ui = UiDispatcher()
+        self.ui.register('status', self.update_status)
+        self.ui.register('overhead', lambda report: self.overhead_label.config(text=describe_overhead(report)))
+        self.ui.register('processes', self.show_scan_results)
+        self.ui.register('services', self.update_service_display)
+        self.ui.register('rescan', lambda _: self.root.after(1000, self.perform_scan))
+        self.ui.register('refresh_services', lambda _: self.root.after(1000, self.refresh_services))
+        self.ui.register('reclaim_plan', self.confirm_reclaim_plan)
+        self.ui.register('activate', self.activate)
+        self.ui.register('hot_threads', self.show_hot_threads)
+        self.ui.register('log', self.append_log_lines, coalesce=False, limit=LOG_TAB_MAX_LINES)
             
         self.setup_logging()
         
         # Data storage
         self.scan_results = {}
+        self.process_index = None
+        self.cgroup_usage = {}
+        self.service_index = None
+        self.last_services = None
+        self.process_sort = (None, False)
+        self.service_sort = (None, False)
         
         # Create GUI
         self.create_widgets()
         
+        self.root.after(UI_FRAME_MS, self.process_ui_updates)
+        
+        # Later launches ask this instance to come to the front or for its latest scan
+        self.instance_server = None
+        if SINGLE_INSTANCE_ENABLED:
+            self.instance_server = InstanceServer({'activate': self.on_activate_request,
+                                                   'snapshot': self.instance_snapshot})
+            if not self.instance_server.start():
+                self.log_message("Another instance is already running; repeat launches will not reach this one")
+                self.instance_server = None
+        
         # Initial scan if modules available
         if self.process_scanner:
             self.perform_scan()
@@ -44,6 +116,26 @@ class ResourceMonitorGUI:
     def setup_logging(self):
         """Setup logging for the GUI"""
         logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+        
+        # Module loggers (process_scanner, service_manager, ...) propagate to the root logger
+        self.log_handler = QueueLogHandler(self.ui, logging.INFO)
+        logging.getLogger().addHandler(self.log_handler)
+        # The root level may be higher (--log-level WARNING); the tab still shows its own level
+        self.set_log_level(LOG_TAB_LEVEL)
+        
+    def set_log_level(self, level_name: str):
+        """Show records down to ``level_name`` in the log tab"""
+        level = getattr(logging, level_name.upper(), logging.INFO)
+        root_logger = logging.getLogger()
+        if level < root_logger.getEffectiveLevel():
+            # Records below the root level never reach a handler; keep the other
+            # handlers (console, log file) at the level they were getting before
+            for handler in root_logger.handlers:
+                if handler is not self.log_handler and handler.level < root_logger.level:
+                    handler.setLevel(root_logger.level)
+            root_logger.setLevel(level)
+        self.log_handler.setLevel(level)
         
     def create_widgets(self):
         """Create the main GUI widgets"""
@@ -76,24 +168,40 @@ class ResourceMonitorGUI:
         type_frame.pack(fill='x', padx=5, pady=5)
         
         self.process_vars = {}
-        process_types = ['suspended', 'duplicates', 'inactive', 'unnecessary', 'resource_heavy']
+        self.process_types = ['suspended', 'duplicates', 'inactive', 'unnecessary', 'resource_heavy', 'leaking', 'io_heavy',
+                              'stuck']
         
-        for i, ptype in enumerate(process_types):
+        for i, ptype in enumerate(self.process_types):
             var = tk.BooleanVar(value=True)
             self.process_vars[ptype] = var
-            cb = ttk.Checkbutton(type_frame, text=ptype.replace('_', ' ').title(), variable=var)
+            cb = ttk.Checkbutton(type_frame, text=ptype.replace('_', ' ').title(), variable=var,
+                                 command=self.update_process_display)
             cb.grid(row=0, column=i, padx=5, pady=5, sticky='w')
         
+        # Group rows by detection category, or by cgroup/container on Linux container hosts
+        self.process_group_by = tk.StringVar(value='Category')
+        ttk.Label(type_frame, text="Group by:").grid(row=0, column=len(self.process_types), padx=5, pady=5)
+        group_combo = ttk.Combobox(type_frame, textvariable=self.process_group_by, values=('Category', 'Container'),
+                                   state='readonly', width=10)
+        group_combo.grid(row=0, column=len(self.process_types) + 1, padx=5, pady=5)
+        group_combo.bind('<<ComboboxSelected>>', lambda event: self.update_process_display())
+        
+        # Filter box; searches name, command line, user and container of the last scan
+        self.process_filter = tk.StringVar()
+        self.process_count_label = self.create_filter_bar(self.process_frame, self.process_filter,
+                                                          self.update_process_display)
+        
         # Process list
-        list_frame = ttk.LabelFrame(self.process_frame, text="Detected Processes")
+        list_frame = self.process_list_frame = ttk.LabelFrame(self.process_frame, text="Detected Processes")
         list_frame.pack(fill='both', expand=True, padx=5, pady=5)
         
         # Treeview for processes
-        columns = ('Type', 'PID', 'Name', 'Memory (MB)', 'CPU %', 'Status', 'User')
-        self.process_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings')
+        self.process_columns = ('Type', 'PID', 'Name', 'Memory (MB)', 'USS (MB)', 'CPU %', 'Disk R/W (MB/s)', 'Status', 'User',
+                                'Container')
+        self.process_tree = ttk.Treeview(list_frame, columns=self.process_columns, show='tree headings')
         
-        for col in columns:
-            self.process_tree.heading(col, text=col)
+        for i, col in enumerate(self.process_columns):
+            self.process_tree.heading(col, text=col, command=lambda column=i: self.sort_processes(column))
             self.process_tree.column(col, width=100)
         
         # Scrollbars
@@ -111,21 +219,32 @@ class ResourceMonitorGUI:
                   command=self.terminate_selected_processes).pack(side='left', padx=5)
         ttk.Button(action_frame, text="Force Kill Selected", 
                   command=lambda: self.terminate_selected_processes(force=True)).pack(side='left', padx=5)
+        ttk.Button(action_frame, text="Throttle Selected", 
+                  command=self.throttle_selected_processes).pack(side='left', padx=5)
+        ttk.Button(action_frame, text="Restore Selected", 
+                  command=lambda: self.throttle_selected_processes(restore=True)).pack(side='left', padx=5)
+        ttk.Button(action_frame, text="Hot Threads", 
+                  command=self.sample_selected_threads).pack(side='left', padx=5)
         ttk.Button(action_frame, text="Refresh", 
                   command=self.perform_scan).pack(side='left', padx=5)
     
     def create_service_tab(self):
         """Create the service monitoring tab"""
+        # Filter box; searches service and display names
+        self.service_filter = tk.StringVar()
+        self.service_count_label = self.create_filter_bar(self.service_frame, self.service_filter,
+                                                          self.update_service_tree)
+        
         # Service list
         list_frame = ttk.LabelFrame(self.service_frame, text="Windows Services")
         list_frame.pack(fill='both', expand=True, padx=5, pady=5)
         
         # Treeview for services
-        columns = ('Name', 'Display Name', 'Status', 'Start Type', 'Category')
-        self.service_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings')
+        self.service_columns = ('Name', 'Display Name', 'Status', 'Start Type', 'Category')
+        self.service_tree = ttk.Treeview(list_frame, columns=self.service_columns, show='tree headings')
         
-        for col in columns:
-            self.service_tree.heading(col, text=col)
+        for i, col in enumerate(self.service_columns):
+            self.service_tree.heading(col, text=col, command=lambda column=i: self.sort_services(column))
             self.service_tree.column(col, width=150)
         
         # Scrollbars
@@ -146,14 +265,40 @@ class ResourceMonitorGUI:
         ttk.Button(action_frame, text="Refresh Services", 
                   command=self.refresh_services).pack(side='left', padx=5)
     
+    def create_filter_bar(self, parent, variable, on_change):
+        """Filter entry that re-renders on every keystroke; returns the match count label"""
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill='x', padx=5, pady=(5, 0))
+        
+        ttk.Label(filter_frame, text="Filter:").pack(side='left')
+        ttk.Entry(filter_frame, textvariable=variable, width=40).pack(side='left', padx=5)
+        ttk.Button(filter_frame, text="Clear", command=lambda: variable.set('')).pack(side='left')
+        ttk.Label(filter_frame, text="(^name for prefix match)").pack(side='left', padx=5)
+        count_label = ttk.Label(filter_frame, text="")
+        count_label.pack(side='right')
+        
+        variable.trace_add('write', lambda *args: on_change())
+        return count_label
+    
     def create_log_tab(self):
         """Create the logging tab"""
         self.log_text = scrolledtext.ScrolledText(self.log_frame, wrap=tk.WORD, height=20)
         self.log_text.pack(fill='both', expand=True, padx=5, pady=5)
         
+        log_controls = ttk.Frame(self.log_frame)
+        log_controls.pack(fill='x', padx=5, pady=5)
+        
+        # Minimum level shown in the log tab
+        ttk.Label(log_controls, text="Level:").pack(side='left')
+        self.log_level_var = tk.StringVar(value=logging.getLevelName(self.log_handler.level))
+        level_box = ttk.Combobox(log_controls, textvariable=self.log_level_var, state='readonly', width=10,
+                                 values=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+        level_box.pack(side='left', padx=5)
+        level_box.bind('<<ComboboxSelected>>', lambda event: self.set_log_level(self.log_level_var.get()))
+        
         # Clear log button
-        ttk.Button(self.log_frame, text="Clear Log", 
-                  command=lambda: self.log_text.delete(1.0, tk.END)).pack(pady=5)
+        ttk.Button(log_controls, text="Clear Log", 
+                  command=lambda: self.log_text.delete(1.0, tk.END)).pack(side='right')
     
     def create_control_buttons(self):
         """Create main control buttons"""
@@ -170,6 +315,10 @@ class ResourceMonitorGUI:
         # Status label
         self.status_label = ttk.Label(control_frame, text="Ready")
         self.status_label.pack(side='right', padx=5)
+        
+        # The monitor's own CPU and memory cost, updated after each scan
+        self.overhead_label = ttk.Label(control_frame, text="")
+        self.overhead_label.pack(side='right', padx=5)
     
     def perform_scan(self):
         """Perform a comprehensive scan"""
@@ -177,50 +326,268 @@ class ResourceMonitorGUI:
             self.log_message("Scanner not available - dependencies not installed")
             return
             
-        def scan_thread():
-            try:
-                self.update_status("Scanning processes...")
-                self.scan_results = self.process_scanner.scan_all()
-                self.root.after(0, self.update_process_display)
-                self.root.after(0, lambda: self.update_status("Scan completed"))
-                self.log_message("Process scan completed successfully")
-            except Exception as e:
-                self.log_message(f"Error during scan: {e}")
-                self.root.after(0, lambda: self.update_status("Scan failed"))
+        threading.Thread(target=self.run_scan, daemon=True).start()
+    
+    def run_scan(self):
+        """Scan on the calling (worker) thread, posting results as they arrive; returns the final
+        (possibly partial) results, or None on failure"""
+        try:
+            shared = self.shared_snapshot()
+            if shared is not None:
+                results = shared.archive.live_results()
+                self.ui.post('processes', (results, self.build_process_index(results), {}, None))
+                self.ui.post('status', f"Loaded collector snapshot ({time.time() - shared.published:.0f}s old)")
+                self.log_message(f"Using the snapshot published by the collector (PID {shared.writer_pid})")
+                return results
+            
+            self.ui.post('status', "Scanning processes...")
+            found = {}
+            # Details and display rows of each found process are built once, not again for every batch
+            details = {}
+            rows = []
+            last_preview = 0.0
+            for step in self.process_scanner.scan_progressive():
+                if not step.final:
+                    for category, hits in step.results.items():
+                        found.setdefault(category, []).extend(hits)
+                    rows.extend(self.process_rows(step.results, details))
+                    # Indexing is over every row so far, so previews are rate limited rather than per batch
+                    if time.monotonic() - last_preview >= GUI_PREVIEW_INTERVAL:
+                        last_preview = time.monotonic()
+                        snapshot = {category: list(hits) for category, hits in found.items()}
+                        self.ui.post('processes', (snapshot, self.index_rows(list(rows)), {}, 'scanning'))
+                    self.ui.post('status', f"Scanning processes... {step.scanned} scanned")
+                    continue
+                
+                results = step.results
+                self.log_short_lived_processes()
+                self.log_hot_threads()
+                self.log_stuck_processes()
+                cgroups = dict(self.process_scanner.cgroup_tracker.usage) if self.process_scanner.cgroup_tracker else {}
+                # A complete scan adds USS, container and flag reasons, so its details are read afresh
+                index = self.build_process_index(results, details if step.partial else None)
+                self.ui.post('processes', (results, index, cgroups, 'partial' if step.partial else None))
+                self.post_overhead()
+                if step.partial:
+                    self.ui.post('status', f"Partial scan: deadline reached after {step.scanned} processes")
+                    self.log_message(f"Process scan stopped at the deadline after {step.scanned} processes; "
+                                     f"showing partial results")
+                else:
+                    self.ui.post('status', "Scan completed")
+                    self.log_message("Process scan completed successfully")
+            return results
+        except Exception as e:
+            self.log_message(f"Error during scan: {e}")
+            self.ui.post('status', "Scan failed")
+            return None
+    
+    def shared_snapshot(self):
+        """The background collector's snapshot if one is running and fresh, otherwise None"""
+        if not SHARED_SNAPSHOT_ENABLED or not self.process_scanner:
+            return None
+        return read_shared_snapshot()
+    
+    def on_activate_request(self):
+        """Another launch asked for this window (IPC thread)"""
+        self.ui.post('activate')
+        return {'ok': True, 'pid': os.getpid()}, b''
+    
+    def activate(self, _):
+        """Bring the window to the front and rescan"""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+        self.log_message("Activated by another launch")
+        self.perform_scan()
+    
+    def instance_snapshot(self):
+        """Latest complete scan as a snapshot archive for another launch, rescanning first if
+        it is stale (IPC thread)"""
+        if not self.process_scanner:
+            return {'ok': False, 'error': 'scanner not available'}, b''
+        snapshot = self.process_scanner.last_snapshot
+        if snapshot is None or time.time() - snapshot.timestamp > SHARED_SNAPSHOT_MAX_AGE:
+            self.run_scan()
+            snapshot = self.process_scanner.last_snapshot
+        results = self.process_scanner.last_results
+        if snapshot is None or not results:
+            return {'ok': False, 'error': 'no complete scan available'}, b''
+        payload = encode_archive(snapshot, results, self.last_services, platform.node())
+        return {'ok': True, 'pid': os.getpid(), 'timestamp': snapshot.timestamp}, payload
+    
+    def post_overhead(self):
+        """Show the scanner's own cost and space pressure-triggered rescans to keep it within budget"""
+        overhead = self.process_scanner.overhead()
+        if overhead is None:
+            return
+        self.ui.post('overhead', overhead)
+        self.pressure_watcher.cooldown = self.process_scanner.scan_interval(PRESSURE_COOLDOWN)
+    
+    def on_pressure(self, level, sample, signals):
+        """Scan when host pressure rises, and plan a reclaim when it is critical (watcher thread)"""
+        self.log_message(f"Host pressure {level}: {describe_signals(sample, signals)}")
+        results = self.run_scan()
+        if results is None or level != 'critical' or PRESSURE_RECLAIM_POLICY == 'off':
+            return
         
-        threading.Thread(target=scan_thread, daemon=True).start()
+        plan = self.reclaim_planner.plan(results=results, **reclaim_goal(pressure_resources(signals)))
+        if not plan['actions']:
+            for line in format_plan(plan):
+                self.log_message(f"Pressure reclaim plan: {line.strip()}")
+        elif PRESSURE_RECLAIM_POLICY == 'execute':
+            self.execute_reclaim_plan(plan)
+        else:
+            self.ui.post('reclaim_plan', plan)
+    
+    def log_short_lived_processes(self):
+        """Log processes that started and exited between two scans"""
+        for exited in self.process_scanner.recent_exits():
+            if exited.started is not None:
+                lifetime = exited.exited - exited.started
+                memory_mb = round((exited.rss or 0) / 1024 / 1024, 2)
+                self.log_message(f"Short-lived process: {exited.name} (PID: {exited.pid}, "
+                                 f"lived {lifetime:.1f}s, Memory: {memory_mb}MB)")
+    
+    def log_hot_threads(self):
+        """Log the busiest threads sampled automatically during the last scan"""
+        for pid, threads in self.process_scanner.hot_threads.items():
+            if threads:
+                self.log_message(f"Hot threads of PID {pid}: {describe_hot_threads(threads)}")
+    
+    def log_stuck_processes(self):
+        """Log why each stuck process was flagged and the recommended action"""
+        for pid, stuck in self.process_scanner.stuck_detector.reasons.items():
+            self.log_message(f"PID {pid} is {stuck['reason']}; recommended: {stuck['action']}")
+    
+    def build_process_index(self, results, cache=None):
+        """Collect display rows for the scan results and index them for filtering and sorting.
+        
+        ``cache`` maps PIDs to details already read during the same scan.
+        """
+        return self.index_rows(self.process_rows(results, cache))
+    
+    def process_rows(self, results, cache=None):
+        """Display rows for the scan results"""
+        rows = []
+        cache = {} if cache is None else cache
+        for process_type, processes in results.items():
+            for proc in processes:
+                details = cache.get(proc.pid)
+                if details is None:
+                    details = cache[proc.pid] = self.process_scanner.get_process_details(proc)
+                if details:
+                    rows.append((
+                        process_type,
+                        details['pid'],
+                        details['name'],
+                        details['memory_mb'],
+                        details.get('uss_mb', ''),
+                        details['cpu_percent'],
+                        f"{details['io_read_mb_s']} / {details['io_write_mb_s']}" if 'io_read_mb_s' in details else '',
+                        details['status'],
+                        details['username'],
+                        details.get('container', ''),
+                        details['cmdline']  # Searched, not displayed
+                    ))
+        return rows
+    
+    @staticmethod
+    def index_rows(rows):
+        """Index display rows for filtering and sorting"""
+        # Name, user, container and command line are searchable; memory and CPU are the usual sort keys
+        return RowIndex(rows, text_columns=(2, 8, 9, 10), sort_columns=(3, 5))
+    
+    def show_scan_results(self, payload):
+        """Store the latest scan results and render them"""
+        self.scan_results, self.process_index, cgroups, state = payload
+        self.cgroup_usage = {usage['container']: usage for usage in cgroups.values()}
+        self.process_list_frame.config(text={
+            'scanning': "Detected Processes (scanning...)",
+            'partial': "Detected Processes (PARTIAL - scan deadline reached)"
+        }.get(state, "Detected Processes"))
+        self.update_process_display()
     
     def update_process_display(self):
-        """Update the process tree view with scan results"""
-        # Clear existing items
-        for item in self.process_tree.get_children():
-            self.process_tree.delete(item)
+        """Update the process tree view with the filtered and sorted scan results"""
+        enabled = [ptype for ptype in self.process_types
+                   if ptype in self.scan_results and self.process_vars[ptype].get()]
+        columns = slice(0, len(self.process_columns))
+        if self.process_group_by.get() != 'Container':
+            self.render_tree(self.process_tree, self.process_index, self.process_filter.get(), self.process_sort,
+                             enabled, self.process_count_label, columns,
+                             keep_empty=True, include=lambda row: row[0] in enabled)
+            return
+        
+        # A process flagged in several categories is listed once under its container
+        seen = set()
         
-        if not self.scan_results:
+        def include(row):
+            if row[0] not in enabled or row[1] in seen:
+                return False
+            seen.add(row[1])
+            return True
+        
+        self.render_tree(self.process_tree, self.process_index, self.process_filter.get(), self.process_sort,
+                         [], self.process_count_label, columns, include=include,
+                         group_column=9, label=self.container_label)
+    
+    def container_label(self, container, count):
+        """Container group heading with the cgroup's memory use against its limit"""
+        usage = self.cgroup_usage.get(container)
+        if not container or usage is None:
+            return f"No cgroup ({count})"
+        current_mb = round((usage['memory_current'] or 0) / 1024 / 1024, 2)
+        if usage['memory_max'] is None:
+            return f"{container} ({count}) - {current_mb}MB"
+        limit_mb = round(usage['memory_max'] / 1024 / 1024, 2)
+        if usage['memory_ratio'] is None:
+            # memory.current was unreadable, so there is no ratio to show
+            return f"{container} ({count}) - limit {limit_mb}MB"
+        near = " - NEAR LIMIT" if usage['memory_ratio'] >= self.process_scanner.cgroup_tracker.near_limit else ""
+        return f"{container} ({count}) - {current_mb}MB of {limit_mb}MB ({usage['memory_ratio']:.0%}){near}"
+    
+    def render_tree(self, tree, index, query, sort, groups, count_label, columns, keep_empty=False, include=None,
+                    group_column=0, label=None):
+        """Show the rows of ``index`` matching ``query`` in ``sort`` order, grouped by ``group_column``"""
+        tree.delete(*tree.get_children())
+        if index is None:
             return
-            
-        # Add processes by type
-        for process_type, processes in self.scan_results.items():
-            if not self.process_vars.get(process_type, tk.BooleanVar(value=True)).get():
+        
+        rows, total = index.view(query, sort[0], sort[1], include=include, limit=GUI_MAX_ROWS)
+        grouped = {group: [] for group in groups}
+        for row in rows:
+            values = index.rows[row]
+            grouped.setdefault(values[group_column], []).append(values[columns])
+        
+        for group, items in grouped.items():
+            if not items and (query or not keep_empty):
                 continue
-            
-            # Create parent node for process type
-            type_node = self.process_tree.insert('', 'end', text=f"{process_type.title()} ({len(processes)})")
-            
-            for proc in processes:
-                if self.process_scanner:
-                    details = self.process_scanner.get_process_details(proc)
-                    if details:
-                        values = (
-                            process_type,
-                            details['pid'],
-                            details['name'],
-                            details['memory_mb'],
-                            details['cpu_percent'],
-                            details['status'],
-                            details['username']
-                        )
-                        self.process_tree.insert(type_node, 'end', values=values, tags=(process_type,))
+            # Expand groups while filtering so matches are visible right away
+            text = label(group, len(items)) if label else f"{group.title()} ({len(items)})"
+            node = tree.insert('', 'end', text=text, open=bool(query))
+            for values in items:
+                tree.insert(node, 'end', values=values, tags=(group.lower(),))
+        
+        shown = f"Showing {len(rows)} of {total}" if len(rows) < total else f"{total} matches"
+        count_label.config(text=shown if query or len(rows) < total else "")
+    
+    def sort_processes(self, column):
+        """Sort the process tree by ``column``; clicking again reverses the order"""
+        self.process_sort = self.toggle_sort(self.process_tree, self.process_columns, self.process_sort, column)
+        self.update_process_display()
+    
+    def sort_services(self, column):
+        """Sort the service tree by ``column``; clicking again reverses the order"""
+        self.service_sort = self.toggle_sort(self.service_tree, self.service_columns, self.service_sort, column)
+        self.update_service_tree()
+    
+    def toggle_sort(self, tree, columns, current, column):
+        """Next (column, descending) sort state and matching heading arrows"""
+        descending = not current[1] if current[0] == column else False
+        for i, name in enumerate(columns):
+            arrow = (' \u25bc' if descending else ' \u25b2') if i == column else ''
+            tree.heading(name, text=name + arrow)
+        return column, descending
     
     def refresh_services(self):
         """Refresh the service list"""
@@ -230,50 +597,45 @@ class ResourceMonitorGUI:
             
         def refresh_thread():
             try:
-                self.update_status("Refreshing services...")
-                services = self.service_manager.get_all_services()
-                self.root.after(0, lambda: self.update_service_display(services))
-                self.root.after(0, lambda: self.update_status("Services refreshed"))
+                self.ui.post('status', "Refreshing services...")
+                shared = self.shared_snapshot()
+                services = shared.archive.service_list() if shared is not None else self.service_manager.get_all_services()
+                self.last_services = services
+                self.ui.post('services', self.build_service_index(services))
+                self.ui.post('status', "Services refreshed")
                 self.log_message("Services refreshed successfully")
             except Exception as e:
                 self.log_message(f"Error refreshing services: {e}")
-                self.root.after(0, lambda: self.update_status("Refresh failed"))
+                self.ui.post('status', "Refresh failed")
         
         threading.Thread(target=refresh_thread, daemon=True).start()
     
-    def update_service_display(self, services):
-        """Update the service tree view"""
-        # Clear existing items
-        for item in self.service_tree.get_children():
-            self.service_tree.delete(item)
-        
-        # Group services by category
-        categories = {'Critical': [], 'Unnecessary': [], 'Normal': []}
-        
+    def build_service_index(self, services):
+        """Service rows grouped by category and indexed for filtering and sorting"""
+        rows = []
         for service in services:
             if service.get('is_critical'):
-                categories['Critical'].append(service)
+                category = 'Critical'
             elif service.get('is_unnecessary'):
-                categories['Unnecessary'].append(service)
+                category = 'Unnecessary'
             else:
-                categories['Normal'].append(service)
-        
-        # Add services by category
-        for category, service_list in categories.items():
-            if not service_list:
-                continue
-            
-            category_node = self.service_tree.insert('', 'end', text=f"{category} ({len(service_list)})")
-            
-            for service in service_list:
-                values = (
-                    service['name'],
-                    service['display_name'],
-                    service['status'],
-                    service['start_type'],
-                    category
-                )
-                self.service_tree.insert(category_node, 'end', values=values, tags=(category.lower(),))
+                category = 'Normal'
+            rows.append((category, service['name'], service['display_name'], service['status'],
+                         service['start_type'], category))
+        return RowIndex(rows, text_columns=(1, 2))
+    
+    def update_service_display(self, index):
+        """Store the latest service index and render it"""
+        self.service_index = index
+        self.update_service_tree()
+    
+    def update_service_tree(self):
+        """Update the service tree view with the filtered and sorted services"""
+        # Rows carry their category first for grouping; the sort column is shifted past it
+        sort_column, descending = self.service_sort
+        sort = (sort_column + 1 if sort_column is not None else None, descending)
+        self.render_tree(self.service_tree, self.service_index, self.service_filter.get(), sort,
+                         ['Critical', 'Unnecessary', 'Normal'], self.service_count_label, slice(1, None))
     
     def terminate_selected_processes(self, force=False):
         """Terminate selected processes"""
@@ -289,10 +651,11 @@ class ResourceMonitorGUI:
         if not messagebox.askyesno("Confirm", f"Are you sure you want to {'force kill' if force else 'terminate'} selected processes?"):
             return
         
+        selected_values = [self.process_tree.item(item, 'values') for item in selected_items]
+        
         def terminate_thread():
             terminated_count = 0
-            for item in selected_items:
-                values = self.process_tree.item(item, 'values')
+            for values in selected_values:
                 if values and len(values) > 1:  # Skip category headers
                     try:
                         pid = int(values[1])
@@ -305,10 +668,76 @@ class ResourceMonitorGUI:
                         self.log_message(f"Failed to terminate PID {values[1]}: {e}")
             
             self.log_message(f"Terminated {terminated_count} processes")
-            self.root.after(1000, self.perform_scan)  # Refresh after 1 second
+            self.ui.post('rescan')  # Refresh after 1 second
         
         threading.Thread(target=terminate_thread, daemon=True).start()
     
+    def throttle_selected_processes(self, restore=False):
+        """Lower priority, I/O priority and CPU affinity of selected processes, or restore them"""
+        selected_values = [self.process_tree.item(item, 'values') for item in self.process_tree.selection()]
+        if not selected_values:
+            messagebox.showwarning("Warning", "No processes selected")
+            return
+        
+        if not self.process_scanner:
+            messagebox.showerror("Error", "Process scanner not available")
+            return
+        
+        def throttle_thread():
+            import psutil
+            count = 0
+            for values in selected_values:
+                if values and len(values) > 1:  # Skip category headers
+                    try:
+                        proc = psutil.Process(int(values[1]))
+                    except psutil.NoSuchProcess:
+                        self.log_message(f"Process {values[2]} (PID: {values[1]}) no longer exists")
+                        continue
+                    if restore:
+                        count += self.process_scanner.restore_process(proc)
+                    else:
+                        count += self.process_scanner.throttle_process(proc)
+            
+            self.log_message(f"{'Restored' if restore else 'Throttled'} {count} processes")
+        
+        threading.Thread(target=throttle_thread, daemon=True).start()
+    
+    def sample_selected_threads(self):
+        """Sample per-thread CPU of the selected (flagged) processes"""
+        selected_values = [self.process_tree.item(item, 'values') for item in self.process_tree.selection()]
+        selected_values = [values for values in selected_values if values and len(values) > 1]  # Skip category headers
+        if not selected_values:
+            messagebox.showwarning("Warning", "No processes selected")
+            return
+        
+        if not self.process_scanner:
+            messagebox.showerror("Error", "Process scanner not available")
+            return
+        
+        def sample_thread():
+            import psutil
+            procs = {}
+            for values in selected_values:
+                try:
+                    procs[int(values[1])] = (values[2], psutil.Process(int(values[1])))
+                except psutil.NoSuchProcess:
+                    self.log_message(f"Process {values[2]} (PID: {values[1]}) no longer exists")
+            self.ui.post('status', "Sampling threads...")
+            sampled = self.process_scanner.sample_hot_threads([proc for _, proc in procs.values()])
+            lines = []
+            for pid, (name, _) in procs.items():
+                threads = sampled.get(pid)
+                summary = describe_hot_threads(threads) if threads is not None else "threads not accessible"
+                lines.append(f"{name} (PID: {pid}): {summary}")
+                self.log_message(f"Hot threads of {name} (PID: {pid}): {summary}")
+            self.ui.post('hot_threads', lines)
+            self.ui.post('status', "Ready")
+        
+        threading.Thread(target=sample_thread, daemon=True).start()
+    
+    def show_hot_threads(self, lines):
+        messagebox.showinfo("Hot Threads", '\n\n'.join(lines) if lines else "No threads could be sampled")
+    
     def stop_selected_services(self):
         """Stop selected services"""
         selected_items = self.service_tree.selection()
@@ -323,10 +752,11 @@ class ResourceMonitorGUI:
         if not messagebox.askyesno("Confirm", "Are you sure you want to stop selected services?"):
             return
         
+        selected_values = [self.service_tree.item(item, 'values') for item in selected_items]
+        
         def stop_thread():
             stopped_count = 0
-            for item in selected_items:
-                values = self.service_tree.item(item, 'values')
+            for values in selected_values:
                 if values and len(values) > 0:  # Skip category headers
                     service_name = values[0]
                     if self.service_manager.stop_service(service_name):
@@ -334,7 +764,7 @@ class ResourceMonitorGUI:
                         self.log_message(f"Stopped service: {service_name}")
             
             self.log_message(f"Stopped {stopped_count} services")
-            self.root.after(1000, self.refresh_services)
+            self.ui.post('refresh_services')
         
         threading.Thread(target=stop_thread, daemon=True).start()
     
@@ -349,10 +779,11 @@ class ResourceMonitorGUI:
             messagebox.showerror("Error", "Service manager not available")
             return
         
+        selected_values = [self.service_tree.item(item, 'values') for item in selected_items]
+        
         def start_thread():
             started_count = 0
-            for item in selected_items:
-                values = self.service_tree.item(item, 'values')
+            for values in selected_values:
                 if values and len(values) > 0:
                     service_name = values[0]
                     if self.service_manager.start_service(service_name):
@@ -360,40 +791,53 @@ class ResourceMonitorGUI:
                         self.log_message(f"Started service: {service_name}")
             
             self.log_message(f"Started {started_count} services")
-            self.root.after(1000, self.refresh_services)
+            self.ui.post('refresh_services')
         
         threading.Thread(target=start_thread, daemon=True).start()
     
     def auto_clean(self):
-        """Perform automatic cleanup"""
+        """Plan the smallest cleanup that reaches the reclaim goal and confirm it"""
         if not self.process_scanner or not self.service_manager:
             messagebox.showerror("Error", "Scanner components not available")
             return
-            
-        if not messagebox.askyesno("Confirm", "This will automatically terminate unnecessary processes and stop unnecessary services. Continue?"):
+        
+        results = self.scan_results
+        
+        def plan_thread():
+            try:
+                self.ui.post('status', "Planning cleanup...")
+                plan = self.reclaim_planner.plan(RECLAIM_TARGET_AVAILABLE_MB, RECLAIM_TARGET_CPU_PERCENT,
+                                                 results or None)
+                self.ui.post('reclaim_plan', plan)
+                self.ui.post('status', "Ready")
+            except Exception as e:
+                self.log_message(f"Error planning cleanup: {e}")
+                self.ui.post('status', "Planning failed")
+        
+        threading.Thread(target=plan_thread, daemon=True).start()
+    
+    def confirm_reclaim_plan(self, plan):
+        """Show the dry-run plan and carry it out if confirmed"""
+        lines = format_plan(plan)
+        for line in lines:
+            self.log_message(f"Auto-clean plan: {line.strip()}")
+        
+        if not plan['actions']:
+            messagebox.showinfo("Auto Clean", "\n".join(lines))
             return
         
+        shown = lines if len(lines) <= 25 else lines[:23] + [f"  ... {len(lines) - 24} more", lines[-1]]
+        if messagebox.askyesno("Confirm", "\n".join(shown) + "\n\nContinue?"):
+            self.execute_reclaim_plan(plan)
+    
+    def execute_reclaim_plan(self, plan):
+        """Carry out a reclaim plan on a worker thread"""
         def clean_thread():
-            cleaned_processes = 0
-            cleaned_services = 0
-            
-            # Clean processes
-            if hasattr(self, 'scan_results') and self.scan_results:
-                for process_type in ['unnecessary', 'inactive']:
-                    if process_type in self.scan_results:
-                        for proc in self.scan_results[process_type]:
-                            if self.process_scanner.terminate_process(proc):
-                                cleaned_processes += 1
-            
-            # Clean services
-            unnecessary_services = self.service_manager.find_unnecessary_services()
-            for service in unnecessary_services:
-                if self.service_manager.stop_service(service['name']):
-                    cleaned_services += 1
-            
-            self.log_message(f"Auto-clean completed: {cleaned_processes} processes, {cleaned_services} services")
-            self.root.after(1000, self.perform_scan)
-            self.root.after(1000, self.refresh_services)
+            completed = self.reclaim_planner.execute(
+                plan, on_action=lambda action, ok: self.log_message(describe_action(action, ok)))
+            self.log_message(f"Auto-clean completed: {completed} of {len(plan['actions'])} planned actions")
+            self.ui.post('rescan')
+            self.ui.post('refresh_services')
         
         threading.Thread(target=clean_thread, daemon=True).start()
     
@@ -402,6 +846,7 @@ class ResourceMonitorGUI:
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"resource_monitor_report_{timestamp}.json"
+            shared = self.shared_snapshot()
             
             report_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -419,13 +864,36 @@ class ResourceMonitorGUI:
                             if details:
                                 report_data['scan_results'][process_type].append(details)
             
+            # The monitor's own cost as of the last scan
+            if self.process_scanner and self.process_scanner.overhead() is not None:
+                report_data['monitor_overhead'] = self.process_scanner.overhead()
+            
             # Add services if available
-            if self.service_manager:
+            if shared is not None:
+                report_data['services'] = shared.archive.service_list()
+            elif self.service_manager:
                 report_data['services'] = self.service_manager.get_all_services()
             
+            # Per-cgroup usage from the last scan (Linux cgroup v2)
+            if self.process_scanner and self.process_scanner.cgroup_tracker is not None:
+                report_data['cgroups'] = list(self.process_scanner.cgroup_tracker.usage.values())
+            
             with open(filename, 'w') as f:
                 json.dump(report_data, f, indent=2)
             
+            # Compact binary copy for fast diffs between reports
+            from snapshot_archive import write_archive, ARCHIVE_EXTENSION
+            archive = f"resource_monitor_report_{timestamp}{ARCHIVE_EXTENSION}"
+            if EXPORT_SNAPSHOT_ARCHIVE and shared is not None:
+                # The collector's snapshot is already in archive format
+                with open(archive, 'wb') as f:
+                    f.write(shared.payload)
+                self.log_message(f"Snapshot archive exported to {archive}")
+            elif EXPORT_SNAPSHOT_ARCHIVE and self.process_scanner and self.process_scanner.last_snapshot is not None:
+                write_archive(archive, self.process_scanner.last_snapshot, self.scan_results,
+                              report_data['services'], host=platform.node())
+                self.log_message(f"Snapshot archive exported to {archive}")
+            
             messagebox.showinfo("Export", f"Report exported to {filename}")
             self.log_message(f"Report exported to {filename}")
             
@@ -434,14 +902,21 @@ class ResourceMonitorGUI:
     
     def log_message(self, message):
         """Add a message to the log"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        
-        def update_log():
-            self.log_text.insert(tk.END, log_entry)
-            self.log_text.see(tk.END)
-        
-        self.root.after(0, update_log)
+        self.logger.info(message)
+    
+    def append_log_lines(self, lines):
+        """Write a batch of log lines to the log tab and trim old lines"""
+        self.log_text.insert(tk.END, '\n'.join(lines) + '\n')
+        # The widget always ends with an empty line after the last newline
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_TAB_MAX_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        self.log_text.see(tk.END)
+    
+    def process_ui_updates(self):
+        """Apply updates posted by worker threads, once per frame"""
+        self.ui.drain()
+        self.root.after(UI_FRAME_MS, self.process_ui_updates)
     
     def update_status(self, status):
         """Update the status label"""
@@ -456,9 +931,13 @@ class ResourceMonitorGUI:
             self.log_message("Resource Monitor Scanner started successfully")
             # Load initial data
             self.refresh_services()
+            if PRESSURE_WATCH_ENABLED:
+                self.pressure_watcher.start()
         
         # Start the main loop
         self.root.mainloop()
+        if self.instance_server:
+            self.instance_server.stop()
 
 if __name__ == "__main__":
     app = ResourceMonitorGUI()
@@ -0,0 +1,109 @@
+from bisect import bisect_left, bisect_right
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+def _sort_key(value):
+    """Numbers (and numeric strings like "1.5 / 0.2") sort numerically, everything else as text"""
+    if isinstance(value, (int, float)):
+        return (0, value, '')
+    text = str(value)
+    try:
+        return (0, float(text.split(' ', 1)[0]), '')
+    except ValueError:
+        return (1, 0, text.lower())
+
+
+class RowIndex:
+    """Search and sort index over a fixed list of display rows.
+
+    Built once per scan, off the UI thread, so filtering and sorting never
+    touch the system again:
+
+    - substring search runs ``str.find`` over one lowercase corpus of the text
+      columns and maps hits back to rows with a row-offset table;
+    - ``^prefix`` queries bisect a sorted array of the first text column;
+    - the row order for each of ``sort_columns`` is computed up front, and for
+      any other column on first use.
+    """
+
+    def __init__(self, rows: List[Sequence], text_columns: Sequence[int], sort_columns: Sequence[int] = ()):
+        self.rows = rows
+        self.text_columns = text_columns
+        self.orders = {}
+
+        texts = ['\x00'.join(str(row[column]).lower() for column in text_columns) for row in rows]
+        self.offsets = []
+        position = 0
+        for text in texts:
+            self.offsets.append(position)
+            position += len(text) + 1
+        self.corpus = '\n'.join(texts)
+
+        keyed = sorted((str(row[text_columns[0]]).lower(), i) for i, row in enumerate(rows))
+        self.prefix_keys = [key for key, _ in keyed]
+        self.prefix_rows = [i for _, i in keyed]
+
+        for column in sort_columns:
+            self.order(column)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, query: str) -> Optional[List[int]]:
+        """Rows matching ``query``, or None when the query matches everything"""
+        query = query.strip().lower()
+        if not query or query == '^':
+            return None
+
+        if query.startswith('^'):
+            prefix = query[1:]
+            start = bisect_left(self.prefix_keys, prefix)
+            end = bisect_right(self.prefix_keys, prefix + '\uffff', start)
+            return self.prefix_rows[start:end]
+
+        matches = []
+        corpus, offsets = self.corpus, self.offsets
+        position = corpus.find(query)
+        while position >= 0:
+            row = bisect_right(offsets, position) - 1
+            matches.append(row)
+            # Continue from the next row so each row is reported once
+            if row + 1 >= len(offsets):
+                break
+            position = corpus.find(query, offsets[row + 1])
+        return matches
+
+    def order(self, column: int) -> List[int]:
+        """Row ids sorted ascending by ``column``"""
+        order = self.orders.get(column)
+        if order is None:
+            keys = [_sort_key(row[column]) for row in self.rows]
+            order = self.orders[column] = sorted(range(len(self.rows)), key=keys.__getitem__)
+        return order
+
+    def view(self, query: str = '', sort_column: Optional[int] = None, descending: bool = False,
+             include: Optional[Callable[[Sequence], bool]] = None, limit: Optional[int] = None) -> Tuple[List[int], int]:
+        """Row ids to display (filtered, sorted, at most ``limit``) and the total number of matches"""
+        matches = self.search(query)
+        if sort_column is None:
+            order = range(len(self.rows)) if matches is None else sorted(matches)
+        else:
+            order = self.order(sort_column)
+        if descending:
+            order = reversed(order)
+
+        if matches is not None and sort_column is not None:
+            selected = bytearray(len(self.rows))
+            for row in matches:
+                selected[row] = 1
+            order = (row for row in order if selected[row])
+        if include is not None:
+            order = (row for row in order if include(self.rows[row]))
+
+        shown = []
+        total = 0
+        for row in order:
+            total += 1
+            if limit is None or len(shown) < limit:
+                shown.append(row)
+        return shown, total
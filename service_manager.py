@@ -1,3 +1,4 @@
+import asyncio
 import win32service
 import win32serviceutil
 import win32api
@@ -91,10 +92,11 @@ class ServiceManager:
         except Exception:
             return "Unknown"
     
-    def find_unnecessary_services(self) -> List[Dict]:
-        """Find services that are unnecessary and running"""
+    def find_unnecessary_services(self, all_services: List[Dict] = None) -> List[Dict]:
+        """Find services that are unnecessary and running, in ``all_services`` if given"""
         unnecessary = []
-        all_services = self.get_all_services()
+        if all_services is None:
+            all_services = self.get_all_services()
         
         for service in all_services:
             if (service['is_unnecessary'] and 
@@ -117,34 +119,53 @@ class ServiceManager:
         
         return stopped_auto
     
-    def stop_service(self, service_name: str) -> bool:
-        """Stop a Windows service"""
+    def _request_stop(self, service_name: str):
+        """Send a stop control to a service and return its open (scm, service) handles"""
+        self.logger.info(f"Stopping service: {service_name}")
+        
+        # Open service control manager
+        scm = win32service.OpenSCManager(None, None, win32service.SC_MANAGER_CONNECT)
+        
         try:
-            if service_name.lower() in CRITICAL_SERVICES:
-                self.logger.warning(f"Attempted to stop critical service: {service_name}")
-                return False
-            
-            self.logger.info(f"Stopping service: {service_name}")
-            
-            # Open service control manager
-            scm = win32service.OpenSCManager(None, None, win32service.SC_MANAGER_CONNECT)
-            
             # Open the service
             service_handle = win32service.OpenService(
                 scm, service_name, 
                 win32service.SERVICE_STOP | win32service.SERVICE_QUERY_STATUS
             )
-            
+        except Exception:
+            win32service.CloseServiceHandle(scm)
+            raise
+        
+        try:
             # Stop the service
             win32service.ControlService(service_handle, win32service.SERVICE_CONTROL_STOP)
+        except Exception:
+            win32service.CloseServiceHandle(service_handle)
+            win32service.CloseServiceHandle(scm)
+            raise
+        
+        return scm, service_handle
+    
+    def _is_stopped(self, service_handle) -> bool:
+        """Check whether a service has reached the stopped state"""
+        status = win32service.QueryServiceStatus(service_handle)
+        return status[1] == win32service.SERVICE_STOPPED
+    
+    def stop_service(self, service_name: str) -> bool:
+        """Stop a Windows service"""
+        try:
+            if service_name.lower() in CRITICAL_SERVICES:
+                self.logger.warning(f"Attempted to stop critical service: {service_name}")
+                return False
+            
+            scm, service_handle = self._request_stop(service_name)
             
             # Wait for service to stop
             timeout = 30  # seconds
             start_time = time.time()
             
             while time.time() - start_time < timeout:
-                status = win32service.QueryServiceStatus(service_handle)
-                if status[1] == win32service.SERVICE_STOPPED:
+                if self._is_stopped(service_handle):
                     break
                 time.sleep(1)
             
@@ -158,6 +179,48 @@ class ServiceManager:
             self.logger.error(f"Failed to stop service {service_name}: {e}")
             return False
     
+    async def _stop_service_async(self, service_name: str, timeout: float, poll_interval: float) -> bool:
+        """Stop one service, polling its state with asyncio.sleep instead of time.sleep"""
+        if service_name.lower() in CRITICAL_SERVICES:
+            self.logger.warning(f"Attempted to stop critical service: {service_name}")
+            return False
+        
+        loop = asyncio.get_running_loop()
+        try:
+            scm, service_handle = await loop.run_in_executor(None, self._request_stop, service_name)
+        except Exception as e:
+            self.logger.error(f"Failed to stop service {service_name}: {e}")
+            return False
+        
+        try:
+            deadline = loop.time() + timeout
+            while True:
+                if await loop.run_in_executor(None, self._is_stopped, service_handle):
+                    self.logger.info(f"Successfully stopped service: {service_name}")
+                    return True
+                if loop.time() >= deadline:
+                    self.logger.error(f"Timed out waiting for service {service_name} to stop")
+                    return False
+                await asyncio.sleep(poll_interval)
+        except Exception as e:
+            self.logger.error(f"Failed to stop service {service_name}: {e}")
+            return False
+        finally:
+            win32service.CloseServiceHandle(service_handle)
+            win32service.CloseServiceHandle(scm)
+    
+    async def stop_services_async(self, service_names: List[str], timeout: float = 30.0,
+                                  poll_interval: float = 0.5) -> Dict[str, bool]:
+        """Stop several services concurrently without blocking the event loop.
+        
+        ``timeout`` applies to each service. Cancelling the call stops the polling
+        and closes the service handles; already-sent stop controls are not undone.
+        """
+        results = await asyncio.gather(*(
+            self._stop_service_async(name, timeout, poll_interval) for name in service_names
+        ))
+        return dict(zip(service_names, results))
+    
     def start_service(self, service_name: str) -> bool:
         """Start a Windows service"""
         try:
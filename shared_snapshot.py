@@ -0,0 +1,167 @@
+"""
+Latest scan published in shared memory by a background collector.
+
+One collector process (``main.py --publish``) scans every few seconds and
+writes the result, encoded as a snapshot archive, into a named
+``multiprocessing.shared_memory`` segment. GUI windows, CLI runs and exports on
+the same machine attach and read it instead of repeating the scan.
+
+The segment starts with a header that is updated like a sequence lock: the
+single writer makes the sequence number odd, writes the payload, then makes it
+even again. Readers never take a lock; they copy the payload and retry if the
+sequence was odd or changed while copying, or the checksum does not match.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+import zlib
+import logging
+from collections import namedtuple
+from multiprocessing import shared_memory
+from typing import Optional
+
+import psutil
+
+from config import (SHARED_SNAPSHOT_NAME, SHARED_SNAPSHOT_SIZE, SHARED_SNAPSHOT_INTERVAL,
+                    SHARED_SNAPSHOT_MAX_AGE)
+from snapshot_archive import SnapshotArchive, encode_archive
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b'RMSHM\x00\x00\x00'
+LAYOUT_VERSION = 1
+
+# magic, layout version, sequence (odd while a write is in progress), payload length,
+# payload CRC-32, publish time, writer PID; the archive payload follows
+SEGMENT_HEADER = struct.Struct('<8sIQQIdI')
+
+# A consistent copy of the published snapshot
+SharedSnapshot = namedtuple('SharedSnapshot', ['archive', 'payload', 'published', 'writer_pid'])
+
+
+def _attach(name: str) -> Optional[shared_memory.SharedMemory]:
+    """Open an existing segment without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    except FileNotFoundError:
+        return None
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return None
+    # Before Python 3.13 the resource tracker would remove the segment when this reader exits
+    if os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class SnapshotPublisher:
+    """Single writer of the shared snapshot segment"""
+
+    def __init__(self, name: str = SHARED_SNAPSHOT_NAME, size: int = SHARED_SNAPSHOT_SIZE):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        # A segment that disappears between the failed create and the attach is created again
+        for _ in range(3):
+            try:
+                self.segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+                self.sequence = 0
+                return
+            except FileExistsError:
+                # Left behind by a collector that did not exit cleanly, unless it is still running
+                segment = _attach(name)
+            if segment is not None:
+                break
+        else:
+            raise RuntimeError(f"Shared memory segment '{name}' exists but could not be opened")
+        
+        if segment.size < SEGMENT_HEADER.size:
+            segment.close()
+            raise RuntimeError(f"Shared memory segment '{name}' is too small to be a snapshot segment")
+        magic, _, sequence, _, _, _, writer_pid = SEGMENT_HEADER.unpack_from(segment.buf, 0)
+        if magic == SEGMENT_MAGIC and writer_pid != os.getpid() and psutil.pid_exists(writer_pid):
+            segment.close()
+            raise RuntimeError(f"Another collector (PID {writer_pid}) is already publishing to '{name}'")
+        self.segment = segment
+        self.sequence = sequence + sequence % 2
+
+    def publish(self, payload: bytes, timestamp: float) -> bool:
+        """Replace the published snapshot with ``payload``"""
+        buf = self.segment.buf
+        if SEGMENT_HEADER.size + len(payload) > self.segment.size:
+            self.logger.error(f"Snapshot of {len(payload)} bytes does not fit the {self.segment.size}-byte "
+                              f"shared segment; raise SHARED_SNAPSHOT_SIZE")
+            return False
+        fields = (len(payload), zlib.crc32(payload), timestamp, os.getpid())
+        SEGMENT_HEADER.pack_into(buf, 0, SEGMENT_MAGIC, LAYOUT_VERSION, self.sequence + 1, *fields)
+        buf[SEGMENT_HEADER.size:SEGMENT_HEADER.size + len(payload)] = payload
+        self.sequence += 2
+        SEGMENT_HEADER.pack_into(buf, 0, SEGMENT_MAGIC, LAYOUT_VERSION, self.sequence, *fields)
+        return True
+
+    def close(self, unlink: bool = True):
+        self.segment.close()
+        if unlink:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def read_shared_snapshot(max_age: float = SHARED_SNAPSHOT_MAX_AGE, name: str = SHARED_SNAPSHOT_NAME,
+                         retries: int = 10) -> Optional[SharedSnapshot]:
+    """The published snapshot if a collector is running and it is at most ``max_age`` seconds old"""
+    segment = _attach(name)
+    if segment is None:
+        return None
+    try:
+        for _ in range(retries):
+            magic, version, sequence, length, checksum, published, writer_pid = \
+                SEGMENT_HEADER.unpack_from(segment.buf, 0)
+            if magic != SEGMENT_MAGIC or version != LAYOUT_VERSION or sequence == 0:
+                return None
+            if sequence % 2 == 0:
+                payload = bytes(segment.buf[SEGMENT_HEADER.size:SEGMENT_HEADER.size + length])
+                if SEGMENT_HEADER.unpack_from(segment.buf, 0)[2] == sequence and zlib.crc32(payload) == checksum:
+                    break
+            time.sleep(0.001)
+        else:
+            return None
+    finally:
+        segment.close()
+
+    if time.time() - published > max_age or not psutil.pid_exists(writer_pid):
+        return None
+    return SharedSnapshot(SnapshotArchive.from_buffer(payload, f"shared:{name}"), payload, published, writer_pid)
+
+
+def run_publisher(interval: float = SHARED_SNAPSHOT_INTERVAL, name: str = SHARED_SNAPSHOT_NAME,
+                  stop_event: Optional[threading.Event] = None):
+    """Scan every ``interval`` seconds and publish each result for other instances to read"""
+    from process_scanner import ProcessScanner
+    try:
+        from service_manager import ServiceManager
+        service_manager = ServiceManager()
+    except ImportError:
+        service_manager = None
+
+    scanner = ProcessScanner()
+    publisher = SnapshotPublisher(name)
+    stop_event = stop_event or threading.Event()
+    host = socket.gethostname()
+    logger.info(f"Publishing snapshots to shared memory '{name}' every {interval}s")
+    try:
+        while not stop_event.is_set():
+            results = scanner.scan_all()
+            services = service_manager.get_all_services() if service_manager else []
+            snapshot = scanner.last_snapshot
+            publisher.publish(encode_archive(snapshot, results, services, host), snapshot.timestamp)
+            stop_event.wait(scanner.scan_interval(interval))
+    finally:
+        publisher.close()
@@ -0,0 +1,207 @@
+"""
+One running GUI instance per user, and a local IPC channel to it.
+
+The running instance listens on a per-user named pipe (Windows) or Unix socket.
+A second launch connects to it instead of starting another scanner: it asks
+the instance to come to the front and rescan, or, for ``--cli``, for its latest
+snapshot. Requests and replies are JSON, followed by raw snapshot bytes where
+there are any; nothing received over the channel is unpickled.
+
+Pipe names are global on Windows, so both ends also prove they know a random
+key kept in a file only the user can read (``authkey`` of
+``multiprocessing.connection``); a pipe or socket squatted by another user
+fails that handshake.
+
+This module only uses the standard library, so launchers can check for a
+running instance without importing the scanner.
+"""
+
+import getpass
+import json
+import os
+import secrets
+import stat
+import tempfile
+import threading
+import time
+import logging
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Dict, Optional, Tuple
+
+from config import SINGLE_INSTANCE_NAME, SINGLE_INSTANCE_TIMEOUT
+
+MAX_REQUEST_BYTES = 64 * 1024
+AUTHKEY_BYTES = 32
+
+# Handler result: JSON-serializable reply and optional binary data sent after it
+Reply = Tuple[Dict, bytes]
+
+
+def runtime_dir(name: str = SINGLE_INSTANCE_NAME) -> str:
+    """A directory only this user can enter: ``%LOCALAPPDATA%`` on Windows, ``$XDG_RUNTIME_DIR``
+    or one under the temp directory elsewhere"""
+    if os.name == 'nt':
+        path = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), name)
+        os.makedirs(path, exist_ok=True)
+        return path
+    path = os.environ.get('XDG_RUNTIME_DIR')
+    if path and os.path.isdir(path):
+        return path
+    path = os.path.join(tempfile.gettempdir(), f'{name}-{os.getuid()}')
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a directory owned by this user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+def instance_address(name: str = SINGLE_INSTANCE_NAME) -> str:
+    """Per-user address of the running instance"""
+    if os.name == 'nt':
+        return rf'\\.\pipe\{name}_{getpass.getuser()}'
+    return os.path.join(runtime_dir(name), f'{name}.sock')
+
+
+def instance_authkey(name: str = SINGLE_INSTANCE_NAME) -> bytes:
+    """The user's shared secret for the instance channel, created on first use"""
+    path = os.path.join(runtime_dir(name), f'{name}.key')
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another launch may be writing it right now
+        for _ in range(20):
+            with open(path, 'rb') as f:
+                key = f.read()
+            if len(key) == AUTHKEY_BYTES:
+                return key
+            time.sleep(0.05)
+        raise PermissionError(f"{path} does not hold a valid instance key")
+    key = secrets.token_bytes(AUTHKEY_BYTES)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def is_own_socket(address: str) -> bool:
+    """Whether ``address`` is a Unix socket owned by this user. Named pipes have no
+    owner check; their global names are covered by the authkey handshake instead."""
+    if os.name == 'nt':
+        return True
+    try:
+        info = os.lstat(address)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def send_command(command: str, timeout: float = SINGLE_INSTANCE_TIMEOUT,
+                 address: Optional[str] = None) -> Optional[Reply]:
+    """Send ``command`` to the running instance and return its reply and data, or None if none is running.
+
+    An instance that accepts the connection but does not answer within
+    ``timeout`` seconds is still running; the reply is then ``{'ok': False}``.
+    """
+    try:
+        address = address or instance_address()
+        # Never talk to a socket another user put in our place
+        if not is_own_socket(address):
+            return None
+        conn = Client(address, authkey=instance_authkey())
+    except OSError:
+        return None
+    except AuthenticationError:
+        logging.getLogger(__name__).warning(f"{address} is held by a process that is not this user's instance")
+        return None
+    with conn:
+        try:
+            conn.send_bytes(json.dumps({'command': command}).encode('utf-8'))
+            if not conn.poll(timeout):
+                return {'ok': False, 'error': 'timed out'}, b''
+            reply = json.loads(conn.recv_bytes())
+            data = conn.recv_bytes() if reply.get('data') else b''
+        except (OSError, EOFError, ValueError) as e:
+            return {'ok': False, 'error': str(e)}, b''
+    return reply, data
+
+
+class InstanceServer:
+    """Accepts commands from later launches on behalf of the running instance.
+
+    ``handlers`` map command names to callables returning a ``Reply``; they
+    run on a per-connection background thread.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[], Reply]], address: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.address = address
+        self.handlers = dict(handlers)
+        self.handlers.setdefault('ping', lambda: ({'ok': True, 'pid': os.getpid()}, b''))
+        self.listener = None
+        self.authkey = None
+
+    def start(self) -> bool:
+        """Claim the instance address; False if another instance already holds it or it cannot be claimed"""
+        try:
+            self.address = self.address or instance_address()
+            self.authkey = instance_authkey()
+        except OSError as e:
+            self.logger.error(f"No private directory for the instance socket and key: {e}")
+            return False
+        try:
+            self.listener = Listener(self.address, backlog=5, authkey=self.authkey)
+        except OSError:
+            # Only a socket of our own can be a stale one worth replacing
+            if (os.name == 'nt' or not is_own_socket(self.address)
+                    or send_command('ping', address=self.address) is not None):
+                return False
+            # A socket file left behind by an instance that did not exit cleanly
+            os.unlink(self.address)
+            self.listener = Listener(self.address, backlog=5, authkey=self.authkey)
+        if os.name != 'nt':
+            os.chmod(self.address, 0o600)
+        threading.Thread(target=self._serve, daemon=True).start()
+        return True
+
+    def stop(self):
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.close()
+
+    def _serve(self):
+        while True:
+            listener = self.listener
+            if listener is None:
+                break
+            try:
+                conn = listener.accept()
+            except AuthenticationError as e:
+                self.logger.warning(f"Rejected an instance connection that failed authentication: {e}")
+                continue
+            except EOFError:
+                continue  # The client went away during the handshake
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                request = json.loads(conn.recv_bytes(MAX_REQUEST_BYTES))
+                handler = self.handlers.get(request.get('command'))
+                if handler is None:
+                    reply, data = {'ok': False, 'error': f"unknown command: {request.get('command')}"}, b''
+                else:
+                    reply, data = handler()
+                conn.send_bytes(json.dumps(dict(reply, data=bool(data))).encode('utf-8'))
+                if data:
+                    conn.send_bytes(data)
+            except (OSError, EOFError, ValueError) as e:
+                self.logger.debug(f"Instance request failed: {e}")
+            except Exception as e:
+                self.logger.error(f"Instance command handler failed: {e}")
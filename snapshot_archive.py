@@ -0,0 +1,368 @@
+"""
+Compact columnar binary snapshot archive.
+
+A file holds one scan: an interned string table, fixed-width process columns,
+a PID-sorted index and an exe-sorted index, and a small service table. Readers
+memory-map the file and look at columns through zero-copy memoryviews, so
+diffing two archives only touches the columns it compares. The same encoding
+is what a background collector publishes in shared memory.
+"""
+
+import mmap
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+import psutil
+
+from config import DIFF_GROWN_MB, DIFF_GROWN_RATIO
+from process_snapshot import ProcessSnapshot, SNAPSHOT_ATTRS, CATEGORY_FLAGS, category_flags
+
+ARCHIVE_MAGIC = b'RMSNAP\x00\x01'
+ARCHIVE_EXTENSION = '.rmsnap'
+
+# magic, row count, service count, string count, timestamp, host string id, section count
+HEADER = struct.Struct('<8sIIIdII')
+
+# Section name, array typecode; every section is stored as (offset, length) after the header
+SECTIONS = [
+    ('string_offsets', 'I'), ('string_data', 'B'),
+    ('pid', 'I'), ('name', 'I'), ('exe', 'I'), ('rss', 'Q'), ('cpu', 'f'),
+    ('create_time', 'd'), ('status', 'B'), ('flags', 'B'),
+    ('pid_index', 'I'), ('exe_index', 'I'),
+    ('service_name', 'I'), ('service_display', 'I'), ('service_status', 'I'),
+    ('service_start', 'I'), ('service_pid', 'I'), ('service_flags', 'B')
+]
+SECTION_ENTRY = struct.Struct('<QQ')
+MAX_TIMESTAMP = 2 ** 34  # Year 2514; far beyond any real creation time and within time_t everywhere
+
+SERVICE_CRITICAL = 0x01
+SERVICE_UNNECESSARY = 0x02
+
+
+class StringTable:
+    """Interns strings into consecutive ids"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        value = value or ''
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+
+def _exe_path(proc: psutil.Process) -> str:
+    try:
+        return proc.exe()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError):
+        return ''
+
+
+def write_archive(path: str, snapshot: ProcessSnapshot, results: Dict[str, List] = None,
+                  services: List[Dict] = None, host: str = '') -> int:
+    """Write a scan to ``path`` and return the number of bytes written"""
+    data = encode_archive(snapshot, results, services, host)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def encode_archive(snapshot: ProcessSnapshot, results: Dict[str, List] = None,
+                   services: List[Dict] = None, host: str = '') -> bytes:
+    """Encode a scan in the archive format"""
+    if sys.byteorder != 'little':
+        raise OSError("Snapshot archives are only supported on little-endian hosts")
+
+    strings = StringTable()
+    flags_by_pid = category_flags(results or {})
+    n = len(snapshot)
+
+    sections = {name: array(typecode) for name, typecode in SECTIONS}
+    for i in range(n):
+        pid = int(snapshot.pids[i])
+        sections['pid'].append(pid)
+        sections['name'].append(strings.intern(snapshot.names[int(snapshot.name_ids[i])]))
+        sections['exe'].append(strings.intern(_exe_path(snapshot.procs[i])))
+        sections['rss'].append(int(snapshot.rss[i]))
+        sections['cpu'].append(float(snapshot.cpu[i]))
+        sections['create_time'].append(snapshot.timestamp - float(snapshot.age[i]))
+        sections['status'].append(int(snapshot.status[i]))
+        sections['flags'].append(flags_by_pid.get(pid, 0))
+
+    sections['pid_index'].extend(sorted(range(n), key=sections['pid'].__getitem__))
+    sections['exe_index'].extend(sorted(range(n), key=lambda row: strings.values[sections['exe'][row]]))
+
+    for service in services or []:
+        sections['service_name'].append(strings.intern(service['name']))
+        sections['service_display'].append(strings.intern(service.get('display_name')))
+        sections['service_status'].append(strings.intern(service.get('status')))
+        sections['service_start'].append(strings.intern(service.get('start_type')))
+        sections['service_pid'].append(service.get('pid') or 0)
+        sections['service_flags'].append((SERVICE_CRITICAL if service.get('is_critical') else 0) |
+                                         (SERVICE_UNNECESSARY if service.get('is_unnecessary') else 0))
+
+    host_id = strings.intern(host)
+    offset = 0
+    for value in strings.values:
+        sections['string_offsets'].append(offset)
+        encoded = value.encode('utf-8')
+        sections['string_data'].frombytes(encoded)
+        offset += len(encoded)
+    sections['string_offsets'].append(offset)
+
+    header = HEADER.pack(ARCHIVE_MAGIC, n, len(services or []), len(strings.values),
+                         snapshot.timestamp, host_id, len(SECTIONS))
+    position = HEADER.size + SECTION_ENTRY.size * len(SECTIONS)
+    table = []
+    blobs = []
+    for name, _ in SECTIONS:
+        # Align every section to 8 bytes so it can be cast in place when mapped
+        padding = -position % 8
+        blobs.append(b'\x00' * padding)
+        position += padding
+        data = sections[name].tobytes()
+        table.append(SECTION_ENTRY.pack(position, len(data)))
+        blobs.append(data)
+        position += len(data)
+
+    return header + b''.join(table) + b''.join(blobs)
+
+
+class SnapshotArchive:
+    """Memory-mapped reader for a snapshot archive"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._load(self.map)
+
+    @classmethod
+    def from_buffer(cls, buffer, name: str = '<buffer>') -> 'SnapshotArchive':
+        """Read an archive held in memory, e.g. a copy of a shared-memory snapshot"""
+        archive = cls.__new__(cls)
+        archive.path = name
+        archive.file = archive.map = None
+        archive._load(buffer)
+        return archive
+
+    def _load(self, buffer):
+        self.view = memoryview(buffer)
+        if len(self.view) < HEADER.size + SECTION_ENTRY.size * len(SECTIONS):
+            self._reject("truncated header")
+        magic, self.row_count, self.service_count, self.string_count, self.timestamp, host_id, section_count = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != ARCHIVE_MAGIC or section_count != len(SECTIONS):
+            self._reject("bad magic or section count")
+
+        # Items each section must hold; string_data is free-form
+        expected = dict.fromkeys(('pid', 'name', 'exe', 'rss', 'cpu', 'create_time', 'status', 'flags',
+                                  'pid_index', 'exe_index'), self.row_count)
+        expected.update(dict.fromkeys(('service_name', 'service_display', 'service_status', 'service_start',
+                                       'service_pid', 'service_flags'), self.service_count))
+        expected['string_offsets'] = self.string_count + 1
+
+        self.columns = {}
+        for index, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(buffer, HEADER.size + index * SECTION_ENTRY.size)
+            itemsize = array(typecode).itemsize
+            if offset + length > len(self.view) or length % itemsize:
+                self._reject(f"section {name} is out of bounds")
+            if name in expected and length // itemsize != expected[name]:
+                self._reject(f"section {name} has {length // itemsize} items, expected {expected[name]}")
+            self.columns[name] = self.view[offset:offset + length].cast(typecode)
+        if host_id >= self.string_count:
+            self._reject("host string out of range")
+        # Every id must point inside the table it refers to, so lookups can index without checks
+        if max(self.columns['string_offsets'], default=0) > len(self.columns['string_data']):
+            self._reject("string offset out of range")
+        for name in ('name', 'exe', 'service_name', 'service_display', 'service_status', 'service_start'):
+            if max(self.columns[name], default=0) >= max(self.string_count, 1):
+                self._reject(f"section {name} refers to a missing string")
+        for name in ('pid_index', 'exe_index'):
+            if max(self.columns[name], default=0) >= max(self.row_count, 1):
+                self._reject(f"section {name} refers to a missing row")
+        # Creation times are formatted with time.localtime, which rejects NaN and far-off values
+        if not all(0 <= created <= MAX_TIMESTAMP for created in self.columns['create_time']):
+            self._reject("creation time out of range")
+        self.host = self.string(host_id)
+
+    def _reject(self, reason: str):
+        self.close()
+        raise ValueError(f"Not a snapshot archive ({reason}): {self.path}")
+
+    def close(self):
+        for column in getattr(self, 'columns', {}).values():
+            column.release()
+        self.columns = {}
+        self.view.release()
+        if self.map is not None:
+            self.map.close()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def string(self, string_id: int) -> str:
+        offsets = self.columns['string_offsets']
+        return bytes(self.columns['string_data'][offsets[string_id]:offsets[string_id + 1]]).decode('utf-8', 'replace')
+
+    def row(self, row: int) -> Dict:
+        """Decode a single process row"""
+        c = self.columns
+        return {
+            'pid': c['pid'][row],
+            'name': self.string(c['name'][row]),
+            'exe': self.string(c['exe'][row]),
+            'memory_mb': round(c['rss'][row] / 1024 / 1024, 2),
+            'cpu_percent': round(c['cpu'][row], 2),
+            'create_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(c['create_time'][row])),
+            'categories': [name for name, bit in CATEGORY_FLAGS.items() if c['flags'][row] & bit]
+        }
+
+    def find_pid(self, pid: int) -> Optional[int]:
+        """Row index for ``pid`` using the PID-sorted index, or None"""
+        index, pids = self.columns['pid_index'], self.columns['pid']
+        position = bisect_left(_LazyKeys(lambda i: pids[index[i]], len(index)), pid)
+        if position < len(index) and pids[index[position]] == pid:
+            return index[position]
+        return None
+
+    def find_exe(self, exe: str) -> List[int]:
+        """Row indices whose executable path equals ``exe``"""
+        index, exes = self.columns['exe_index'], self.columns['exe']
+        keys = _LazyKeys(lambda i: self.string(exes[index[i]]), len(index))
+        start = bisect_left(keys, exe)
+        rows = []
+        while start < len(index) and self.string(exes[index[start]]) == exe:
+            rows.append(index[start])
+            start += 1
+        return rows
+
+    def services(self) -> Dict[str, Dict]:
+        """Service table keyed by service name"""
+        c = self.columns
+        return {
+            self.string(c['service_name'][i]): {
+                'display_name': self.string(c['service_display'][i]),
+                'status': self.string(c['service_status'][i]),
+                'start_type': self.string(c['service_start'][i]),
+                'pid': c['service_pid'][i] or None,
+                'is_critical': bool(c['service_flags'][i] & SERVICE_CRITICAL),
+                'is_unnecessary': bool(c['service_flags'][i] & SERVICE_UNNECESSARY)
+            }
+            for i in range(self.service_count)
+        }
+
+    def service_list(self) -> List[Dict]:
+        """Service table in the form returned by ``ServiceManager.get_all_services``"""
+        return [dict(info, name=name) for name, info in self.services().items()]
+
+    def live_results(self) -> Dict[str, List[psutil.Process]]:
+        """Flagged processes that are still running, by category, as ``scan_all`` returns them"""
+        results = {category: [] for category in CATEGORY_FLAGS}
+        c = self.columns
+        for row in range(self.row_count):
+            flags = c['flags'][row]
+            if not flags:
+                continue
+            try:
+                proc = psutil.Process(c['pid'][row])
+                if abs(proc.create_time() - c['create_time'][row]) > 1.0:
+                    continue  # The PID was reused
+                proc.info = proc.as_dict(SNAPSHOT_ATTRS, ad_value=None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            # A fresh Process object has no previous CPU sample; keep the archived one
+            proc.info['cpu_percent'] = c['cpu'][row]
+            for category, bit in CATEGORY_FLAGS.items():
+                if flags & bit:
+                    results[category].append(proc)
+        return results
+
+
+class _LazyKeys:
+    """Sequence view used to bisect a sorted index without decoding every key"""
+
+    def __init__(self, key, length: int):
+        self.key = key
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, i: int) -> str:
+        return self.key(i)
+
+
+def diff_archives(old: SnapshotArchive, new: SnapshotArchive, grown_mb: float = DIFF_GROWN_MB,
+                  grown_ratio: float = DIFF_GROWN_RATIO) -> Dict[str, List]:
+    """Compare two archives by a merge join over their PID indices.
+
+    A process is matched by PID and creation time, so a reused PID shows up as
+    gone plus new. Only matched rows' RSS is compared, and only rows that end up
+    in the result are decoded.
+    """
+    new_rows, gone_rows, grown = [], [], []
+    old_index, new_index = old.columns['pid_index'], new.columns['pid_index']
+    old_pid, new_pid = old.columns['pid'], new.columns['pid']
+    old_created, new_created = old.columns['create_time'], new.columns['create_time']
+    old_rss, new_rss = old.columns['rss'], new.columns['rss']
+    threshold = grown_mb * 1024 * 1024
+
+    i = j = 0
+    while i < len(old_index) or j < len(new_index):
+        a = old_index[i] if i < len(old_index) else None
+        b = new_index[j] if j < len(new_index) else None
+        if b is None or (a is not None and old_pid[a] < new_pid[b]):
+            gone_rows.append(a)
+            i += 1
+        elif a is None or new_pid[b] < old_pid[a]:
+            new_rows.append(b)
+            j += 1
+        else:
+            if abs(old_created[a] - new_created[b]) > 1.0:
+                gone_rows.append(a)
+                new_rows.append(b)
+            else:
+                delta = new_rss[b] - old_rss[a]
+                if delta > threshold and delta > old_rss[a] * grown_ratio:
+                    grown.append((a, b, delta))
+            i += 1
+            j += 1
+
+    grown_list = []
+    for a, b, delta in sorted(grown, key=lambda item: item[2], reverse=True):
+        row = new.row(b)
+        row['previous_memory_mb'] = old.row(a)['memory_mb']
+        row['growth_mb'] = round(delta / 1024 / 1024, 2)
+        grown_list.append(row)
+
+    old_services, new_services = old.services(), new.services()
+    service_changes = []
+    for name in sorted(set(old_services) | set(new_services)):
+        before = old_services.get(name, {}).get('status', 'Missing')
+        after = new_services.get(name, {}).get('status', 'Missing')
+        if before != after:
+            service_changes.append({'name': name, 'before': before, 'after': after})
+
+    return {
+        'new': [new.row(row) for row in new_rows],
+        'gone': [old.row(row) for row in gone_rows],
+        'grown': grown_list,
+        'services': service_changes
+    }
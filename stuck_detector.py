@@ -0,0 +1,105 @@
+"""
+Detection of stuck processes and of parents that leave zombies unreaped.
+
+A single scan cannot tell a stuck process from one that is briefly blocked or
+idle, so the detector follows each process over consecutive scans and only
+flags it once it has stayed in the same state, without using CPU time where
+that matters, for ``STUCK_MIN_SCANS`` scans in a row.
+"""
+
+from typing import Dict, List, Tuple
+
+import psutil
+
+from process_snapshot import ProcessSnapshot, STATUS_CODES, np
+
+DISK_SLEEP = STATUS_CODES[psutil.STATUS_DISK_SLEEP]
+RUNNING = STATUS_CODES[psutil.STATUS_RUNNING]
+ZOMBIE = STATUS_CODES[psutil.STATUS_ZOMBIE]
+
+
+class StuckDetector:
+    """Finds processes that are stuck rather than merely idle, across consecutive scans.
+
+    - uninterruptible sleep (``disk-sleep``) in every one of the last ``min_scans`` scans
+    - running in every one of those scans without any CPU time being used
+    - zombies that outlive ``min_scans`` scans, reported on the parent that does not reap them
+
+    A zombie has already exited and cannot be terminated; its parent is the
+    process to act on. Processes are followed by PID and creation time, so a
+    reused PID starts over.
+    """
+
+    def __init__(self, min_scans: int):
+        self.min_scans = min_scans
+        # (pid, create_time) -> consecutive scans in the watched state, and the cumulative CPU time last seen
+        self.streaks: Dict[Tuple[int, float], Tuple[int, float]] = {}
+        # Why each flagged process was flagged and what to do about it, keyed by PID
+        self.reasons: Dict[int, Dict] = {}
+
+    def _streak(self, streaks, key, cpu_time: float, progress_matters: bool) -> int:
+        count, last_cpu = self.streaks.get(key, (0, -1.0))
+        # Any CPU time used since the previous scan is progress and restarts the count
+        if progress_matters and (cpu_time < 0 or last_cpu < 0 or cpu_time != last_cpu):
+            count = 0
+        streaks[key] = (count + 1, cpu_time)
+        return count + 1
+
+    def update(self, snapshot: ProcessSnapshot, candidates):
+        """Advance the per-process streaks and return a mask of rows to act on"""
+        n = len(snapshot)
+        watched = [DISK_SLEEP, ZOMBIE]
+        # Windows reports nearly every process as running, so idle would look stuck there
+        if not psutil.WINDOWS:
+            watched.append(RUNNING)
+        if np is not None:
+            rows = np.flatnonzero(np.isin(snapshot.status, watched)).tolist()
+        else:
+            rows = [i for i, status in enumerate(snapshot.status) if status in watched]
+
+        streaks = {}
+        # Row -> why it was flagged and what to do about it
+        flagged: Dict[int, Dict] = {}
+        zombies: Dict[int, List[int]] = {}
+        for i in rows:
+            proc = snapshot.procs[i]
+            status = int(snapshot.status[i])
+            # Running and disk-sleep streaks are separate; a change of state starts over
+            key = (proc.pid, proc.info.get('create_time'), status)
+            count = self._streak(streaks, key, float(snapshot.cpu_time[i]), status == RUNNING)
+            if count < self.min_scans:
+                continue
+            if status == ZOMBIE:
+                zombies.setdefault(int(snapshot.ppids[i]), []).append(proc.pid)
+            elif status == DISK_SLEEP:
+                flagged[i] = {
+                    'reason': f"in uninterruptible sleep for {count} scans",
+                    'action': "wait for or fix the blocked I/O; signals are not delivered until it completes"
+                }
+            else:
+                flagged[i] = {
+                    'reason': f"running for {count} scans without using CPU time",
+                    'action': "terminate it"
+                }
+        self.streaks = streaks
+
+        if zombies:
+            row_of = {int(pid): i for i, pid in enumerate(snapshot.pids)}
+            for parent, children in zombies.items():
+                i = row_of.get(parent)
+                if i is None:
+                    continue
+                flagged[i] = {
+                    'reason': f"not reaping {len(children)} zombie children (PIDs {', '.join(map(str, children))})",
+                    'action': "terminate the parent so init adopts and reaps its zombies",
+                    'zombies': children
+                }
+
+        # Rows that are not candidates (critical or protected processes) are neither reported nor acted on
+        flagged = {i: reason for i, reason in flagged.items() if candidates[i]}
+        self.reasons = {int(snapshot.pids[i]): reason for i, reason in flagged.items()}
+        if np is not None:
+            mask = np.zeros(n, dtype=bool)
+            mask[list(flagged)] = True
+            return mask
+        return [i in flagged for i in range(n)]
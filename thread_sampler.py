@@ -0,0 +1,75 @@
+"""
+Per-thread CPU sampling for processes that are already flagged.
+
+A process at 80% CPU does not say which of its threads is spinning. The sampler
+reads the cumulative CPU time of every thread (``Process.threads()``) of a few
+processes, waits one short interval, reads them again and ranks the threads by
+the CPU time they used in between. All processes share the one interval, so
+sampling several costs little more than sampling one.
+"""
+
+import heapq
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional
+
+import psutil
+
+# One thread's CPU use between the two samples: percent of one core, and its
+# share (0-1) of the CPU time the whole process used in the interval
+HotThread = namedtuple('HotThread', ['tid', 'name', 'cpu_percent', 'share'])
+
+
+def _thread_times(proc: psutil.Process) -> Optional[Dict[int, float]]:
+    """Cumulative user + system CPU seconds per thread id"""
+    try:
+        return {thread.id: thread.user_time + thread.system_time for thread in proc.threads()}
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError):
+        return None
+
+
+def thread_name(pid: int, tid: int) -> Optional[str]:
+    """Thread name from /proc/<pid>/task/<tid>/comm on Linux, otherwise None"""
+    if not psutil.LINUX:
+        return None
+    try:
+        with open(f'/proc/{pid}/task/{tid}/comm') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def sample_hot_threads(procs: Iterable[psutil.Process], interval: float, top_n: int) -> Dict[int, List[HotThread]]:
+    """The ``top_n`` busiest threads of each process over ``interval`` seconds, keyed by PID"""
+    before = {}
+    for proc in procs:
+        times = _thread_times(proc)
+        if times is not None:
+            before[proc.pid] = (proc, times)
+    if not before:
+        return {}
+
+    started = time.monotonic()
+    time.sleep(interval)
+    elapsed = time.monotonic() - started
+
+    hot = {}
+    for pid, (proc, times) in before.items():
+        after = _thread_times(proc)
+        if after is None:
+            continue
+        # Threads started during the interval used all of their CPU time within it
+        deltas = {tid: max(0.0, total - times.get(tid, 0.0)) for tid, total in after.items()}
+        used = sum(deltas.values())
+        busiest = heapq.nlargest(top_n, deltas.items(), key=lambda item: item[1])
+        hot[pid] = [HotThread(tid, thread_name(pid, tid), delta / elapsed * 100, delta / used)
+                    for tid, delta in busiest if delta > 0]
+    return hot
+
+
+def describe_hot_threads(threads: List[HotThread]) -> str:
+    """One-line summary such as '4242 (worker) 78.0% CPU, 91% of process'"""
+    if not threads:
+        return "no thread used CPU during the sample"
+    return "; ".join(f"{thread.tid}{f' ({thread.name})' if thread.name else ''} {thread.cpu_percent:.1f}% CPU, "
+                     f"{thread.share * 100:.0f}% of process" for thread in threads)
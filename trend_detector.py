@@ -0,0 +1,161 @@
+import math
+from typing import Dict, Optional
+
+from process_snapshot import ProcessSnapshot, ProcessState, np
+
+# Weighted least-squares sums kept per process and metric, plus the latest sample.
+# Older samples are discounted by ``decay`` per update so the slope follows the
+# recent trend instead of the whole lifetime of the process.
+TREND_FIELDS = ('count', 'weight', 'sum_t', 'sum_y', 'sum_tt', 'sum_ty', 'sum_yy', 'last')
+
+
+def _fit(sums):
+    """Fitted growth per second and goodness of fit (close to 1.0 for steady, monotonic growth).
+
+    ``sums`` holds one number per field, or one column per field when NumPy is used.
+    """
+    weight, sum_t, sum_y = sums['weight'], sums['sum_t'], sums['sum_y']
+    var_t = weight * sums['sum_tt'] - sum_t * sum_t
+    var_y = weight * sums['sum_yy'] - sum_y * sum_y
+    covariance = weight * sums['sum_ty'] - sum_t * sum_y
+    if np is not None:
+        zeros = np.zeros(len(var_t))
+        slope = np.divide(covariance, var_t, out=zeros.copy(), where=var_t > 0)
+        fitted = (var_t > 0) & (var_y > 0)
+        r_squared = np.minimum(1.0, np.divide(covariance * covariance, var_t * var_y, out=zeros, where=fitted))
+        return slope, r_squared
+    slope = covariance / var_t if var_t > 0 else 0.0
+    r_squared = min(1.0, covariance * covariance / (var_t * var_y)) if var_t > 0 and var_y > 0 else 0.0
+    return slope, r_squared
+
+
+class TrendDetector:
+    """Tracks RSS, handle and thread growth per process and reports likely leaks.
+
+    The least-squares sums of every process are columns keyed by PID and creation
+    time (``ProcessState``), so a scan updates all processes and fits all slopes
+    at once; processes that exited are dropped.
+    """
+
+    def __init__(self, min_samples: int, min_r_squared: float, decay: float,
+                 min_growth: Dict[str, float], limits: Dict[str, float]):
+        self.min_samples = min_samples
+        self.min_r_squared = min_r_squared
+        self.decay = decay
+        # Minimum growth per hour and the limit used for time-to-threshold, per metric
+        self.min_growth = min_growth
+        self.limits = limits
+        self.state = ProcessState(['origin'] + [f'{metric}_{field}' for metric in limits for field in TREND_FIELDS])
+        self.estimates: Dict[int, Dict] = {}
+
+    def _estimate(self, metric: str, sums: Dict[str, float]) -> Optional[Dict]:
+        """Leak estimate for one metric of one process, or None if it is not growing steadily"""
+        slope, r_squared = _fit(sums)
+        if sums['count'] < self.min_samples or r_squared < self.min_r_squared:
+            return None
+        growth_per_hour = slope * 3600
+        if growth_per_hour <= self.min_growth[metric]:
+            return None
+        remaining = self.limits[metric] - sums['last']
+        return {
+            'metric': metric,
+            'growth_per_hour': growth_per_hour,
+            'time_to_threshold': max(0.0, remaining / slope) if slope > 0 else math.inf
+        }
+
+    def update(self, snapshot: ProcessSnapshot, candidates):
+        """Add one scan's samples and return a mask of rows that look like leaks"""
+        columns = {'rss': snapshot.rss, 'handles': snapshot.handles, 'threads': snapshot.threads}
+        self.estimates = {}
+        if np is not None:
+            return self._update_columns(snapshot, np.flatnonzero(candidates), columns)
+        return self._update_rows(snapshot, [i for i, flagged in enumerate(candidates) if flagged], columns)
+
+    def _update_columns(self, snapshot: ProcessSnapshot, rows, columns):
+        pids = np.asarray(snapshot.pids)[rows]
+        created = np.asarray(snapshot.create_time)[rows]
+        match = self.state.lookup(pids, created)
+        origin = np.where(match >= 0, self.state.previous('origin', match), snapshot.timestamp)
+        t = snapshot.timestamp - origin
+        updated = {'origin': origin}
+
+        # Soonest time to threshold over the metrics of each row, and which metric it was
+        best = np.full(len(rows), np.inf)
+        best_metric = np.full(len(rows), -1)
+        best_growth = np.zeros(len(rows))
+        for index, (metric, column) in enumerate(columns.items()):
+            values = np.asarray(column, dtype=np.float64)[rows]
+            valid = values >= 0  # -1 where the value was not readable; no sample then
+            sums = {field: self.state.previous(f'{metric}_{field}', match) for field in TREND_FIELDS}
+            d = self.decay
+            sums['count'] = sums['count'] + valid
+            sums['weight'] = np.where(valid, sums['weight'] * d + 1.0, sums['weight'])
+            for field, sample in (('sum_t', t), ('sum_y', values), ('sum_tt', t * t),
+                                  ('sum_ty', t * values), ('sum_yy', values * values)):
+                sums[field] = np.where(valid, sums[field] * d + sample, sums[field])
+            sums['last'] = np.where(valid, values, sums['last'])
+            updated.update({f'{metric}_{field}': sums[field] for field in TREND_FIELDS})
+
+            slope, r_squared = _fit(sums)
+            growth = slope * 3600
+            leaking = (valid & (sums['count'] >= self.min_samples) & (r_squared >= self.min_r_squared) &
+                       (growth > self.min_growth[metric]))
+            remaining = self.limits[metric] - sums['last']
+            time_left = np.maximum(0.0, np.divide(remaining, slope, out=np.full(len(rows), np.inf), where=slope > 0))
+            better = leaking & ((best_metric < 0) | (time_left < best))
+            best = np.where(better, time_left, best)
+            best_metric = np.where(better, index, best_metric)
+            best_growth = np.where(better, growth, best_growth)
+
+        # Only the rows of this scan are kept, which forgets processes that exited
+        self.state.store(pids, created, updated)
+
+        metrics = list(columns)
+        flagged = np.flatnonzero(best_metric >= 0)
+        for i in flagged:
+            self.estimates[int(pids[i])] = {
+                'metric': metrics[best_metric[i]],
+                'growth_per_hour': float(best_growth[i]),
+                'time_to_threshold': float(best[i])
+            }
+        mask = np.zeros(len(snapshot), dtype=bool)
+        mask[rows[flagged]] = True
+        return mask
+
+    def _update_rows(self, snapshot: ProcessSnapshot, rows, columns):
+        pids = [snapshot.pids[i] for i in rows]
+        created = [snapshot.create_time[i] for i in rows]
+        match = self.state.lookup(pids, created)
+        previous = {field: self.state.previous(field, match) for field in self.state.columns}
+        updated = {field: [] for field in self.state.columns}
+
+        mask = [False] * len(snapshot)
+        for k, i in enumerate(rows):
+            origin = previous['origin'][k] if match[k] >= 0 else snapshot.timestamp
+            t = snapshot.timestamp - origin
+            updated['origin'].append(origin)
+            worst = None
+            for metric, column in columns.items():
+                sums = {field: previous[f'{metric}_{field}'][k] for field in TREND_FIELDS}
+                value = float(column[i])
+                if value >= 0:  # -1 where the value was not readable; no sample then
+                    d = self.decay
+                    sums['count'] += 1
+                    sums['weight'] = sums['weight'] * d + 1.0
+                    sums['sum_t'] = sums['sum_t'] * d + t
+                    sums['sum_y'] = sums['sum_y'] * d + value
+                    sums['sum_tt'] = sums['sum_tt'] * d + t * t
+                    sums['sum_ty'] = sums['sum_ty'] * d + t * value
+                    sums['sum_yy'] = sums['sum_yy'] * d + value * value
+                    sums['last'] = value
+                    estimate = self._estimate(metric, sums)
+                    if estimate and (worst is None or estimate['time_to_threshold'] < worst['time_to_threshold']):
+                        worst = estimate
+                for field in TREND_FIELDS:
+                    updated[f'{metric}_{field}'].append(sums[field])
+            if worst:
+                mask[i] = True
+                self.estimates[pids[k]] = worst
+
+        self.state.store(pids, created, updated)
+        return mask
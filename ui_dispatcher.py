@@ -0,0 +1,54 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class UiDispatcher:
+    """Single queue of typed updates from worker threads to the UI thread.
+
+    Workers ``post`` from any thread and the UI thread calls ``drain`` once per
+    frame. Coalesced kinds keep only the latest payload posted since the last
+    frame, so a burst of snapshots is rendered once; other kinds deliver every
+    payload, as a list, keeping at most ``limit`` of them.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.handlers: Dict[str, Callable[[Any], None]] = {}
+        self.coalesced: Dict[str, bool] = {}
+        self.limits: Dict[str, Optional[int]] = {}
+        self.pending: Dict[str, Any] = {}
+
+    def register(self, kind: str, handler: Callable[[Any], None], coalesce: bool = True,
+                 limit: Optional[int] = None):
+        with self.lock:
+            self.handlers[kind] = handler
+            self.coalesced[kind] = coalesce
+            self.limits[kind] = limit
+
+    def post(self, kind: str, payload: Any = None):
+        """Queue an update; safe to call from any thread"""
+        with self.lock:
+            if self.coalesced[kind]:
+                # Re-insert so the update is applied in the order of its latest post
+                self.pending.pop(kind, None)
+                self.pending[kind] = payload
+            else:
+                queue = self.pending.get(kind)
+                if queue is None:
+                    queue = self.pending[kind] = deque(maxlen=self.limits[kind])
+                queue.append(payload)
+
+    def drain(self) -> int:
+        """Apply all pending updates on the calling (UI) thread; returns how many kinds were handled"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        for kind, payload in pending.items():
+            try:
+                self.handlers[kind](payload if self.coalesced[kind] else list(payload))
+            except Exception as e:
+                self.logger.error(f"UI update '{kind}' failed: {e}")
+        return len(pending)